@@ -34,6 +34,8 @@ from tenacity import (
     retry_if_exception_type,
 )
 
+from .indicators import calculate_atr, calculate_macd, calculate_rsi
+
 # 配置日志
 logger = logging.getLogger(__name__)
 
@@ -230,49 +232,22 @@ class BaseFetcher(ABC):
         # Signal = EMA(MACD, 9)
         # Hist = MACD - Signal
 
-        ema12 = df['close'].ewm(span=12, adjust=False).mean()
-        ema26 = df['close'].ewm(span=26, adjust=False).mean()
-        df['macd'] = ema12 - ema26
-
-        # Signal Line = EMA(MACD, 9)
-        df['macd_signal'] = df['macd'].ewm(span=9, adjust=False).mean()
-
-        # Histogram = MACD - Signal
-        df['macd_hist'] = df['macd'] - df['macd_signal']
+        macd = calculate_macd(df['close'])
+        df['macd'] = macd['macd']
+        df['macd_signal'] = macd['macd_signal']
+        df['macd_hist'] = macd['macd_hist']
 
         # ========== 新增：RSI ==========
         # RSI = 100 - (100 / (1 + RS))
         # RS = 平均涨幅 / 平均跌幅 (14日)
 
-        delta = df['close'].diff()
-
-        # 分离涨跌
-        gain = delta.where(delta > 0, 0)
-        loss = -delta.where(delta < 0, 0)
-
-        # 计算平均涨跌幅
-        avg_gain = gain.rolling(window=14).mean()
-        avg_loss = loss.rolling(window=14).mean()
-
-        # 避免除零
-        rs = avg_gain / avg_loss.replace(0, np.nan)
-        df['rsi'] = 100 - (100 / (1 + rs))
-
         # 数据不足时填充为 50（中性值）
-        df['rsi'] = df['rsi'].fillna(50)
+        df['rsi'] = calculate_rsi(df['close'], period=14)
 
         # ========== 新增：ATR ==========
         # ATR = max(H-L, |H-C_prev|, |L-C_prev|) 的 MA(14)
 
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-
-        # 取三者最大值
-        true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-
-        # 14日均值
-        df['atr'] = true_range.rolling(window=14).mean()
+        df['atr'] = calculate_atr(df, period=14)
 
         # ========== 保留2位小数 ==========
         indicator_cols = [
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+===================================
+技术指标计算
+===================================
+
+职责：
+1. 计算 MACD、RSI、ATR、布林带等技术指标，供 BaseFetcher._calculate_indicators 调用
+2. 安装 numba 时使用 JIT 编译的单遍递推内核
+3. 未安装 numba 时回退到纯 pandas 实现，结果一致
+"""
+
+import logging
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+try:
+    from numba import njit, prange
+except ImportError:  # numba 为可选依赖
+    njit = None
+    prange = range
+
+
+def _as_float_array(series: pd.Series) -> np.ndarray:
+    """
+    取出连续的 float64 数组
+
+    已是 float64 时直接返回底层数据的视图，不复制；
+    连续内存保证 numba 内核按同一签名编译，不会因布局不同重新编译
+    """
+    return np.ascontiguousarray(series.to_numpy(dtype=np.float64, copy=False))
+
+
+def _ema_loop(values: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    EMA 单遍递推：ema[i] = alpha * x[i] + (1 - alpha) * ema[i-1]，ema[0] = x[0]
+
+    与 pandas ewm(adjust=False) 一致；输入不得包含 NaN
+    """
+    n = values.shape[0]
+    out = np.empty(n)
+    if n == 0:
+        return out
+    out[0] = values[0]
+    for i in range(1, n):
+        out[i] = alpha * values[i] + (1.0 - alpha) * out[i - 1]
+    return out
+
+
+# numba 可用时编译递推内核（cache=True 将编译结果缓存到磁盘，避免每次启动重新编译）
+_ema_kernel = njit(cache=True)(_ema_loop) if njit is not None else None
+
+# 批量内核调用的 EMA 实现（numba 编译时必须引用已编译的内核）
+_ema_impl = _ema_kernel if _ema_kernel is not None else _ema_loop
+
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """
+    计算指数移动平均 EMA(span)，等价于 pandas ewm(span=span, adjust=False).mean()
+
+    Args:
+        values: float64 一维数组
+        span: 周期
+
+    Returns:
+        EMA 数组
+    """
+    alpha = 2.0 / (span + 1)
+    if _ema_kernel is not None and not np.isnan(values).any():
+        return _ema_kernel(values, alpha)
+    # 含 NaN 时 pandas 会按间隔衰减权重，交给 pandas 处理
+    return pd.Series(values).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    滑动窗口均值，等价于 pandas rolling(window).mean()
+
+    逐窗口独立求和（无累计误差），全零窗口的结果精确为 0；
+    前 window-1 个位置及窗口内含 NaN 时结果为 NaN
+    """
+    # 只填充头部 NaN，有效区域由窗口均值直接写入，不重复初始化
+    out = np.empty(values.shape[0])
+    out[:window - 1] = np.nan
+    if values.shape[0] >= window:
+        out[window - 1:] = sliding_window_view(values, window).mean(axis=1)
+    return out
+
+
+def calculate_macd(
+    close: pd.Series,
+    fast: int = 12,
+    slow: int = 26,
+    signal: int = 9
+) -> pd.DataFrame:
+    """
+    计算 MACD 指标
+
+    MACD = EMA(fast) - EMA(slow)
+    Signal = EMA(MACD, signal)
+    Hist = MACD - Signal
+
+    Args:
+        close: 收盘价序列
+        fast: 快线周期，默认 12
+        slow: 慢线周期，默认 26
+        signal: 信号线周期，默认 9
+
+    Returns:
+        包含 macd / macd_signal / macd_hist 三列的 DataFrame，索引与 close 一致
+    """
+    values = _as_float_array(close)
+    macd = ema(values, fast) - ema(values, slow)
+    macd_signal = ema(macd, signal)
+
+    return pd.DataFrame(
+        {
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'macd_hist': macd - macd_signal,
+        },
+        index=close.index,
+        copy=False,
+    )
+
+
+def _macd_batch_loop(
+    close2d: np.ndarray,
+    fast_alpha: float,
+    slow_alpha: float,
+    signal_alpha: float
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    逐行（每行一只股票）计算 DIF / DEA，各行相互独立
+
+    numba parallel 编译后 prange 将各行分配到多个线程；输入不得包含 NaN
+    """
+    n = close2d.shape[0]
+    dif = np.empty_like(close2d)
+    dea = np.empty_like(close2d)
+    for i in prange(n):
+        dif[i] = _ema_impl(close2d[i], fast_alpha) - _ema_impl(close2d[i], slow_alpha)
+        dea[i] = _ema_impl(dif[i], signal_alpha)
+    return dif, dea
+
+
+_macd_batch_kernel = (
+    njit(parallel=True, cache=True)(_macd_batch_loop) if njit is not None else None
+)
+
+
+def calculate_macd_batch(
+    close_matrix: np.ndarray,
+    fast: int = 12,
+    slow: int = 26,
+    signal: int = 9
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    批量计算多只股票的 MACD（每行一只股票、每列一个交易日）
+
+    安装 numba 时按股票并行计算；否则由 pandas 按列一次性计算全部股票的 EMA，
+    结果与逐只调用 calculate_macd 一致
+
+    Args:
+        close_matrix: 收盘价矩阵，形状 (股票数, 交易日数)
+        fast: 快线周期，默认 12
+        slow: 慢线周期，默认 26
+        signal: 信号线周期，默认 9
+
+    Returns:
+        (macd, macd_signal, macd_hist) 三个与输入同形状的数组
+
+    Raises:
+        ValueError: 输入不是二维矩阵
+    """
+    values = np.ascontiguousarray(close_matrix, dtype=np.float64)
+    if values.ndim != 2:
+        raise ValueError(f"收盘价矩阵应为二维，实际为 {values.ndim} 维")
+
+    if _macd_batch_kernel is not None and not np.isnan(values).any():
+        macd, macd_signal = _macd_batch_kernel(
+            values, 2.0 / (fast + 1), 2.0 / (slow + 1), 2.0 / (signal + 1)
+        )
+    else:
+        # 转置为每列一只股票，pandas ewm 在 C 层逐列递推
+        frame = pd.DataFrame(values.T)
+        dif = frame.ewm(span=fast, adjust=False).mean() - frame.ewm(span=slow, adjust=False).mean()
+        dea = dif.ewm(span=signal, adjust=False).mean()
+        macd, macd_signal = dif.to_numpy().T, dea.to_numpy().T
+
+    return macd, macd_signal, macd - macd_signal
+
+
+def calculate_rsi(close: pd.Series, period: int = 14) -> pd.Series:
+    """
+    计算 RSI 指标
+
+    RSI = 100 - 100 / (1 + RS)，RS = 平均涨幅 / 平均跌幅（period 日简单平均）
+    数据不足或平均跌幅为 0 时填充为 50（中性值）
+
+    Args:
+        close: 收盘价序列
+        period: 周期，默认 14
+
+    Returns:
+        RSI 序列，索引与 close 一致
+    """
+    values = _as_float_array(close)
+    delta = np.diff(values, prepend=np.nan)
+
+    # 分离涨跌（首日及 NaN 按 0 计）
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+
+    avg_gain = rolling_mean(gain, period)
+    avg_loss = rolling_mean(loss, period)
+
+    # 避免除零：平均跌幅为 0 时 RS 记为 NaN
+    rs = np.full_like(avg_gain, np.nan)
+    np.divide(avg_gain, avg_loss, out=rs, where=avg_loss != 0)
+    rsi = 100 - 100 / (1 + rs)
+
+    return pd.Series(np.where(np.isnan(rsi), 50.0, rsi), index=close.index, copy=False)
+
+
+def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
+    """
+    计算 ATR 指标（平均真实波幅）
+
+    TR = max(H-L, |H-C_prev|, |L-C_prev|)，ATR = TR 的 period 日简单平均
+
+    Args:
+        df: 包含 high / low / close 列的 DataFrame
+        period: 周期，默认 14
+
+    Returns:
+        ATR 序列，索引与 df 一致
+    """
+    high = _as_float_array(df['high'])
+    low = _as_float_array(df['low'])
+    close = _as_float_array(df['close'])
+
+    prev_close = np.empty_like(close)
+    prev_close[:1] = np.nan
+    prev_close[1:] = close[:-1]
+
+    # 取三者最大值（fmax 忽略 NaN：首日没有昨收时 TR = H-L）
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+    return pd.Series(rolling_mean(true_range, period), index=df.index, copy=False)
+
+
+def calculate_bollinger_bands(
+    close: pd.Series,
+    period: int = 20,
+    num_std: float = 2.0
+) -> pd.DataFrame:
+    """
+    计算布林带，结果可直接传给 TechnicalIndicatorInterpreter.interpret_bollinger_bands
+
+    中轨 = period 日均线，上/下轨 = 中轨 ± num_std × period 日标准差（样本标准差，与 pandas rolling.std 一致）
+    由累计和 / 累计平方和一次性得到全部窗口的均值与方差，O(n) 复杂度
+
+    Args:
+        close: 收盘价序列
+        period: 周期，默认 20
+        num_std: 标准差倍数，默认 2
+
+    Returns:
+        包含 bb_upper / bb_middle / bb_lower 三列的 DataFrame，前 period-1 行为 NaN
+    """
+    values = _as_float_array(close)
+    n = values.shape[0]
+
+    if np.isnan(values).any():
+        # NaN 会沿累计和传播到之后所有窗口，交给 pandas 按窗口处理
+        rolling = close.astype(np.float64).rolling(window=period)
+        middle = rolling.mean().to_numpy()
+        std = rolling.std().to_numpy()
+    else:
+        middle = np.full(n, np.nan)
+        std = np.full(n, np.nan)
+        if n >= period:
+            # 以首个价格为基准平移，降低累计平方和的量级，减少相减时的精度损失
+            base = values[0]
+            shifted = values - base
+            cumsum = np.concatenate(([0.0], np.cumsum(shifted)))
+            cumsum_sq = np.concatenate(([0.0], np.cumsum(shifted * shifted)))
+            window_sum = cumsum[period:] - cumsum[:-period]
+            window_sum_sq = cumsum_sq[period:] - cumsum_sq[:-period]
+
+            mean = window_sum / period
+            middle[period - 1:] = mean + base
+
+            # 样本标准差至少需要 2 个数据点（与 pandas 一致，period=1 时为 NaN）
+            if period > 1:
+                var = (window_sum_sq - window_sum * mean) / (period - 1)
+
+                # 窗口内价格全部相同（如停牌）时标准差精确为 0，避免残留的舍入误差撑开带宽
+                changes = np.concatenate(([0], np.cumsum(values[1:] != values[:-1])))
+                flat = changes[period - 1:] == changes[:n - period + 1]
+
+                std[period - 1:] = np.where(flat, 0.0, np.sqrt(np.maximum(var, 0.0)))
+
+    return pd.DataFrame(
+        {
+            'bb_upper': middle + num_std * std,
+            'bb_middle': middle,
+            'bb_lower': middle - num_std * std,
+        },
+        index=close.index,
+        copy=False,
+    )
@@ -7,7 +7,7 @@
 集中管理系统中使用的枚举类型，提供类型安全和代码可读性。
 """
 
-from enum import Enum
+from enum import Enum, IntEnum
 
 
 class ReportType(str, Enum):
@@ -43,3 +43,15 @@ class ReportType(str, Enum):
             ReportType.SIMPLE: "精简报告",
             ReportType.FULL: "完整报告",
         }.get(self, "精简报告")
+
+
+class SignalDirection(IntEnum):
+    """
+    技术指标信号方向
+
+    继承 int，可直接按正负判断买卖方向（> 0 买入，< 0 卖出），
+    不依赖信号文案中的“买”“卖”字样。
+    """
+    SELL = -1     # 卖出类信号
+    NEUTRAL = 0   # 观望/中性
+    BUY = 1       # 买入类信号
@@ -48,7 +48,7 @@ from data_provider.akshare_fetcher import AkshareFetcher, RealtimeQuote, ChipDis
 from analyzer import GeminiAnalyzer, AnalysisResult, STOCK_NAME_MAP
 from notification import NotificationService, NotificationChannel, send_daily_report
 from search_service import SearchService, SearchResponse
-from stock_analyzer import StockTrendAnalyzer, TrendAnalysisResult
+from stock_analyzer import TrendAnalysisResult, get_analyzer
 from market_analyzer import MarketAnalyzer
 from enums import ReportType
 from stock_name_resolver import get_name_resolver
@@ -152,7 +152,7 @@ class StockAnalysisPipeline:
         self.db = get_db()
         self.fetcher_manager = DataFetcherManager()
         self.akshare_fetcher = AkshareFetcher()  # 用于获取增强数据（量比、筹码等）
-        self.trend_analyzer = StockTrendAnalyzer()  # 趋势分析器
+        self.trend_analyzer = get_analyzer()  # 趋势分析器（共享单例）
         self.analyzer = GeminiAnalyzer()
         self.notifier = NotificationService()
         
@@ -305,12 +305,10 @@ class StockAnalysisPipeline:
             trend_result: Optional[TrendAnalysisResult] = None
             try:
                 # 获取历史数据进行趋势分析
-                context = self.db.get_analysis_context(code)
+                context = self.db.get_analysis_context(code, with_raw=True)
                 if context and 'raw_data' in context:
-                    import pandas as pd
-                    raw_data = context['raw_data']
-                    if isinstance(raw_data, list) and len(raw_data) > 0:
-                        df = pd.DataFrame(raw_data)
+                    df = context['raw_data']
+                    if df is not None and not df.empty:
                         # ✅ 传入 news_context，启用第四层舆情过滤
                         trend_result = self.trend_analyzer.analyze(df, code, news_context=news_context)
                         logger.info(f"[{code}] 趋势分析: {trend_result.trend_status.value}, "
@@ -616,6 +614,12 @@ class StockAnalysisPipeline:
         if single_stock_notify:
             logger.info("已启用单股推送模式：每分析完一只股票立即推送")
 
+        # 批量预解析股票名称，避免每只股票单独查询数据源
+        try:
+            get_name_resolver().bulk_resolve(stock_codes)
+        except Exception as e:
+            logger.warning(f"批量解析股票名称失败: {e}")
+
         results: List[AnalysisResult] = []
 
         # 使用线程池并发处理
@@ -122,7 +122,7 @@ class MarketAnalyzer:
         cache_key = f"market_overview_{today}"
 
         # ✅ 尝试从缓存获取（TTL: 1小时）
-        cached_overview = self.cache_manager.get(cache_key, ttl=3600)
+        cached_overview = self.cache_manager.get(cache_key)
         if cached_overview is not None:
             logger.info(f"[大盘] 使用缓存数据: {today}")
             return cached_overview
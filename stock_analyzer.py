@@ -18,8 +18,11 @@
 """
 
 import logging
+import math
+from bisect import bisect_right
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any, List, Tuple
+from types import MappingProxyType
+from typing import Optional, Dict, Any, List, Mapping, Tuple
 from enum import Enum
 
 import pandas as pd
@@ -28,6 +31,86 @@ import numpy as np
 logger = logging.getLogger(__name__)
 
 
+# RSI 分档查表：按 int(RSI) 索引（0-99），替代逐级比较的分支链
+# 档位：0=超卖(<30)，1=健康(<70)，2=接近超买(<80)，3=超买
+_RSI_TIER = tuple(
+    0 if i < 30 else 1 if i < 70 else 2 if i < 80 else 3
+    for i in range(100)
+)
+# 各档位：(加分, 是否计入理由, 描述, 日志标签)
+_RSI_TIER_INFO = (
+    (15, True, '超卖区域', 'RSI超卖'),
+    (10, True, '健康区域', 'RSI健康'),
+    (0, False, '接近超买', None),
+    (0, False, '超买区域', None),
+)
+
+
+def _rsi_tier(rsi: float) -> int:
+    """查表获取 RSI 档位（NaN 视为超买档，与原比较链行为一致）"""
+    if rsi != rsi:
+        return 3
+    return _RSI_TIER[int(min(max(rsi, 0.0), 99.0))]
+
+
+# 舆情关键词库（模块级常量，避免每次舆情过滤重建字典）
+# 负面关键词 -> 严重程度
+_NEGATIVE_KEYWORDS = {
+    # 财务相关
+    '造假': '严重', '财务造假': '严重', '虚增利润': '严重', '财务违规': '严重',
+    '亏损': '中等', '业绩下滑': '中等', '业绩暴雷': '严重',
+    '债务': '中等', '债务违约': '严重', '资不抵债': '严重',
+
+    # 监管相关
+    '调查': '严重', '立案': '严重', '立案调查': '严重',
+    '处罚': '中等', '罚款': '中等', '监管': '轻微',
+    '退市': '严重', '退市风险': '严重', 'ST': '严重',
+    '违规': '中等', '违规担保': '严重', '内幕交易': '严重',
+
+    # 诉讼相关
+    '诉讼': '中等', '起诉': '中等', '被诉': '中等',
+    '官司': '轻微', '纠纷': '轻微',
+
+    # 经营相关
+    '停产': '严重', '停产整顿': '严重',
+    '倒闭': '严重', '破产': '严重', '破产重整': '严重',
+    '裁员': '中等', '裁员风波': '中等',
+
+    # 政策相关
+    '政策': '轻微', '政策风险': '中等',
+    '监管收紧': '中等', '加强监管': '中等',
+
+    # 其他负面
+    '暴跌': '中等', '大跌': '轻微',
+    '风险': '轻微', '警示': '轻微', '风险提示': '轻微',
+}
+
+# 正面关键词 -> 强度
+_POSITIVE_KEYWORDS = {
+    # 业绩相关
+    '增长': '轻微', '业绩增长': '中等', '业绩超预期': '强',
+    '大增': '中等', '暴增': '强', '大涨': '中等',
+
+    # 资本运作
+    '回购': '强', '股份回购': '强', '增持': '强',
+    '重大合同': '中等', '中标': '中等', '订单': '轻微',
+
+    # 认证/资质
+    '获批': '中等', '认证': '中等', '突破': '中等',
+    '独家': '中等', '首发': '中等', '首创': '中等',
+
+    # 分红
+    '分红': '轻微', '派息': '轻微', '高送转': '中等',
+
+    # 机构关注
+    '调研': '轻微', '机构调研': '中等',
+}
+
+# 预先展开为元组，遍历比字典迭代略快
+_NEGATIVE_KEYWORD_ITEMS = tuple(_NEGATIVE_KEYWORDS.items())
+_POSITIVE_KEYWORD_ITEMS = tuple(_POSITIVE_KEYWORDS.items())
+
+
 class TrendStatus(Enum):
     """趋势状态枚举"""
     STRONG_BULL = "强势多头"      # MA5 > MA10 > MA20，且间距扩大
@@ -165,23 +248,30 @@ class StockTrendAnalyzer:
     4. 避免信号冲突（只加分不扣分）
     """
 
-    # 市场参数配置
-    MARKET_CONFIG = {
-        'A股': {
+    # 市场参数配置（只读，分析器实例在线程间共享）
+    MARKET_CONFIG = MappingProxyType({
+        'A股': MappingProxyType({
             'bias_threshold': 5.0,      # 乖离率阈值（%）
             'atr_multiplier': 1.5,      # ATR止损倍数
             'atr_min_pct': 1.0,         # ATR最小百分比（正常波动）
             'atr_max_pct': 4.0,         # ATR最大百分比（正常波动）
             'currency': 'CNY',
-        },
-        '港股': {
+        }),
+        '港股': MappingProxyType({
             'bias_threshold': 6.0,      # 港股波动更大，放宽到6%
             'atr_multiplier': 2.0,      # 港股无涨跌停，需要更宽止损
             'atr_min_pct': 1.0,         # ATR最小百分比
             'atr_max_pct': 6.0,         # 港股正常波动范围更大
             'currency': 'HKD',
-        }
-    }
+        }),
+    })
+
+    # ATR 波动率分区边界（由 MARKET_CONFIG 预计算）
+    # bisect_right 结果：0=偏低(<=min)，1=健康(min~max)，2=过大(>=max)
+    _ATR_BOUNDS = MappingProxyType({
+        market: (math.nextafter(cfg['atr_min_pct'], math.inf), cfg['atr_max_pct'])
+        for market, cfg in MARKET_CONFIG.items()
+    })
 
     # 交易参数配置
     VOLUME_SHRINK_RATIO = 0.7   # 缩量判断阈值（当日量/5日均量）
@@ -189,7 +279,7 @@ class StockTrendAnalyzer:
     MA_SUPPORT_TOLERANCE = 0.02 # MA 支撑判断容忍度（2%）
 
     def __init__(self):
-        """初始化分析器"""
+        """初始化分析器（无实例状态，可在多线程间共享同一实例）"""
         pass
 
     def _detect_market_type(self, code: str) -> str:
@@ -233,11 +323,11 @@ class StockTrendAnalyzer:
 
         # 提取最新数据
         if df is None or len(df) < 20:
-            logger.warning(f"[{code}] 数据不足，无法分析（需要至少20天）")
+            logger.warning("[%s] 数据不足，无法分析（需要至少20天）", code)
             return result
 
-        latest = df.iloc[-1].to_dict()
-        prev = df.iloc[-2].to_dict() if len(df) >= 2 else latest
+        # 只取最后两行，一次性转换为字典，后续各层均复用，不再重复索引 DataFrame
+        prev, latest = df.iloc[-2:].to_dict('records')
 
         # 填充基础数据
         self._fill_basic_data(result, latest, prev)
@@ -249,13 +339,13 @@ class StockTrendAnalyzer:
             result.signal_score = 0
             result.signal_reasons = ["❌ 未通过趋势过滤"]
             result.risk_factors = [f"⚠️ {result.trend_status.value}，不做空头"]
-            logger.info(f"[{code}] ❌ 第一层过滤失败: {result.trend_status.value}")
+            logger.info("[%s] ❌ 第一层过滤失败: %s", code, result.trend_status.value)
             return result
 
         # 通过趋势过滤，基础分 40
         score = 40
         reasons = [f"✅ {result.trend_status.value}，通过趋势过滤"]
-        logger.info(f"[{code}] ✅ 第一层过滤通过: {result.trend_status.value}")
+        logger.info("[%s] ✅ 第一层过滤通过: %s", code, result.trend_status.value)
 
         # ========== 第二层：位置过滤 ==========
         bias_threshold = config['bias_threshold']
@@ -268,7 +358,7 @@ class StockTrendAnalyzer:
                 f"⚠️ 乖离率{result.bias_ma5:.1f}%，"
                 f"超过{market_type}阈值{bias_threshold}%"
             ]
-            logger.info(f"[{code}] ❌ 第二层过滤失败: 乖离率过大")
+            logger.info("[%s] ❌ 第二层过滤失败: 乖离率过大", code)
             return result
 
         # 通过位置过滤，+30分
@@ -277,17 +367,17 @@ class StockTrendAnalyzer:
             reasons.append(f"✅ 乖离率{result.bias_ma5:.1f}%，回踩买点")
         else:
             reasons.append(f"✅ 乖离率{result.bias_ma5:.1f}%，安全范围")
-        logger.info(f"[{code}] ✅ 第二层过滤通过: 乖离率 {result.bias_ma5:.1f}%")
+        logger.info("[%s] ✅ 第二层过滤通过: 乖离率 %.1f%%", code, result.bias_ma5)
 
         # ========== 第三层：辅助确认（加分制）==========
-        score, add_reasons, risks = self._check_auxiliary_indicators(
-            df, result, score, market_type, config
+        risks = []
+        score = self._check_auxiliary_indicators(
+            latest, prev, result, score, market_type, config, reasons, risks
         )
-        reasons.extend(add_reasons)
 
         # ========== 第四层：舆情过滤（新增）==========
         if news_context:
-            logger.info(f"[{code}] 开始第四层舆情过滤...")
+            logger.info("[%s] 开始第四层舆情过滤...", code)
             sentiment_pass, sentiment_info = self._check_sentiment_filter(
                 news_context, score
             )
@@ -302,16 +392,16 @@ class StockTrendAnalyzer:
                 result.signal_score = score
                 result.signal_reasons = reasons
                 result.risk_factors = risks + sentiment_info['risks']
-                logger.warning(f"[{code}] ❌ 第四层过滤失败: 重大利空 - {sentiment_info['result']}")
+                logger.warning("[%s] ❌ 第四层过滤失败: 重大利空 - %s", code, sentiment_info['result'])
                 return result
             else:
                 # 通过舆情过滤
                 if sentiment_info['score'] > 0:
                     score += sentiment_info['score']
                     reasons.extend(sentiment_info['reasons'])
-                logger.info(f"[{code}] ✅ 第四层过滤通过: {sentiment_info['result']}")
+                logger.info("[%s] ✅ 第四层过滤通过: %s", code, sentiment_info['result'])
         else:
-            logger.info(f"[{code}] ⚠️ 未提供舆情数据，跳过第四层过滤")
+            logger.info("[%s] ⚠️ 未提供舆情数据，跳过第四层过滤", code)
 
         # ========== 最终决策 ==========
         result.signal_score = min(score, 100)
@@ -328,9 +418,8 @@ class StockTrendAnalyzer:
             result.buy_signal = BuySignal.WAIT
 
         logger.info(
-            f"[{code}] 分析完成: {result.buy_signal.value}, "
-            f"评分 {result.signal_score}, "
-            f"市场 {market_type}"
+            "[%s] 分析完成: %s, 评分 %d, 市场 %s",
+            code, result.buy_signal.value, result.signal_score, market_type
         )
 
         return result
@@ -449,12 +538,15 @@ class StockTrendAnalyzer:
 
     def _check_auxiliary_indicators(
         self,
-        df: pd.DataFrame,
+        latest: Dict[str, Any],
+        prev: Dict[str, Any],
         result: TrendAnalysisResult,
         base_score: int,
         market_type: str,
-        config: Dict[str, Any]
-    ) -> Tuple[int, List[str], List[str]]:
+        config: Mapping[str, Any],
+        reasons: List[str],
+        risks: List[str]
+    ) -> int:
         """
         第三层：辅助确认（加分制）
 
@@ -464,14 +556,11 @@ class StockTrendAnalyzer:
         - ATR 波动率
         - 量能配合
 
-        Returns: (总分, 新增理由, 风险因素)
+        理由和风险直接追加到调用方传入的列表，避免中间列表的创建与合并。
+
+        Returns: 总分
         """
         score = base_score
-        reasons = []
-        risks = []
-
-        latest = df.iloc[-1]
-        prev = df.iloc[-2] if len(df) >= 2 else latest
 
         # --- MACD 确认 (+10分) ---
         macd = latest['macd']
@@ -487,7 +576,7 @@ class StockTrendAnalyzer:
         if result.macd_golden_cross:
             score += 10
             reasons.append("✅ MACD金叉，趋势确认")
-            logger.info(f"[{result.code}] MACD金叉: +10分")
+            logger.info("[%s] MACD金叉: +10分", result.code)
         else:
             # 死叉判断
             result.macd_bearish = (
@@ -498,50 +587,43 @@ class StockTrendAnalyzer:
                 risks.append("⚠️ MACD死叉，注意风险")
 
         # --- RSI 确认 (+10/15分) ---
+        # 超卖额外加分；接近超买/超买不加分也不扣分，仅提示风险
         rsi = result.rsi
-        if rsi < 30:
-            score += 15  # 超卖区域，额外加分
-            reasons.append(f"✅ RSI={rsi:.0f}，超卖区域")
-            logger.info(f"[{result.code}] RSI超卖: +15分")
-        elif rsi < 70:
-            score += 10
-            reasons.append(f"✅ RSI={rsi:.0f}，健康区域")
-            logger.info(f"[{result.code}] RSI健康: +10分")
-        elif rsi < 80:
-            # 接近超买，不加分但也不扣分
-            risks.append(f"⚠️ RSI={rsi:.0f}，接近超买")
+        rsi_score, rsi_is_reason, rsi_desc, rsi_log = _RSI_TIER_INFO[_rsi_tier(rsi)]
+        if rsi_is_reason:
+            score += rsi_score
+            reasons.append(f"✅ RSI={rsi:.0f}，{rsi_desc}")
+            logger.info("[%s] %s: +%d分", result.code, rsi_log, rsi_score)
         else:
-            # 超买，风险提示
-            risks.append(f"⚠️ RSI={rsi:.0f}，超买区域")
+            risks.append(f"⚠️ RSI={rsi:.0f}，{rsi_desc}")
 
         # --- ATR 确认 (+5分) ---
         atr_pct = result.atr_pct
-        atr_min = config['atr_min_pct']
-        atr_max = config['atr_max_pct']
+        atr_zone = bisect_right(self._ATR_BOUNDS[market_type], atr_pct)
 
-        if atr_min < atr_pct < atr_max:
+        if atr_zone == 1:
             score += 5
             reasons.append(f"✅ ATR健康({atr_pct:.1f}%)")
-            logger.info(f"[{result.code}] ATR健康: +5分")
-        elif atr_pct >= atr_max:
+            logger.info("[%s] ATR健康: +5分", result.code)
+        elif atr_zone == 2:
             risks.append(f"⚠️ 波动率过大({atr_pct:.1f}%)")
 
         # --- 量能确认 (+10分) ---
         if result.volume_status == VolumeStatus.SHRINK_VOLUME_DOWN:
             score += 10
             reasons.append("✅ 缩量回调，洗盘特征")
-            logger.info(f"[{result.code}] 缩量回调: +10分")
+            logger.info("[%s] 缩量回调: +10分", result.code)
         elif result.volume_status == VolumeStatus.HEAVY_VOLUME_UP:
             score += 8
             reasons.append("✅ 放量上涨，多头强劲")
-            logger.info(f"[{result.code}] 放量上涨: +8分")
+            logger.info("[%s] 放量上涨: +8分", result.code)
 
         logger.info(
-            f"[{result.code}] 第三层得分: {score - base_score}, "
-            f"总分: {score}"
+            "[%s] 第三层得分: %d, 总分: %d",
+            result.code, score - base_score, score
         )
 
-        return score, reasons, risks
+        return score
 
     def _check_sentiment_filter(
         self,
@@ -564,66 +646,15 @@ class StockTrendAnalyzer:
             (是否通过, 舆情信息字典)
             舆情信息包含: result, score, reasons, risks
         """
-        # 定义关键词库
-        negative_keywords = {
-            # 财务相关
-            '造假': '严重', '财务造假': '严重', '虚增利润': '严重', '财务违规': '严重',
-            '亏损': '中等', '业绩下滑': '中等', '业绩暴雷': '严重',
-            '债务': '中等', '债务违约': '严重', '资不抵债': '严重',
-
-            # 监管相关
-            '调查': '严重', '立案': '严重', '立案调查': '严重',
-            '处罚': '中等', '罚款': '中等', '监管': '轻微',
-            '退市': '严重', '退市风险': '严重', 'ST': '严重',
-            '违规': '中等', '违规担保': '严重', '内幕交易': '严重',
-
-            # 诉讼相关
-            '诉讼': '中等', '起诉': '中等', '被诉': '中等',
-            '官司': '轻微', '纠纷': '轻微',
-
-            # 经营相关
-            '停产': '严重', '停产整顿': '严重',
-            '倒闭': '严重', '破产': '严重', '破产重整': '严重',
-            '裁员': '中等', '裁员风波': '中等',
-
-            # 政策相关
-            '政策': '轻微', '政策风险': '中等',
-            '监管收紧': '中等', '加强监管': '中等',
-
-            # 其他负面
-            '暴跌': '中等', '大跌': '轻微',
-            '风险': '轻微', '警示': '轻微', '风险提示': '轻微',
-        }
-
-        positive_keywords = {
-            # 业绩相关
-            '增长': '轻微', '业绩增长': '中等', '业绩超预期': '强',
-            '大增': '中等', '暴增': '强', '大涨': '中等',
-
-            # 资本运作
-            '回购': '强', '股份回购': '强', '增持': '强',
-            '重大合同': '中等', '中标': '中等', '订单': '轻微',
-
-            # 认证/资质
-            '获批': '中等', '认证': '中等', '突破': '中等',
-            '独家': '中等', '首发': '中等', '首创': '中等',
-
-            # 分红
-            '分红': '轻微', '派息': '轻微', '高送转': '中等',
-
-            # 机构关注
-            '调研': '轻微', '机构调研': '中等', '增持': '强',
-        }
-
         # 分析舆情
         negative_found = []
         positive_found = []
 
-        for keyword, severity in negative_keywords.items():
+        for keyword, severity in _NEGATIVE_KEYWORD_ITEMS:
             if keyword in news_context:
                 negative_found.append((keyword, severity))
 
-        for keyword, strength in positive_keywords.items():
+        for keyword, strength in _POSITIVE_KEYWORD_ITEMS:
             if keyword in news_context:
                 positive_found.append((keyword, strength))
 
@@ -682,9 +713,13 @@ class StockTrendAnalyzer:
 
 # === 便捷函数 ===
 
+# 分析器无状态，模块级共享单例，避免每只股票/每个线程重复构造
+_analyzer = StockTrendAnalyzer()
+
+
 def get_analyzer() -> StockTrendAnalyzer:
-    """获取趋势分析器实例"""
-    return StockTrendAnalyzer()
+    """获取趋势分析器单例（线程安全，可并发调用 analyze）"""
+    return _analyzer
 
 
 if __name__ == "__main__":
@@ -20,15 +20,23 @@
 
 import os
 import json
+import atexit
 import logging
 import time
-from typing import Optional, Dict, Set
+from typing import Optional, Dict, Set, Tuple
 from pathlib import Path
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd  # 用于 DataFrame 类型注解
 
 logger = logging.getLogger(__name__)
 
+# A股代码前三位 -> Tushare 市场后缀
+_PREFIX_MARKET = {
+    '600': 'SH', '601': 'SH', '603': 'SH', '688': 'SH',
+    '000': 'SZ', '002': 'SZ', '300': 'SZ',
+}
+
 
 class StockNameResolver:
     """股票名称解析器"""
@@ -73,39 +81,72 @@ class StockNameResolver:
         '03069': '青岛控股',
     }
 
+    # 缓存文件目录
+    _CACHE_DIR = Path(__file__).parent / 'data' / 'cache'
+
+    # Akshare A股列表缓存有效期（秒），内存与磁盘缓存共用
+    _AKSHARE_LIST_TTL = 3600
+
+    # 后台线程刷新追加日志的间隔（秒）：此窗口内的新名称合并为一次写盘
+    _FLUSH_INTERVAL = 5
+    # 追加日志累计多少条后由后台线程压缩合并到 JSON 缓存文件
+    _LOG_COMPACT_THRESHOLD = 10000
+
     def __new__(cls):
+        # 双重检查锁：实例在锁内完成初始化后才对外发布，
+        # 并发首次调用时只会加载一次缓存文件
         if cls._instance is None:
             with cls._lock:
                 if cls._instance is None:
-                    cls._instance = super().__new__(cls)
+                    instance = super().__new__(cls)
+                    instance._init_once()
+                    cls._instance = instance
         return cls._instance
 
-    def __init__(self):
-        """初始化名称解析器"""
-        # 避免重复初始化
-        if hasattr(self, '_initialized'):
-            return
-
+    def _init_once(self):
+        """初始化名称解析器（仅在创建单例时调用一次）"""
         # 内存缓存：{code: name}
         self._name_cache: Dict[str, str] = {}
 
         # 缓存文件路径
-        self._cache_dir = Path(__file__).parent / 'data' / 'cache'
+        self._cache_dir = self._CACHE_DIR
         self._cache_file = self._cache_dir / 'stock_names.json'
 
+        # 追加日志：新名称逐行追加，定期/退出时压缩合并到 JSON 文件
+        self._log_file = self._cache_dir / 'stock_names.log'
+        self._log_fp = None
+        self._log_entries = 0       # 日志中尚未合并的条数
+        self._log_dirty = False     # 是否有尚未刷新到磁盘的日志
+        self._io_lock = threading.Lock()
+
+        # Akshare A股列表缓存：({代码: 名称}, 获取时间)
+        # 内存缓存之外再落盘一份，进程重启后在有效期内无需重新拉取
+        self._akshare_stock_list: Optional[Tuple[Dict[str, str], float]] = None
+        self._akshare_list_file = self._cache_dir / 'akshare_stock_list.json'
+
+        # Tushare pro 接口句柄（首次使用时创建，之后复用）
+        self._tushare_pro = None
+        self._tushare_lock = threading.Lock()
+
         # 创建缓存目录
         self._cache_dir.mkdir(parents=True, exist_ok=True)
 
         # 加载持久化缓存
         self._load_persistent_cache()
 
-        # 标记已初始化
-        self._initialized = True
+        # 后台刷新线程：调用方只写内存缓冲，刷盘与压缩不阻塞名称查询
+        self._stop_flush = threading.Event()
+        threading.Thread(
+            target=self._flush_loop, name='StockNameCacheFlusher', daemon=True
+        ).start()
+
+        # 退出时合并追加日志
+        atexit.register(self._compact_and_close)
 
         logger.info(f"[StockNameResolver] 初始化完成，已加载 {len(self._name_cache)} 条缓存")
 
     def _load_persistent_cache(self):
-        """从文件加载持久化缓存"""
+        """从文件加载持久化缓存（JSON 快照 + 追加日志回放）"""
         if self._cache_file.exists():
             try:
                 with open(self._cache_file, 'r', encoding='utf-8') as f:
@@ -115,13 +156,87 @@ class StockNameResolver:
             except Exception as e:
                 logger.warning(f"[StockNameResolver] 加载缓存文件失败: {e}")
 
+        if self._log_file.exists():
+            try:
+                with open(self._log_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            code, name = json.loads(line)
+                        except ValueError:
+                            # 跳过进程中断时写了一半的行
+                            continue
+                        self._name_cache[code] = name
+                        self._log_entries += 1
+                if self._log_entries:
+                    logger.info(f"[StockNameResolver] 从追加日志回放了 {self._log_entries} 条股票名称")
+            except Exception as e:
+                logger.warning(f"[StockNameResolver] 加载追加日志失败: {e}")
+
     def _save_persistent_cache(self):
-        """保存缓存到文件"""
-        try:
-            with open(self._cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self._name_cache, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.error(f"[StockNameResolver] 保存缓存文件失败: {e}")
+        """保存完整缓存到 JSON 文件，并清空已合并的追加日志"""
+        with self._io_lock:
+            try:
+                # 先复制快照，避免其他线程写入缓存时迭代出错
+                snapshot = dict(self._name_cache)
+                tmp_file = self._cache_file.with_suffix('.json.tmp')
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_file, self._cache_file)
+
+                if self._log_fp is not None:
+                    self._log_fp.close()
+                    self._log_fp = None
+                self._log_file.unlink(missing_ok=True)
+                self._log_entries = 0
+                self._log_dirty = False
+            except Exception as e:
+                logger.error(f"[StockNameResolver] 保存缓存文件失败: {e}")
+
+    def _append_to_log(self, names: Dict[str, str]):
+        """
+        将新名称追加写入日志缓冲（O(新增条数)，无需重写整个缓存文件）
+
+        只写入文件缓冲并标记脏数据，刷盘与压缩由后台线程完成
+        """
+        with self._io_lock:
+            try:
+                if self._log_fp is None:
+                    self._log_fp = open(self._log_file, 'a', encoding='utf-8')
+                for code, name in names.items():
+                    self._log_fp.write(json.dumps([code, name], ensure_ascii=False) + '\n')
+                self._log_entries += len(names)
+                self._log_dirty = True
+            except Exception as e:
+                logger.error(f"[StockNameResolver] 写入追加日志失败: {e}")
+
+    def _flush_loop(self):
+        """后台线程：每隔 _FLUSH_INTERVAL 秒刷新一次日志，直到进程退出"""
+        while not self._stop_flush.wait(self._FLUSH_INTERVAL):
+            self._flush_log()
+
+    def _flush_log(self):
+        """有脏数据时刷新日志缓冲；日志过长时压缩合并到 JSON 文件"""
+        if self._log_entries >= self._LOG_COMPACT_THRESHOLD:
+            self._save_persistent_cache()
+            return
+
+        with self._io_lock:
+            if not self._log_dirty or self._log_fp is None:
+                return
+            try:
+                self._log_fp.flush()
+                self._log_dirty = False
+            except Exception as e:
+                logger.error(f"[StockNameResolver] 刷新追加日志失败: {e}")
+
+    def _compact_and_close(self):
+        """停止后台刷新，合并追加日志到 JSON 文件并关闭日志（进程退出时调用）"""
+        self._stop_flush.set()
+        if self._log_entries:
+            self._save_persistent_cache()
+        elif self._log_fp is not None:
+            self._log_fp.close()
+            self._log_fp = None
 
     def get_stock_name(self, stock_code: str, realtime_name: Optional[str] = None) -> str:
         """
@@ -156,12 +271,12 @@ class StockNameResolver:
         return f'股票{stock_code}'
 
     def _add_to_cache(self, code: str, name: str):
-        """添加到缓存（内存 + 持久化）"""
-        self._name_cache[code] = name
+        """添加到缓存（内存 + 追加日志）"""
+        if self._name_cache.get(code) == name:
+            return
 
-        # 每 100 次更新保存一次文件（避免频繁 IO）
-        if len(self._name_cache) % 100 == 0:
-            self._save_persistent_cache()
+        self._name_cache[code] = name
+        self._append_to_log({code: name})
 
     def _fetch_name_from_sources(self, stock_code: str) -> Optional[str]:
         """
@@ -226,30 +341,37 @@ class StockNameResolver:
 
         return None
 
+    def _get_tushare_pro(self):
+        """
+        获取 Tushare pro 接口（首次调用时创建并缓存）
+
+        未配置 TUSHARE_TOKEN 时返回 None（不缓存，配置后可重新获取）；
+        未安装 tushare 时抛出 ImportError
+        """
+        if self._tushare_pro is None:
+            with self._tushare_lock:
+                if self._tushare_pro is None:
+                    import tushare as ts
+
+                    # 从环境变量获取 token
+                    token = os.getenv('TUSHARE_TOKEN')
+                    if not token:
+                        return None
+
+                    self._tushare_pro = ts.pro_api(token)
+        return self._tushare_pro
+
     def _fetch_from_tushare(self, stock_code: str) -> Optional[str]:
         """从 Tushare 获取股票名称"""
         try:
-            import tushare as ts
-
-            # 从环境变量获取 token
-            token = os.getenv('TUSHARE_TOKEN')
-            if not token:
+            pro = self._get_tushare_pro()
+            if pro is None:
                 return None
 
-            # 初始化 pro 接口
-            pro = ts.pro_api(token)
-
             # 转换代码格式
-            if '.' not in stock_code:
-                # 自动判断市场
-                if stock_code.startswith(('600', '601', '603', '688')):
-                    ts_code = f"{stock_code}.SH"
-                elif stock_code.startswith(('000', '002', '300')):
-                    ts_code = f"{stock_code}.SZ"
-                else:
-                    return None
-            else:
-                ts_code = stock_code.upper()
+            ts_code = self._to_ts_code(stock_code)
+            if not ts_code:
+                return None
 
             # 调用接口
             df = pro.daily_basic(ts_code=ts_code, fields='ts_code,name')
@@ -265,6 +387,51 @@ class StockNameResolver:
 
         return None
 
+    @staticmethod
+    def _to_ts_code(stock_code: str) -> Optional[str]:
+        """转换为 Tushare 代码格式（600519 -> 600519.SH），无法识别市场返回 None"""
+        if '.' in stock_code:
+            return stock_code.upper()
+
+        # 按代码前三位判断市场
+        market = _PREFIX_MARKET.get(stock_code[:3])
+        return f"{stock_code}.{market}" if market else None
+
+    def _batch_fetch_from_tushare(self, stock_codes: list) -> Dict[str, str]:
+        """通过一次 Tushare stock_basic 调用批量查询A股名称"""
+        try:
+            pro = self._get_tushare_pro()
+            if pro is None:
+                return {}
+
+            ts_to_code = {}
+            for code in stock_codes:
+                ts_code = self._to_ts_code(code)
+                if ts_code:
+                    ts_to_code[ts_code] = code
+            if not ts_to_code:
+                return {}
+
+            df = pro.stock_basic(ts_code=','.join(ts_to_code), fields='ts_code,name')
+            if df is None or df.empty:
+                return {}
+
+            pairs = df[['ts_code', 'name']].dropna()
+            names = {
+                ts_to_code[ts_code]: name
+                for ts_code, name in zip(pairs['ts_code'], pairs['name'])
+                if ts_code in ts_to_code and name
+            }
+            logger.debug(f"[Tushare] 批量匹配 {len(names)}/{len(stock_codes)} 个股票名称")
+            return names
+
+        except ImportError:
+            logger.debug("[Tushare] 未安装 tushare 库")
+        except Exception as e:
+            logger.debug(f"[Tushare] 批量获取股票名称失败: {e}")
+
+        return {}
+
     def _fetch_from_akshare(self, stock_code: str) -> Optional[str]:
         """从 Akshare 获取股票名称"""
         try:
@@ -274,14 +441,12 @@ class StockNameResolver:
             # A股：从实时行情列表查询
             if not stock_code.endswith('.HK') and not stock_code.endswith('.hk'):
                 try:
-                    # 获取A股列表（带有缓存）
-                    df = self._get_akshare_stock_list()
-
-                    if df is not None and not df.empty:
-                        # 查找股票
-                        row = df[df['代码'] == stock_code]
-                        if not row.empty:
-                            name = row.iloc[0]['名称']
+                    # 获取A股代码 -> 名称映射（带有缓存）
+                    code_to_name = self._get_akshare_stock_list()
+
+                    if code_to_name:
+                        name = code_to_name.get(stock_code)
+                        if name:
                             logger.debug(f"[Akshare] {stock_code} 名称: {name}")
                             return name
                 except Exception as e:
@@ -294,32 +459,72 @@ class StockNameResolver:
 
         return None
 
-    def _get_akshare_stock_list(self) -> Optional['pd.DataFrame']:
-        """获取 Akshare A股列表（带缓存）"""
-        import pandas as pd
+    def _get_akshare_stock_list(self) -> Optional[Dict[str, str]]:
+        """
+        获取 Akshare A股列表（内存缓存 → 磁盘缓存 → 网络）
 
-        # 缓存键
-        cache_key = '_akshare_stock_list'
+        Returns:
+            {代码: 名称} 映射，查询为 O(1)；失败返回 None
+        """
+        # 检查内存缓存
+        if self._akshare_stock_list is not None:
+            cached_names, cached_time = self._akshare_stock_list
+            if time.time() - cached_time < self._AKSHARE_LIST_TTL:
+                return cached_names
 
-        # 检查缓存
-        if hasattr(self, cache_key):
-            cached_df, cached_time = getattr(self, cache_key)
-            if time.time() - cached_time < 3600:  # 1小时缓存
-                return cached_df
+        # 检查磁盘缓存
+        cached_names = self._load_akshare_list_file()
+        if cached_names:
+            return cached_names
 
         # 从 Akshare 获取
         try:
             import akshare as ak
             df = ak.stock_zh_a_spot_em()
 
-            # 保存到缓存
-            setattr(self, cache_key, (df, time.time()))
+            # 只保留代码/名称两列，构建映射后缓存
+            pairs = df[['代码', '名称']].dropna()
+            code_to_name = dict(zip(pairs['代码'], pairs['名称']))
+            self._akshare_stock_list = (code_to_name, time.time())
+            self._save_akshare_list_file(code_to_name)
 
-            return df
+            return code_to_name
         except Exception as e:
+            self._akshare_stock_list = None
             logger.warning(f"[Akshare] 获取A股列表失败: {e}")
             return None
 
+    def _load_akshare_list_file(self) -> Optional[Dict[str, str]]:
+        """加载有效期内的 Akshare A股列表磁盘缓存"""
+        try:
+            mtime = self._akshare_list_file.stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+        if time.time() - mtime >= self._AKSHARE_LIST_TTL:
+            return None
+
+        try:
+            with open(self._akshare_list_file, 'r', encoding='utf-8') as f:
+                code_to_name = json.load(f)
+        except Exception as e:
+            logger.debug(f"[Akshare] 加载A股列表缓存文件失败: {e}")
+            return None
+
+        # 内存缓存按文件写入时间计算有效期
+        self._akshare_stock_list = (code_to_name, mtime)
+        return code_to_name
+
+    def _save_akshare_list_file(self, code_to_name: Dict[str, str]):
+        """保存 Akshare A股列表到磁盘缓存"""
+        try:
+            tmp_file = self._akshare_list_file.with_suffix('.json.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(code_to_name, f, ensure_ascii=False)
+            os.replace(tmp_file, self._akshare_list_file)
+        except Exception as e:
+            logger.debug(f"[Akshare] 保存A股列表缓存文件失败: {e}")
+
     def _fetch_from_yfinance(self, stock_code: str) -> Optional[str]:
         """从 YFinance 获取港股名称"""
         try:
@@ -345,10 +550,53 @@ class StockNameResolver:
 
         return None
 
+    def bulk_resolve(self, stock_codes: list) -> Dict[str, str]:
+        """
+        批量预解析股票名称并写入缓存
+
+        适合在逐只分析前调用，之后 get_stock_name 直接命中内存缓存：
+        1. 已缓存的代码直接跳过
+        2. A股未命中代码先在 Akshare 列表中批量匹配
+        3. 剩余A股代码通过一次 Tushare stock_basic 调用查询
+        4. 新名称一次性追加到缓存日志
+
+        港股等其他代码不在此处查询，仍由 get_stock_name 按需获取
+
+        Args:
+            stock_codes: 股票代码列表
+
+        Returns:
+            本次新解析到的 {code: name} 映射
+        """
+        a_misses = [
+            code for code in dict.fromkeys(stock_codes)
+            if code not in self._name_cache and not self._is_hk_code(code)
+        ]
+        if not a_misses:
+            return {}
+
+        resolved = self._batch_fetch_from_akshare(a_misses)
+        remaining = [code for code in a_misses if code not in resolved]
+        if remaining:
+            resolved.update(self._batch_fetch_from_tushare(remaining))
+
+        if resolved:
+            self._name_cache.update(resolved)
+            self._append_to_log(resolved)
+
+        logger.info(f"[StockNameResolver] 批量预解析 {len(resolved)}/{len(a_misses)} 个股票名称")
+        return resolved
+
     def batch_get_names(self, stock_codes: list, realtime_names: Optional[Dict[str, str]] = None) -> Dict[str, str]:
         """
         批量获取股票名称
 
+        与逐个调用 get_stock_name 相比：
+        1. 一次遍历区分缓存命中与未命中
+        2. A股未命中代码在 Akshare 列表中一次性批量匹配
+        3. 其余未命中代码（港股等）并发查询
+        4. 新名称批量追加到缓存日志，不重写整个缓存文件
+
         Args:
             stock_codes: 股票代码列表
             realtime_names: 实时行情名称映射 {code: name}（可选）
@@ -356,17 +604,77 @@ class StockNameResolver:
         Returns:
             {code: name} 映射字典
         """
-        result = {}
         realtime_names = realtime_names or {}
+        names: Dict[str, str] = {}
+        new_names: Dict[str, str] = {}
+        misses = []
 
-        for code in stock_codes:
+        # 1. 区分实时名称 / 缓存命中 / 未命中
+        for code in dict.fromkeys(stock_codes):
             realtime_name = realtime_names.get(code)
-            name = self.get_stock_name(code, realtime_name)
+            if realtime_name and realtime_name.strip() and not realtime_name.startswith('股票'):
+                names[code] = new_names[code] = realtime_name
+            elif code in self._name_cache:
+                names[code] = self._name_cache[code]
+            else:
+                misses.append(code)
+
+        # 2. A股未命中：Akshare 列表批量匹配
+        a_misses = [code for code in misses if not self._is_hk_code(code)]
+        if a_misses:
+            new_names.update(self._batch_fetch_from_akshare(a_misses))
+
+        # 3. 其余未命中：并发走完整数据源链
+        remaining = [code for code in misses if code not in new_names]
+        if remaining:
+            with ThreadPoolExecutor(max_workers=min(8, len(remaining))) as executor:
+                fetched = executor.map(self._fetch_name_from_sources, remaining)
+                for code, name in zip(remaining, fetched):
+                    if name:
+                        new_names[code] = name
+
+        # 4. 批量写入缓存（仅追加有变化的名称）
+        changed = {
+            code: name for code, name in new_names.items()
+            if self._name_cache.get(code) != name
+        }
+        if changed:
+            self._name_cache.update(changed)
+            self._append_to_log(changed)
+
+        result = {}
+        for code in stock_codes:
+            name = names.get(code) or new_names.get(code)
+            if not name:
+                logger.warning(f"[StockNameResolver] 无法获取 {code} 的名称，使用默认格式")
+                name = f'股票{code}'
             result[code] = name
 
         logger.info(f"[StockNameResolver] 批量获取 {len(result)} 个股票名称完成")
         return result
 
+    def _batch_fetch_from_akshare(self, stock_codes: list) -> Dict[str, str]:
+        """在 Akshare A股代码映射中批量匹配名称"""
+        try:
+            code_to_name = self._get_akshare_stock_list()
+            if not code_to_name:
+                return {}
+
+            names = {
+                code: code_to_name[code]
+                for code in stock_codes if code in code_to_name
+            }
+            logger.debug(f"[Akshare] 批量匹配 {len(names)}/{len(stock_codes)} 个股票名称")
+            return names
+        except Exception as e:
+            logger.debug(f"[Akshare] A股列表批量查询失败: {e}")
+            return {}
+
+    @staticmethod
+    def _is_hk_code(stock_code: str) -> bool:
+        """是否为带 .HK 后缀的港股代码"""
+        return stock_code.endswith('.HK') or stock_code.endswith('.hk')
+
     def preload_common_stocks(self):
         """预加载常见股票名称（提升性能）"""
         logger.info("[StockNameResolver] 开始预加载常见股票名称...")
@@ -378,12 +686,10 @@ class StockNameResolver:
             df = ak.stock_zh_a_spot_em()
 
             if df is not None and not df.empty:
-                # 批量添加到缓存
-                for _, row in df.iterrows():
-                    code = row['代码']
-                    name = row['名称']
-                    if code and name:
-                        self._name_cache[code] = name
+                # 批量添加到缓存（按列整体过滤空值，避免逐行 iterrows）
+                pairs = df[['代码', '名称']].dropna()
+                pairs = pairs[(pairs['代码'] != '') & (pairs['名称'] != '')]
+                self._name_cache.update(zip(pairs['代码'], pairs['名称']))
 
                 # 保存到文件
                 self._save_persistent_cache()
@@ -18,13 +18,17 @@ A股/港股智能分析系统 - 存储层（增强版）
 """
 
 import logging
+import sqlite3
+from contextlib import contextmanager
 from datetime import datetime, date, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Mapping
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 from sqlalchemy import (
     create_engine,
+    event,
     Column,
     String,
     Float,
@@ -34,9 +38,10 @@ from sqlalchemy import (
     Index,
     UniqueConstraint,
     select,
+    bindparam,
+    literal_column,
     and_,
     desc,
-    text,
     inspect,
 )
 from sqlalchemy.orm import (
@@ -44,7 +49,7 @@ from sqlalchemy.orm import (
     sessionmaker,
     Session,
 )
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from config import get_config
 
@@ -53,6 +58,77 @@ logger = logging.getLogger(__name__)
 # SQLAlchemy ORM 基类
 Base = declarative_base()
 
+# 数据库 schema 版本（记录在 PRAGMA user_version 中）
+# 新增字段/索引时递增，启动时版本一致则跳过迁移检查
+SCHEMA_VERSION = 2
+
+# 懒迁移需要补充的指标列（旧库建表时没有这些字段）
+INDICATOR_COLUMN_TYPES = {
+    'macd': 'FLOAT',
+    'macd_signal': 'FLOAT',
+    'macd_hist': 'FLOAT',
+    'rsi': 'FLOAT',
+    'atr': 'FLOAT',
+}
+
+# 日线行情/指标数据列（save_daily_data 写入及冲突时覆盖的列）
+DAILY_VALUE_COLUMNS = (
+    'open', 'high', 'low', 'close',
+    'volume', 'amount', 'pct_chg',
+    'ma5', 'ma10', 'ma20', 'volume_ratio',
+    'macd', 'macd_signal', 'macd_hist',
+    'rsi', 'atr',
+)
+
+
+# 均线形态标签：多头排列 / 空头排列 / 短期向好 / 短期走弱 / 震荡整理
+MA_STATUS_LABELS = ("多头排列 📈", "空头排列 📉", "短期向好 🔼", "短期走弱 🔽", "震荡整理 ➡️")
+
+# 均线形态查找表：下标为 4 位掩码 (多头<<3)|(空头<<2)|(向好<<1)|走弱，
+# 按 多头 → 空头 → 向好 → 走弱 的优先级取最高位对应的标签
+_MA_STATUS_TABLE = tuple(
+    MA_STATUS_LABELS[4 - mask.bit_length()] if mask else MA_STATUS_LABELS[4]
+    for mask in range(16)
+)
+
+
+def _value_or_zero(value):
+    """缺失值（None 或 NaN）按 0 处理"""
+    return 0 if value is None or value != value else value
+
+
+# INSERT ... ON CONFLICT DO UPDATE 需要 SQLite 3.24+，更早的版本走批量新增/更新
+SQLITE_SUPPORTS_UPSERT = sqlite3.sqlite_version_info >= (3, 24, 0)
+
+# SQLite 连接参数：WAL 模式允许读写并发，synchronous=NORMAL 在 WAL 下
+# 仅在检查点时 fsync，配合更大的页缓存/内存映射降低提交与查询延迟
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",      # 64MB 页缓存
+    "PRAGMA mmap_size=268435456",    # 256MB 内存映射
+    "PRAGMA busy_timeout=5000",      # 锁等待 5 秒
+)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """新建 SQLite 连接时应用 PRAGMA 设置"""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def _optimize_on_close(dbapi_connection, connection_record):
+    """关闭 SQLite 连接前更新查询规划统计（PRAGMA optimize）"""
+    try:
+        dbapi_connection.execute("PRAGMA optimize")
+    except Exception as e:
+        logger.debug(f"PRAGMA optimize 失败: {e}")
+
 
 # === 数据模型定义 ===
 
@@ -118,6 +194,8 @@ class StockDaily(Base):
     __table_args__ = (
         UniqueConstraint('code', 'date', name='uix_code_date'),
         Index('ix_code_date', 'code', 'date'),
+        # 最近 N 天查询（WHERE code = ? ORDER BY date DESC LIMIT N）
+        Index('ix_code_date_desc', 'code', desc('date')),
     )
 
     def __repr__(self):
@@ -161,6 +239,18 @@ class DatabaseManager:
 
     _instance: Optional['DatabaseManager'] = None
 
+    # 存在性检查：只取常量 1 不加载整行；语句预先构建，
+    # 每次调用只换绑定参数，直接命中 SQLAlchemy 编译缓存
+    _EXISTS_STMT = (
+        select(literal_column('1'))
+        .select_from(StockDaily)
+        .where(
+            StockDaily.code == bindparam('code'),
+            StockDaily.date == bindparam('target_date'),
+        )
+        .limit(1)
+    )
+
     def __new__(cls, *args, **kwargs):
         """单例模式实现"""
         if cls._instance is None:
@@ -195,6 +285,8 @@ class DatabaseManager:
             echo=False,  # 不打印 SQL
             connect_args={'check_same_thread': False}  # 允许多线程
         )
+        event.listen(self.engine, 'connect', _apply_sqlite_pragmas)
+        event.listen(self.engine, 'close', _optimize_on_close)
 
         # 创建 Session 工厂
         self.SessionLocal = sessionmaker(
@@ -206,65 +298,89 @@ class DatabaseManager:
         # 创建表
         Base.metadata.create_all(self.engine)
 
-        # 自动迁移：添加新字段
-        self._ensure_indicator_columns()
+        # 自动迁移：添加新字段、补建索引（schema 版本已是最新时跳过检查）
+        if self._get_schema_version() != SCHEMA_VERSION:
+            self._migrate_schema()
 
         self._initialized = True
         logger.info(f"数据库初始化完成: {self.db_path}")
 
-    def _ensure_indicator_columns(self):
+    def _get_schema_version(self) -> int:
+        """读取数据库 schema 版本（PRAGMA user_version，新库为 0）"""
+        try:
+            with self.engine.connect() as conn:
+                return conn.exec_driver_sql("PRAGMA user_version").scalar() or 0
+        except Exception as e:
+            logger.warning(f"读取数据库版本失败: {e}")
+            return 0
+
+    def _migrate_schema(self) -> bool:
         """
-        自动添加新指标列（懒迁移）
+        自动迁移数据库结构（懒迁移）
 
-        检测数据库表是否包含新字段，如果不存在则自动添加
+        检测表是否缺少新指标列、补建索引，最后记录 schema 版本
+        所有 DDL 在同一个写事务中完成，只持有一次写锁，失败时整体回滚
         优点：零停机、无需手动执行脚本
+
+        Returns:
+            是否成功（失败时不记录 schema 版本，下次启动重试）
         """
         try:
-            with self.get_session() as session:
-                # 检查现有列
-                inspector = inspect(self.engine)
-                existing_columns = [
-                    col['name'] for col in inspector.get_columns('stock_daily')
-                ]
-
-                # 需要添加的新列（仅包含新增的指标）
-                new_columns = {
-                    'macd': 'FLOAT',
-                    'macd_signal': 'FLOAT',
-                    'macd_hist': 'FLOAT',
-                    'rsi': 'FLOAT',
-                    'atr': 'FLOAT',
-                }
-
-                added_count = 0
-                for col_name, col_type in new_columns.items():
-                    if col_name not in existing_columns:
-                        logger.info(f"自动添加新列: {col_name}")
-                        session.execute(
-                            text(f"ALTER TABLE stock_daily "
-                                 f"ADD COLUMN {col_name} {col_type}")
-                        )
-                        added_count += 1
-                        logger.info(f"✅ 列 {col_name} 添加成功")
-
-                if added_count > 0:
-                    session.commit()
-                    logger.info(f"数据库迁移完成，新增 {added_count} 个字段")
+            existing_columns = {
+                col['name'] for col in inspect(self.engine).get_columns('stock_daily')
+            }
+            missing_columns = [
+                (col_name, col_type)
+                for col_name, col_type in INDICATOR_COLUMN_TYPES.items()
+                if col_name not in existing_columns
+            ]
+
+            with self.engine.connect() as conn:
+                # pysqlite 不会为 DDL 自动开启事务，这里显式开启
+                conn.exec_driver_sql("BEGIN IMMEDIATE")
+                for col_name, col_type in missing_columns:
+                    logger.info(f"自动添加新列: {col_name}")
+                    conn.exec_driver_sql(
+                        f"ALTER TABLE stock_daily ADD COLUMN {col_name} {col_type}"
+                    )
+
+                # create_all 只创建缺失的表，不会给已存在的表添加新索引
+                conn.exec_driver_sql(
+                    "CREATE INDEX IF NOT EXISTS ix_code_date_desc "
+                    "ON stock_daily (code, date DESC)"
+                )
+                conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                conn.commit()
+
+            if missing_columns:
+                logger.info(f"数据库迁移完成，新增 {len(missing_columns)} 个字段")
+            return True
 
         except Exception as e:
             logger.error(f"数据库迁移失败: {e}")
             # 不抛出异常，允许系统继续运行
             # 历史数据会在下次获取时自动计算
+            return False
 
-    def get_session(self) -> Session:
+    @contextmanager
+    def get_session(self) -> Iterator[Session]:
         """
         获取数据库会话（上下文管理器）
 
+        退出时保证关闭会话、归还连接；发生异常时先回滚
+
         用法：
             with db.get_session() as session:
                 # 执行数据库操作
         """
-        return self.SessionLocal()
+        session = self.SessionLocal()
+        try:
+            yield session
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
 
     def has_today_data(self, code: str, target_date: Optional[date] = None) -> bool:
         """
@@ -283,16 +399,12 @@ class DatabaseManager:
             target_date = date.today()
 
         with self.get_session() as session:
-            result = session.execute(
-                select(StockDaily).where(
-                    and_(
-                        StockDaily.code == code,
-                        StockDaily.date == target_date
-                    )
-                )
-            ).scalar_one_or_none()
+            row = session.execute(
+                self._EXISTS_STMT,
+                {'code': code, 'target_date': target_date}
+            ).first()
 
-            return result is not None
+            return row is not None
 
     def get_latest_data(
         self,
@@ -381,13 +493,13 @@ class DatabaseManager:
         data_source: str = "Unknown"
     ) -> int:
         """
-        保存日线数据到数据库（优化版 - 解决N+1查询问题）
+        保存日线数据到数据库（优化版 - 批量 UPSERT）
 
         特性：
         1. 自动去重（同一天只保留最新数据）
         2. 自动计算时间戳
         3. 支持增量更新
-        4. 批量查询优化（一次性查询所有已有记录）
+        4. 批量写入优化（单条 INSERT ... ON CONFLICT DO UPDATE 语句）
 
         Args:
             df: 包含技术指标的标准 DataFrame
@@ -400,106 +512,83 @@ class DatabaseManager:
         if df.empty:
             return 0
 
-        saved_count = 0
+        # 构建写入记录（缺失的指标列以空值写入）
+        now = datetime.now()
+        records = df.reindex(columns=['date', *DAILY_VALUE_COLUMNS]).to_dict('records')
+        for record in records:
+            record['code'] = code
+            record['data_source'] = data_source
+            record['created_at'] = now
+            record['updated_at'] = now
 
         with self.get_session() as session:
             try:
-                # === 优化：批量查询所有已有记录（解决N+1查询问题）===
-                # 提取所有日期
-                dates_to_check = df['date'].tolist()
-
-                # 一次性查询所有可能存在的记录
-                existing_records = session.execute(
-                    select(StockDaily).where(
-                        and_(
-                            StockDaily.code == code,
-                            StockDaily.date.in_(dates_to_check)
-                        )
+                if SQLITE_SUPPORTS_UPSERT:
+                    # INSERT ... ON CONFLICT(code, date) DO UPDATE：由 SQLite 原生去重，
+                    # 一条预编译语句 executemany 写入全部行，无需先查询已有记录
+                    stmt = sqlite_insert(StockDaily.__table__)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=['code', 'date'],
+                        set_={
+                            col: stmt.excluded[col]
+                            for col in (*DAILY_VALUE_COLUMNS, 'data_source', 'updated_at')
+                        },
                     )
-                ).scalars().all()
-
-                # 构建字典用于快速查找：(code, date) -> StockDaily
-                existing_map = {(record.code, record.date): record for record in existing_records}
-
-                logger.debug(f"[批量保存] {code}: 已有记录 {len(existing_map)} 条，待保存 {len(df)} 条")
-
-                # 处理每一行数据
-                for _, row in df.iterrows():
-                    try:
-                        record_key = (code, row['date'])
-
-                        if record_key in existing_map:
-                            # === 更新现有记录 ===
-                            existing = existing_map[record_key]
-                            existing.open = row.get('open')
-                            existing.high = row.get('high')
-                            existing.low = row.get('low')
-                            existing.close = row.get('close')
-                            existing.volume = row.get('volume')
-                            existing.amount = row.get('amount')
-                            existing.pct_chg = row.get('pct_chg')
-                            existing.ma5 = row.get('ma5')
-                            existing.ma10 = row.get('ma10')
-                            existing.ma20 = row.get('ma20')
-                            existing.volume_ratio = row.get('volume_ratio')
-
-                            # 新增指标
-                            existing.macd = row.get('macd')
-                            existing.macd_signal = row.get('macd_signal')
-                            existing.macd_hist = row.get('macd_hist')
-                            existing.rsi = row.get('rsi')
-                            existing.atr = row.get('atr')
-
-                            existing.data_source = data_source
-                            existing.updated_at = datetime.now()
-                        else:
-                            # === 插入新记录 ===
-                            record = StockDaily(
-                                code=code,
-                                date=row['date'],
-                                open=row.get('open'),
-                                high=row.get('high'),
-                                low=row.get('low'),
-                                close=row.get('close'),
-                                volume=row.get('volume'),
-                                amount=row.get('amount'),
-                                pct_chg=row.get('pct_chg'),
-                                ma5=row.get('ma5'),
-                                ma10=row.get('ma10'),
-                                ma20=row.get('ma20'),
-                                volume_ratio=row.get('volume_ratio'),
-                                # 新增指标
-                                macd=row.get('macd'),
-                                macd_signal=row.get('macd_signal'),
-                                macd_hist=row.get('macd_hist'),
-                                rsi=row.get('rsi'),
-                                atr=row.get('atr'),
-                                data_source=data_source
-                            )
-                            session.add(record)
-
-                        saved_count += 1
-
-                    except IntegrityError:
-                        # 唯一约束冲突，跳过
-                        session.rollback()
-                        continue
-                    except Exception as e:
-                        logger.error(f"保存单条数据失败: {e}")
-                        session.rollback()
-                        continue
-
+                    session.execute(stmt, records)
+                else:
+                    self._bulk_insert_or_update(session, code, records)
                 session.commit()
-                logger.debug(f"[批量保存] {code}: 成功保存 {saved_count} 条数据")
-
+                logger.debug(f"[批量保存] {code}: 成功保存 {len(records)} 条数据")
             except Exception as e:
                 logger.error(f"批量保存失败: {e}")
                 session.rollback()
                 return 0
 
-        return saved_count
+        return len(records)
 
-    def get_analysis_context(self, code: str, days: int = 60) -> Optional[Dict[str, Any]]:
+    @staticmethod
+    def _bulk_insert_or_update(session: Session, code: str, records: List[Dict[str, Any]]):
+        """
+        不支持 UPSERT 时的批量写入（SQLite < 3.24）
+
+        一次查询取出已存在的 (code, date) 主键，按日期拆分为新增/更新两批，
+        分别批量写入，不做逐行插入与 IntegrityError 回滚重试
+        """
+        # 统一为 date（清洗后的数据为 pd.Timestamp），与查询返回的 StockDaily.date 可比较；
+        # 同一天重复的数据只保留最后一条
+        by_date = {}
+        for record in records:
+            record['date'] = pd.Timestamp(record['date']).date()
+            by_date[record['date']] = record
+
+        existing_ids = dict(session.execute(
+            select(StockDaily.date, StockDaily.id).where(
+                and_(StockDaily.code == code, StockDaily.date.in_(list(by_date)))
+            )
+        ).all())
+
+        insert_records = []
+        update_records = []
+        for record_date, record in by_date.items():
+            record_id = existing_ids.get(record_date)
+            if record_id is None:
+                insert_records.append(record)
+            else:
+                update = {k: v for k, v in record.items() if k != 'created_at'}
+                update['id'] = record_id
+                update_records.append(update)
+
+        if insert_records:
+            session.bulk_insert_mappings(StockDaily, insert_records)
+        if update_records:
+            session.bulk_update_mappings(StockDaily, update_records)
+
+    def get_analysis_context(
+        self,
+        code: str,
+        days: int = 60,
+        with_raw: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """
         获取分析所需的上下文数据
 
@@ -508,26 +597,60 @@ class DatabaseManager:
         - 技术指标
         - 均线状态
         - 最新指标值
+        - 原始数据 DataFrame（仅 with_raw=True 时）
 
         Args:
             code: 股票代码
             days: 获取天数
+            with_raw: 是否返回最近 N 天的原始数据（raw_data）
+                      为 False 时只读取最新两天，不构建 DataFrame
 
         Returns:
             分析上下文字典，如果数据不足返回 None
         """
-        data = self.get_all_data(code, limit=days)
-
-        if not data or len(data) < 20:
+        table = StockDaily.__table__
+        columns = [table.c[col] for col in ('code', 'date', *DAILY_VALUE_COLUMNS, 'data_source')]
+        stmt = select(*columns).where(table.c.code == code).order_by(desc(table.c.date))
+
+        if with_raw:
+            # 直接由游标构建列式 DataFrame（最近 N 天，按日期升序），不经过 ORM 对象
+            with self.engine.connect() as conn:
+                df = pd.read_sql_query(stmt.limit(days), conn)
+
+            if len(df) < 20:
+                logger.warning(f"[{code}] 数据不足，无法分析（需要至少20天）")
+                return None
+
+            df = df.iloc[::-1].reset_index(drop=True)
+            context = self._build_context(code, df.iloc[-1], df.iloc[-2])
+            context['raw_data'] = df  # 原始数据 DataFrame（供进一步分析）
+            return context
+
+        # 快速路径：只取最新两天，另用索引定位第 20 条记录判断数据是否充足
+        enough = False
+        if days >= 20:
+            with self.engine.connect() as conn:
+                rows = conn.execute(stmt.limit(2)).mappings().all()
+                enough = conn.execute(
+                    select(table.c.id).where(table.c.code == code)
+                    .order_by(desc(table.c.date)).offset(19).limit(1)
+                ).first() is not None
+
+        if not enough:
             logger.warning(f"[{code}] 数据不足，无法分析（需要至少20天）")
             return None
 
-        # 转换为 DataFrame
-        df = pd.DataFrame([item.to_dict() for item in data])
+        return self._build_context(code, rows[0], rows[1])
+
+    def _build_context(self, code: str, latest: Mapping, yesterday: Mapping) -> Dict[str, Any]:
+        """
+        由最新两天的数据构建分析上下文
 
-        # 提取最新数据
-        latest = df.iloc[-1]
-        yesterday = df.iloc[-2] if len(df) >= 2 else latest
+        快速路径传入 RowMapping（NULL 为 None），完整路径传入 DataFrame 行（NULL 为 NaN），
+        这里统一将缺失值转为 None，两条路径结果一致
+        """
+        latest = {key: None if pd.isna(value) else value for key, value in latest.items()}
+        yesterday = {key: None if pd.isna(value) else value for key, value in yesterday.items()}
 
         # 均线状态
         ma_status = self._analyze_ma_status(latest)
@@ -535,14 +658,16 @@ class DatabaseManager:
         # 计算变化率
         volume_change_ratio = (
             latest['volume'] / yesterday['volume']
-            if yesterday['volume'] and yesterday['volume'] > 0
+            if latest['volume'] is not None and yesterday['volume'] and yesterday['volume'] > 0
             else 1.0
         )
 
-        price_change_ratio = latest.get('pct_chg', 0)
+        price_change_ratio = latest.get('pct_chg')
+        if price_change_ratio is None:
+            price_change_ratio = 0
 
         # 构建上下文
-        context = {
+        return {
             'code': code,
             'date': str(latest['date']),
             'today': {
@@ -573,12 +698,9 @@ class DatabaseManager:
                 'rsi': latest['rsi'],
                 'atr': latest['atr'],
             },
-            'raw_data': df.to_dict('records'),  # 原始数据（供进一步分析）
         }
 
-        return context
-
-    def _analyze_ma_status(self, latest: pd.Series) -> str:
+    def _analyze_ma_status(self, latest: Mapping) -> str:
         """
         分析均线形态
 
@@ -586,22 +708,48 @@ class DatabaseManager:
         - 多头排列：close > ma5 > ma10 > ma20
         - 空头排列：close < ma5 < ma10 < ma20
         - 震荡整理：其他情况
+
+        缺失值（None 或 NaN）按 0 处理
+        """
+        close = _value_or_zero(latest['close'])
+        ma5 = _value_or_zero(latest['ma5'])
+        ma10 = _value_or_zero(latest['ma10'])
+        ma20 = _value_or_zero(latest['ma20'])
+
+        short_up = close > ma5 > ma10
+        short_down = close < ma5 < ma10
+        bull = short_up and ma10 > ma20 > 0
+        bear = short_down and ma10 < ma20 and ma20 > 0
+
+        return _MA_STATUS_TABLE[(bull << 3) | (bear << 2) | (short_up << 1) | short_down]
+
+    @staticmethod
+    def _analyze_ma_status_vec(df: pd.DataFrame) -> np.ndarray:
         """
-        close = latest['close'] or 0
-        ma5 = latest['ma5'] or 0
-        ma10 = latest['ma10'] or 0
-        ma20 = latest['ma20'] or 0
-
-        if close > ma5 > ma10 > ma20 > 0:
-            return "多头排列 📈"
-        elif close < ma5 < ma10 < ma20 and ma20 > 0:
-            return "空头排列 📉"
-        elif close > ma5 and ma5 > ma10:
-            return "短期向好 🔼"
-        elif close < ma5 and ma5 < ma10:
-            return "短期走弱 🔽"
-        else:
-            return "震荡整理 ➡️"
+        批量分析均线形态（向量化版本，逐行结果与 _analyze_ma_status 一致）
+
+        用于对多行/多只股票一次性计算均线形态，以布尔掩码替代逐行分支判断。
+        缺失值（NaN）按 0 处理，与 _analyze_ma_status 相同。
+
+        Args:
+            df: 包含 close/ma5/ma10/ma20 列的 DataFrame
+
+        Returns:
+            每行对应的均线形态标签数组
+        """
+        values = df[['close', 'ma5', 'ma10', 'ma20']].astype(float).fillna(0.0).to_numpy()
+        close, ma5, ma10, ma20 = values.T
+
+        short_up = (close > ma5) & (ma5 > ma10)
+        short_down = (close < ma5) & (ma5 < ma10)
+        bull = short_up & (ma10 > ma20) & (ma20 > 0)
+        bear = short_down & (ma10 < ma20) & (ma20 > 0)
+
+        return np.select(
+            [bull, bear, short_up, short_down],
+            MA_STATUS_LABELS[:4],
+            default=MA_STATUS_LABELS[4],
+        )
 
 
 # === 便捷函数 ===
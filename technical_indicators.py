@@ -7,15 +7,23 @@
 """
 
 import logging
-from typing import Dict, Any, Optional
+import math
+from bisect import bisect_right
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, List, Mapping, NamedTuple, Optional
 from dataclasses import dataclass
 
+import numpy as np
+
+from enums import SignalDirection
+
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class IndicatorSignal:
-    """技术指标信号"""
+    """技术指标信号（不可变，各区间的模板在模块加载时预先构建）"""
     name: str              # 指标名称
     value: float           # 指标数值
     status: str            # 状态：超买/超卖/金叉/死叉等
@@ -24,6 +32,199 @@ class IndicatorSignal:
     advice: str           # 操作建议
     reason: str           # 原因说明
     emoji: str = ""        # 表情符号
+    signal_code: int = SignalDirection.NEUTRAL  # 信号方向：1 买入 / -1 卖出 / 0 中性
+
+
+# 无任何指标输入时的综合解读报告（只读，所有调用共享）
+_EMPTY_SUMMARY = MappingProxyType({
+    'signals': (),
+    'summary': "暂无技术指标数据",
+    'risk_level': "未知",
+    'recommendation': MappingProxyType({
+        'action': '观望',
+        'confidence': '低',
+        'reason': '缺少技术指标数据'
+    }),
+})
+
+# 解读 MACD 所需的字段
+_MACD_KEYS = frozenset(('dif', 'dea', 'bar'))
+
+# 计入综合风险等级的高风险强度
+_HIGH_RISK_LEVELS = frozenset(('极强', '极弱', '高风险', '极高风险'))
+# 综合风险等级，按高风险信号占比达到 30% / 60% 的档数取值
+_RISK_LABELS = ("低风险 🟢", "中风险 🟠", "高风险 🔴")
+
+
+class BollingerResult(NamedTuple):
+    """布林带解读结果"""
+    location: str          # 价格所处位置：上轨上方/上轨附近/中轨区域/下轨附近/下轨下方
+    position_pct: float    # 价格在上下轨之间的位置（%）
+    bandwidth: float       # 带宽（%）
+    signal: str            # 信号
+    advice: str            # 操作建议
+    emoji: str             # 表情符号
+    reason: str            # 原因说明
+
+
+def _upper_closed(threshold: float) -> float:
+    """区间右端点闭合（value <= threshold 归入下一档之前）时使用的 bisect_right 边界"""
+    return math.nextafter(threshold, math.inf)
+
+
+def _classify(value: float, bounds: tuple, nan_index: int) -> int:
+    """按升序边界（bisect_right）取区间编号；NaN 无法比较大小，归入 nan_index 指定的区间"""
+    return bisect_right(bounds, value) if value == value else nan_index
+
+
+def _classify_array(values: np.ndarray, bounds: np.ndarray, nan_index: int) -> np.ndarray:
+    """_classify 的向量化版本：批量取区间编号，返回 int8 数组"""
+    indexes = np.searchsorted(bounds, values, side='right')
+    return np.where(np.isnan(values), nan_index, indexes).astype(np.int8)
+
+
+def _template(
+    name: str,
+    status: str,
+    level: str,
+    emoji: str,
+    signal: str,
+    advice: str,
+    signal_code: int = SignalDirection.NEUTRAL
+) -> IndicatorSignal:
+    """构建信号模板（数值与原因说明在解读时填入）"""
+    return IndicatorSignal(
+        name=name, value=math.nan, status=status, level=level,
+        signal=signal, advice=advice, reason="", emoji=emoji, signal_code=signal_code
+    )
+
+
+def _from_template(template: IndicatorSignal, value: float, reason: str) -> IndicatorSignal:
+    """由模板生成信号，只填入数值与原因说明，其余字段复用模板中的字符串"""
+    return IndicatorSignal(
+        template.name, value, template.status, template.level,
+        template.signal, template.advice, reason, template.emoji, template.signal_code
+    )
+
+
+# ========== MACD 解读表 ==========
+# BAR 分区（bisect_right）：< -0.01 死叉 / [-0.01, 0.01] 震荡 / > 0.01 金叉
+_MACD_BAR_BOUNDS = (-0.01, _upper_closed(0.01))
+# (status, emoji, 信号方向)：死叉分区均为卖出类信号，金叉分区均为买入类信号
+_MACD_CROSS = (
+    ("死叉", "🔴", SignalDirection.SELL),
+    ("震荡", "🟡", SignalDirection.NEUTRAL),
+    ("金叉", "🟢", SignalDirection.BUY),
+)
+
+# 各分区内按 2 位掩码取 (level, signal, advice, trend)：
+# 死叉：(DIF<0)<<1 | (DEA<0)；震荡：(DIF>DEA)<<1 | (DIF<DEA)；金叉：(DIF>0)<<1 | (DEA>0)
+_MACD_RECORDS = (
+    (
+        ("中", "试探性卖出", "获利减仓，防范回调", "顶部回落"),
+        ("中", "试探性卖出", "获利减仓，防范回调", "顶部回落"),
+        ("弱", "卖出", "逢高减仓，控制风险", "空头回落"),
+        ("极弱", "强烈卖出", "空仓观望，等待企稳", "下降趋势确立"),
+    ),
+    (
+        ("中性", "中性", "震荡观望，等待明确信号", "横盘整理"),
+        ("中偏弱", "偏空", "观望为主，等待企稳信号", "空头蓄势"),
+        ("中偏强", "偏多", "持有等待，关注突破方向", "多头蓄势"),
+        ("中性", "中性", "震荡观望，等待明确信号", "横盘整理"),
+    ),
+    (
+        ("中", "试探性买入", "轻仓试探，关注反弹持续性", "底部反弹"),
+        ("中", "试探性买入", "轻仓试探，关注反弹持续性", "底部反弹"),
+        ("强", "买入", "逢低加仓，持有为主", "多头反弹"),
+        ("极强", "强烈买入", "重仓持有，趋势良好", "上升趋势确立"),
+    ),
+)
+_MACD_TEMPLATES = tuple(
+    tuple(
+        _template("MACD", status, level, emoji, signal, advice, signal_code)
+        for level, signal, advice, _ in records
+    )
+    for (status, emoji, signal_code), records in zip(_MACD_CROSS, _MACD_RECORDS)
+)
+_MACD_TRENDS = tuple(tuple(record[3] for record in records) for records in _MACD_RECORDS)
+_MACD_REASON_FMT = "DIF={:.3f} | DEA={:.3f} | BAR={:.3f} | 趋势={}"
+
+# ========== RSI 解读表 ==========
+# 区间（bisect_right）：<=20 / (20,30] / (30,40) / [40,60] / (60,70) / [70,80) / >=80
+_RSI_BOUNDS = (_upper_closed(20), _upper_closed(30), 40, _upper_closed(60), 70, 80)
+_RSI_NAN_INDEX = 2  # NaN 无法比较大小，与原判断链一致归入弱势区域
+# (status, level, emoji, signal, advice)
+_RSI_RECORDS = (
+    ("严重超卖", "极弱", "🟢", "可能反转", "关注反弹机会，轻仓试探，分批建仓"),
+    ("超卖", "弱", "🟡", "关注底部", "等待企稳信号，谨慎抄底，可小仓位试探"),
+    ("弱势区域", "中偏弱", "🟡", "偏空", "控制仓位，等待企稳"),
+    ("中性区域", "中性", "⚪", "震荡观望", "观望为主，等待突破方向明确"),
+    ("强势区域", "中偏强", "🟢", "偏多", "持有为主，可适度加仓"),
+    ("超买", "强", "🟠", "注意回调", "持有为主，适当减仓，避免追高"),
+    ("严重超买", "极强", "🔴", "警惕回调", "高位减仓，锁定利润，或使用期权保护"),
+)
+_RSI_TEMPLATES = tuple(_template("RSI", *record) for record in _RSI_RECORDS)
+_RSI_REASON_FMT = "RSI({})={:.2f} | {}"
+
+_RSI_BOUNDS_ARRAY = np.array(_RSI_BOUNDS, dtype=np.float64)
+
+
+def _rsi_categories(rsi_values: np.ndarray) -> np.ndarray:
+    """批量计算 RSI 区间编号（与 interpret_rsi 的单值查表一致），返回 int8 数组"""
+    rsi_values = np.asarray(rsi_values, dtype=np.float64)
+    return _classify_array(rsi_values, _RSI_BOUNDS_ARRAY, _RSI_NAN_INDEX)
+
+
+_MACD_BAR_BOUNDS_ARRAY = np.array(_MACD_BAR_BOUNDS, dtype=np.float64)
+
+
+def _macd_categories(dif: np.ndarray, dea: np.ndarray, bar: np.ndarray):
+    """批量计算 MACD 分区与 DIF/DEA 掩码（与 interpret_macd 的单值判断一致）"""
+    zones = _classify_array(bar, _MACD_BAR_BOUNDS_ARRAY, 1)
+    masks = np.select(
+        [zones == 2, zones == 0],
+        [(dif > 0) * 2 + (dea > 0), (dif < 0) * 2 + (dea < 0)],
+        default=(dif > dea) * 2 + (dif < dea),
+    )
+    return zones, masks.astype(np.int8)
+
+
+# ========== ATR 解读表 ==========
+# ATR 占股价比例（%）区间（bisect_right）：<0.5 / [0.5,1.5) / [1.5,3) / [3,5) / >=5
+_ATR_PCT_BOUNDS = (0.5, 1.5, 3, 5)
+# (status, level, emoji, signal, advice, volatility, risk)
+_ATR_RECORDS = (
+    ("极低波动", "极低风险", "⚪", "波动极小", "方向选择困难，建议观望或突破后再介入", "极低", "极低"),
+    ("低波动", "低风险", "🟢", "波动较小", "可适度加仓（70-80%），注意方向选择风险", "低", "低"),
+    ("中等波动", "中风险", "🟡", "正常波动", "正常仓位（50-70%），注意止损", "中", "中"),
+    ("高波动", "高风险", "🟠", "波动较大", "控制仓位（≤50%），设置好止损位", "高", "高"),
+    ("极端波动", "极高风险", "🔴", "剧烈震荡", "严格控制仓位（≤20%），或观望等待波动率下降", "极高", "极高"),
+)
+_ATR_TEMPLATES = tuple(_template("ATR", *record[:5]) for record in _ATR_RECORDS)
+_ATR_REASON_FMT = "ATR({})={:.2f} | 占比={:.2f}% | 波动率={} | 风险等级={}"
+_ATR_PCT_BOUNDS_ARRAY = np.array(_ATR_PCT_BOUNDS, dtype=np.float64)
+
+
+def _atr_pct_categories(atr: np.ndarray, price: np.ndarray):
+    """批量计算 ATR 占股价比例与波动率等级（价格异常时占比按 0 处理）"""
+    valid = price > 0
+    atr_pct = np.zeros_like(atr)
+    np.divide(atr, price, out=atr_pct, where=valid)
+    atr_pct *= 100
+    return atr_pct, _classify_array(atr_pct, _ATR_PCT_BOUNDS_ARRAY, 0)
+
+
+# ========== 布林带解读表 ==========
+# 价格位置（%）区间（bisect_right）：<=10 / (10,25] / (25,75) / [75,90) / >=90
+_BB_POSITION_BOUNDS = (_upper_closed(10), _upper_closed(25), 75, 90)
+# (location, signal, advice, emoji)
+_BB_RECORDS = (
+    ("下轨下方", "买入信号", "严重超卖，可考虑抄底", "🟢"),
+    ("下轨附近", "偏强信号", "支撑较强，可试探性买入", "🟡"),
+    ("中轨区域", "中性", "震荡整理，等待突破", "⚪"),
+    ("上轨附近", "偏弱信号", "注意压力，可适当减仓", "🟠"),
+    ("上轨上方", "卖出信号", "严重超买，建议减仓或止盈", "🔴"),
+)
 
 
 class TechnicalIndicatorInterpreter:
@@ -50,87 +251,25 @@ class TechnicalIndicatorInterpreter:
         Returns:
             IndicatorSignal 对象
         """
-        # 1. 判断金叉/死叉
-        if bar > 0.01:  # 明显金叉
-            status = "金叉"
-            emoji = "🟢"
-
-            # 判断趋势强度
-            if dif > 0 and dea > 0:
-                level = "极强"
-                signal = "强烈买入"
-                advice = "重仓持有，趋势良好"
-                trend = "上升趋势确立"
-            elif dif > 0:
-                level = "强"
-                signal = "买入"
-                advice = "逢低加仓，持有为主"
-                trend = "多头反弹"
-            else:
-                level = "中"
-                signal = "试探性买入"
-                advice = "轻仓试探，关注反弹持续性"
-                trend = "底部反弹"
-
-        elif bar < -0.01:  # 明显死叉
-            status = "死叉"
-            emoji = "🔴"
-
-            if dif < 0 and dea < 0:
-                level = "极弱"
-                signal = "强烈卖出"
-                advice = "空仓观望，等待企稳"
-                trend = "下降趋势确立"
-            elif dif < 0:
-                level = "弱"
-                signal = "卖出"
-                advice = "逢高减仓，控制风险"
-                trend = "空头回落"
-            else:
-                level = "中"
-                signal = "试探性卖出"
-                advice = "获利减仓，防范回调"
-                trend = "顶部回落"
-
-        else:  # 震荡
-            status = "震荡"
-            emoji = "🟡"
-
-            if dif > dea:
-                level = "中偏强"
-                signal = "偏多"
-                advice = "持有等待，关注突破方向"
-                trend = "多头蓄势"
-            elif dif < dea:
-                level = "中偏弱"
-                signal = "偏空"
-                advice = "观望为主，等待企稳信号"
-                trend = "空头蓄势"
-            else:
-                level = "中性"
-                signal = "中性"
-                advice = "震荡观望，等待明确信号"
-                trend = "横盘整理"
-
-        # 2. 构建原因说明
-        reason_parts = [
-            f"DIF={dif:.3f}",
-            f"DEA={dea:.3f}",
-            f"BAR={bar:.3f}",
-            f"趋势={trend}"
-        ]
-        reason = " | ".join(reason_parts)
+        # 1. 判断金叉/死叉（NaN 与原判断链一致归入震荡）
+        zone = _classify(bar, _MACD_BAR_BOUNDS, 1)
+
+        # 判断趋势强度
+        if zone == 2:
+            mask = (dif > 0) << 1 | (dea > 0)
+        elif zone == 0:
+            mask = (dif < 0) << 1 | (dea < 0)
+        else:
+            mask = (dif > dea) << 1 | (dif < dea)
+        return TechnicalIndicatorInterpreter._build_macd_signal(dif, dea, bar, zone, mask)
 
-        return IndicatorSignal(
-            name="MACD",
-            value=bar,
-            status=status,
-            level=level,
-            signal=signal,
-            advice=advice,
-            reason=reason,
-            emoji=emoji
-        )
+    @staticmethod
+    def _build_macd_signal(dif: float, dea: float, bar: float, zone: int, mask: int) -> IndicatorSignal:
+        """由 BAR 分区与 DIF/DEA 掩码构建 MACD 信号"""
+        # 构建原因说明
+        reason = _MACD_REASON_FMT.format(dif, dea, bar, _MACD_TRENDS[zone][mask])
+
+        return _from_template(_MACD_TEMPLATES[zone][mask], bar, reason)
 
     @staticmethod
     def interpret_rsi(rsi_value: float, period: int = 14) -> IndicatorSignal:
@@ -142,71 +281,47 @@ class TechnicalIndicatorInterpreter:
             period: RSI 周期，默认 14
 
         Returns:
-            IndicatorSignal 对象
+            IndicatorSignal 对象（相同输入复用缓存的不可变对象）
         """
-        # 1. 判断超买超卖区间
-        if rsi_value >= 80:
-            status = "严重超买"
-            level = "极强"
-            emoji = "🔴"
-            signal = "警惕回调"
-            advice = "高位减仓，锁定利润，或使用期权保护"
-
-        elif rsi_value >= 70:
-            status = "超买"
-            level = "强"
-            emoji = "🟠"
-            signal = "注意回调"
-            advice = "持有为主，适当减仓，避免追高"
-
-        elif rsi_value <= 20:
-            status = "严重超卖"
-            level = "极弱"
-            emoji = "🟢"
-            signal = "可能反转"
-            advice = "关注反弹机会，轻仓试探，分批建仓"
-
-        elif rsi_value <= 30:
-            status = "超卖"
-            level = "弱"
-            emoji = "🟡"
-            signal = "关注底部"
-            advice = "等待企稳信号，谨慎抄底，可小仓位试探"
-
-        elif 40 <= rsi_value <= 60:
-            status = "中性区域"
-            level = "中性"
-            emoji = "⚪"
-            signal = "震荡观望"
-            advice = "观望为主，等待突破方向明确"
-
-        elif rsi_value > 60:
-            status = "强势区域"
-            level = "中偏强"
-            emoji = "🟢"
-            signal = "偏多"
-            advice = "持有为主，可适度加仓"
-
-        else:  # rsi_value < 40
-            status = "弱势区域"
-            level = "中偏弱"
-            emoji = "🟡"
-            signal = "偏空"
-            advice = "控制仓位，等待企稳"
-
-        # 2. 构建原因说明
-        reason = f"RSI({period})={rsi_value:.2f} | {status}"
-
-        return IndicatorSignal(
-            name="RSI",
-            value=rsi_value,
-            status=status,
-            level=level,
-            signal=signal,
-            advice=advice,
-            reason=reason,
-            emoji=emoji
-        )
+        return _interpret_rsi_cached(rsi_value, period)
+
+    @staticmethod
+    def _interpret_rsi(rsi_value: float, period: int) -> IndicatorSignal:
+        """RSI 解读实现（由 _interpret_rsi_cached 缓存）"""
+        # 判断超买超卖区间
+        index = _classify(rsi_value, _RSI_BOUNDS, _RSI_NAN_INDEX)
+        return TechnicalIndicatorInterpreter._build_rsi_signal(rsi_value, index, period)
+
+    @staticmethod
+    def interpret_rsi_batch(rsi_values, period: int = 14) -> List[IndicatorSignal]:
+        """
+        批量解读 RSI 指标
+
+        一次向量化计算全部区间编号，适合一次刷新多只股票时使用
+
+        Args:
+            rsi_values: RSI 值序列（list / ndarray / Series）
+            period: RSI 周期，默认 14
+
+        Returns:
+            IndicatorSignal 列表，与输入顺序一致
+        """
+        rsi_values = np.asarray(rsi_values, dtype=np.float64)
+        categories = _rsi_categories(rsi_values)
+        return [
+            TechnicalIndicatorInterpreter._build_rsi_signal(value, index, period)
+            for value, index in zip(rsi_values.tolist(), categories.tolist())
+        ]
+
+    @staticmethod
+    def _build_rsi_signal(rsi_value: float, index: int, period: int) -> IndicatorSignal:
+        """由区间编号构建 RSI 信号"""
+        template = _RSI_TEMPLATES[index]
+
+        # 构建原因说明
+        reason = _RSI_REASON_FMT.format(period, rsi_value, template.status)
+
+        return _from_template(template, rsi_value, reason)
 
     @staticmethod
     def interpret_atr(atr_value: float, price: float, period: int = 14) -> IndicatorSignal:
@@ -219,85 +334,62 @@ class TechnicalIndicatorInterpreter:
             period: ATR 周期，默认 14
 
         Returns:
-            IndicatorSignal 对象
+            IndicatorSignal 对象（相同输入复用缓存的不可变对象）
         """
+        # 告警在缓存之外输出，重复的异常输入仍会记录
+        if not price > 0:
+            logger.warning("[ATR解读] 价格异常: price=%s, 无法计算占比", price)
+        return _interpret_atr_cached(atr_value, price, period)
+
+    @staticmethod
+    def _interpret_atr(atr_value: float, price: float, period: int) -> IndicatorSignal:
+        """ATR 解读实现（由 _interpret_atr_cached 缓存）"""
         # 1. 计算 ATR 占股价比例
-        if price > 0:
-            atr_pct = (atr_value / price * 100)
-        else:
-            atr_pct = 0
-            logger.warning(f"[ATR解读] 价格异常: price={price}, 无法计算占比")
-
-        # 2. 判断波动率等级
-        if atr_pct >= 5:
-            status = "极端波动"
-            level = "极高风险"
-            emoji = "🔴"
-            volatility = "极高"
-            activity = "异常活跃"
-            signal = "剧烈震荡"
-            advice = "严格控制仓位（≤20%），或观望等待波动率下降"
-            risk = "极高"
-
-        elif atr_pct >= 3:
-            status = "高波动"
-            level = "高风险"
-            emoji = "🟠"
-            volatility = "高"
-            activity = "活跃"
-            signal = "波动较大"
-            advice = "控制仓位（≤50%），设置好止损位"
-            risk = "高"
-
-        elif atr_pct >= 1.5:
-            status = "中等波动"
-            level = "中风险"
-            emoji = "🟡"
-            volatility = "中"
-            activity = "一般"
-            signal = "正常波动"
-            advice = "正常仓位（50-70%），注意止损"
-            risk = "中"
-
-        elif atr_pct >= 0.5:
-            status = "低波动"
-            level = "低风险"
-            emoji = "🟢"
-            volatility = "低"
-            activity = "低迷"
-            signal = "波动较小"
-            advice = "可适度加仓（70-80%），注意方向选择风险"
-            risk = "低"
+        atr_pct = atr_value / price * 100 if price > 0 else 0
 
-        else:
-            status = "极低波动"
-            level = "极低风险"
-            emoji = "⚪"
-            volatility = "极低"
-            activity = "沉闷"
-            signal = "波动极小"
-            advice = "方向选择困难，建议观望或突破后再介入"
-            risk = "极低"
-
-        # 3. 构建原因说明
-        reason_parts = [
-            f"ATR({period})={atr_value:.2f}",
-            f"占比={atr_pct:.2f}%",
-            f"波动率={volatility}",
-            f"风险等级={risk}"
+        # 2. 判断波动率等级（NaN 与原判断链一致归入极低波动）
+        index = _classify(atr_pct, _ATR_PCT_BOUNDS, 0)
+        return TechnicalIndicatorInterpreter._build_atr_signal(atr_value, atr_pct, index, period)
+
+    @staticmethod
+    def interpret_atr_batch(atr_values, prices, period: int = 14) -> List[IndicatorSignal]:
+        """
+        批量解读 ATR 指标
+
+        一次向量化计算全部占比与波动率等级，价格异常的条目汇总为一条告警
+
+        Args:
+            atr_values: ATR 值序列（list / ndarray / Series）
+            prices: 当前价格序列，与 atr_values 等长
+            period: ATR 周期，默认 14
+
+        Returns:
+            IndicatorSignal 列表，与输入顺序一致
+        """
+        atr_values = np.asarray(atr_values, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        if atr_values.shape != prices.shape:
+            raise ValueError(f"ATR 与价格数组长度不一致: {len(atr_values)} != {len(prices)}")
+
+        bad_prices = np.count_nonzero(~(prices > 0))
+        if bad_prices:
+            logger.warning("[ATR解读] %d 个价格异常，无法计算占比", bad_prices)
+
+        atr_pct, indexes = _atr_pct_categories(atr_values, prices)
+        return [
+            TechnicalIndicatorInterpreter._build_atr_signal(atr_value, pct, index, period)
+            for atr_value, pct, index in zip(atr_values.tolist(), atr_pct.tolist(), indexes.tolist())
         ]
-        reason = " | ".join(reason_parts)
 
-        return IndicatorSignal(
-            name="ATR",
-            value=atr_value,
-            status=status,
-            level=level,
-            signal=signal,
-            advice=advice,
-            reason=reason,
-            emoji=emoji
-        )
+    @staticmethod
+    def _build_atr_signal(atr_value: float, atr_pct: float, index: int, period: int) -> IndicatorSignal:
+        """由波动率等级构建 ATR 信号"""
+        volatility, risk = _ATR_RECORDS[index][5:]
+
+        # 构建原因说明
+        reason = _ATR_REASON_FMT.format(period, atr_value, atr_pct, volatility, risk)
+
+        return _from_template(_ATR_TEMPLATES[index], atr_value, reason)
 
     @staticmethod
     def interpret_bollinger_bands(
@@ -305,7 +397,7 @@ class TechnicalIndicatorInterpreter:
         upper: float,
         middle: float,
         lower: float
-    ) -> Dict[str, Any]:
+    ) -> BollingerResult:
         """
         解读布林带指标
 
@@ -316,7 +408,7 @@ class TechnicalIndicatorInterpreter:
             lower: 下轨
 
         Returns:
-            解读结果字典
+            BollingerResult 解读结果
         """
         # 计算带宽
         if middle > 0:
@@ -330,50 +422,28 @@ class TechnicalIndicatorInterpreter:
         else:
             position_pct = 50
 
-        # 判断位置
-        if position_pct >= 90:
-            location = "上轨上方"
-            signal = "卖出信号"
-            advice = "严重超买，建议减仓或止盈"
-            emoji = "🔴"
-        elif position_pct >= 75:
-            location = "上轨附近"
-            signal = "偏弱信号"
-            advice = "注意压力，可适当减仓"
-            emoji = "🟠"
-        elif position_pct <= 10:
-            location = "下轨下方"
-            signal = "买入信号"
-            advice = "严重超卖，可考虑抄底"
-            emoji = "🟢"
-        elif position_pct <= 25:
-            location = "下轨附近"
-            signal = "偏强信号"
-            advice = "支撑较强，可试探性买入"
-            emoji = "🟡"
-        else:
-            location = "中轨区域"
-            signal = "中性"
-            advice = "震荡整理，等待突破"
-            emoji = "⚪"
+        # 判断位置（NaN 与原判断链一致归入中轨区域）
+        index = _classify(position_pct, _BB_POSITION_BOUNDS, 2)
+        location, signal, advice, emoji = _BB_RECORDS[index]
 
-        return {
-            'location': location,
-            'position_pct': position_pct,
-            'bandwidth': bandwidth,
-            'signal': signal,
-            'advice': advice,
-            'emoji': emoji,
-            'reason': f"位置={position_pct:.1f}%, 带宽={bandwidth:.2f}%"
-        }
+        return BollingerResult(
+            location=location,
+            position_pct=position_pct,
+            bandwidth=bandwidth,
+            signal=signal,
+            advice=advice,
+            emoji=emoji,
+            reason=f"位置={position_pct:.1f}%, 带宽={bandwidth:.2f}%"
+        )
 
+    @classmethod
     def generate_indicators_summary(
-        self,
+        cls,
         macd_data: Optional[Dict] = None,
         rsi_value: Optional[float] = None,
         atr_value: Optional[float] = None,
         price: Optional[float] = None
-    ) -> Dict[str, Any]:
+    ) -> Mapping[str, Any]:
         """
         生成技术指标综合解读报告
 
@@ -384,38 +454,117 @@ class TechnicalIndicatorInterpreter:
             price: 当前价格
 
         Returns:
-            综合解读报告
+            综合解读报告（无任何指标输入时返回共享的只读空报告）
         """
+        if macd_data is None and rsi_value is None and atr_value is None:
+            return _EMPTY_SUMMARY
+
         signals = []
 
         # 1. MACD 解读
-        if macd_data and all(k in macd_data for k in ['dif', 'dea', 'bar']):
-            macd_signal = self.interpret_macd(
-                macd_data['dif'],
-                macd_data['dea'],
-                macd_data['bar']
-            )
+        if macd_data is not None and macd_data.keys() >= _MACD_KEYS:
+            dif, dea, bar = macd_data['dif'], macd_data['dea'], macd_data['bar']
+            macd_signal = cls.interpret_macd(dif, dea, bar)
             signals.append(macd_signal)
 
         # 2. RSI 解读
         if rsi_value is not None:
-            rsi_signal = self.interpret_rsi(rsi_value)
+            rsi_signal = cls.interpret_rsi(rsi_value)
             signals.append(rsi_signal)
 
         # 3. ATR 解读
         if atr_value is not None and price is not None:
-            atr_signal = self.interpret_atr(atr_value, price)
+            atr_signal = cls.interpret_atr(atr_value, price)
             signals.append(atr_signal)
 
         # 4. 生成综合建议
+        return cls._summarize(signals)
+
+    @classmethod
+    def generate_indicators_summary_batch(
+        cls,
+        dif=None,
+        dea=None,
+        bar=None,
+        rsi=None,
+        atr=None,
+        price=None
+    ) -> List[Dict[str, Any]]:
+        """
+        批量生成技术指标综合解读报告（多只股票一次处理）
+
+        各参数为等长的一维数组（list / ndarray / Series），第 i 个元素对应第 i 只股票。
+        区间判断对整列向量化计算，逐行只做查表与文本拼接；
+        结果与逐行调用 generate_indicators_summary 一致：
+        - dif/dea/bar 同时提供时解读 MACD
+        - rsi 提供时解读 RSI
+        - atr/price 同时提供时解读 ATR
+
+        Returns:
+            综合解读报告列表，与输入顺序一致
+        """
+        columns = {
+            name: np.asarray(values, dtype=np.float64)
+            for name, values in (
+                ('dif', dif), ('dea', dea), ('bar', bar),
+                ('rsi', rsi), ('atr', atr), ('price', price),
+            )
+            if values is not None
+        }
+        if not columns:
+            return []
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            sizes = {name: len(values) for name, values in columns.items()}
+            raise ValueError(f"批量解读的指标数组长度不一致: {sizes}")
+        n = lengths.pop()
+
+        per_row = []
+
+        # 1. MACD：向量化计算分区与掩码
+        if columns.keys() >= _MACD_KEYS:
+            zones, masks = _macd_categories(columns['dif'], columns['dea'], columns['bar'])
+            per_row.append([
+                cls._build_macd_signal(*args)
+                for args in zip(
+                    columns['dif'].tolist(), columns['dea'].tolist(), columns['bar'].tolist(),
+                    zones.tolist(), masks.tolist()
+                )
+            ])
+
+        # 2. RSI
+        if 'rsi' in columns:
+            per_row.append(cls.interpret_rsi_batch(columns['rsi']))
+
+        # 3. ATR
+        if 'atr' in columns and 'price' in columns:
+            per_row.append(cls.interpret_atr_batch(columns['atr'], columns['price']))
+
+        # 4. 逐行汇总
+        if not per_row:
+            return [cls._summarize([]) for _ in range(n)]
+        return [cls._summarize(list(signals)) for signals in zip(*per_row)]
+
+    @staticmethod
+    def _summarize(signals: list) -> Dict[str, Any]:
+        """由单只股票的指标信号生成综合解读报告"""
+        # 一次遍历统计买入/卖出/高风险信号数量
+        buy_count = sell_count = high_risk_count = 0
+        for s in signals:
+            buy_count += s.signal_code > 0
+            sell_count += s.signal_code < 0
+            high_risk_count += s.level in _HIGH_RISK_LEVELS
+        total = len(signals)
+
         return {
             'signals': signals,
-            'summary': self._generate_summary(signals),
-            'risk_level': self._calculate_risk_level(signals),
-            'recommendation': self._generate_recommendation(signals)
+            'summary': TechnicalIndicatorInterpreter._generate_summary(signals),
+            'risk_level': TechnicalIndicatorInterpreter._calculate_risk_level(high_risk_count, total),
+            'recommendation': TechnicalIndicatorInterpreter._generate_recommendation(buy_count, sell_count, total)
         }
 
-    def _generate_summary(self, signals: list) -> str:
+    @staticmethod
+    def _generate_summary(signals: list) -> str:
         """生成指标摘要"""
         if not signals:
             return "暂无技术指标数据"
@@ -427,41 +576,38 @@ class TechnicalIndicatorInterpreter:
 
         return " | ".join(summaries)
 
-    def _calculate_risk_level(self, signals: list) -> str:
-        """计算综合风险等级"""
-        if not signals:
-            return "未知"
+    @staticmethod
+    def _calculate_risk_level(high_risk_count: int, total: int) -> str:
+        """
+        计算综合风险等级
 
-        # 统计高风险信号数量
-        high_risk_count = sum(
-            1 for s in signals
-            if s.level in ['极强', '极弱', '高风险', '极高风险']
-        )
+        Args:
+            high_risk_count: 高风险信号数量
+            total: 信号总数
+        """
+        if not total:
+            return "未知"
 
-        total = len(signals)
-        ratio = high_risk_count / total if total > 0 else 0
+        # 高风险占比 >= 30% 为中风险，>= 60% 为高风险（整数比较，避免除法）
+        return _RISK_LABELS[(10 * high_risk_count >= 3 * total) + (5 * high_risk_count >= 3 * total)]
 
-        if ratio >= 0.6:
-            return "高风险 🔴"
-        elif ratio >= 0.3:
-            return "中风险 🟠"
-        else:
-            return "低风险 🟢"
+    @staticmethod
+    def _generate_recommendation(buy_signals: int, sell_signals: int, total: int) -> Dict[str, Any]:
+        """
+        生成综合操作建议
 
-    def _generate_recommendation(self, signals: list) -> Dict[str, Any]:
-        """生成综合操作建议"""
-        if not signals:
+        Args:
+            buy_signals: 买入信号数量
+            sell_signals: 卖出信号数量
+            total: 信号总数
+        """
+        if not total:
             return {
                 'action': '观望',
                 'confidence': '低',
                 'reason': '缺少技术指标数据'
             }
 
-        # 统计买入/卖出信号
-        buy_signals = sum(1 for s in signals if '买' in s.signal)
-        sell_signals = sum(1 for s in signals if '卖' in s.signal)
-        total = len(signals)
-
         if buy_signals > total * 0.6:
             return {
                 'action': '买入',
@@ -485,21 +631,39 @@ class TechnicalIndicatorInterpreter:
             }
 
 
+# RSI / ATR 解读是纯函数：按精确输入缓存（typed=True 区分 50 与 50.0），
+# 轮询同一批股票时重复的指标值直接返回缓存的不可变信号对象
+_INTERPRET_CACHE_SIZE = 4096
+_interpret_rsi_cached = lru_cache(maxsize=_INTERPRET_CACHE_SIZE, typed=True)(
+    TechnicalIndicatorInterpreter._interpret_rsi
+)
+_interpret_atr_cached = lru_cache(maxsize=_INTERPRET_CACHE_SIZE, typed=True)(
+    TechnicalIndicatorInterpreter._interpret_atr
+)
+
+
+def get_interpret_cache_info() -> Dict[str, Any]:
+    """获取 RSI / ATR 解读缓存的命中统计（调试用）"""
+    return {
+        'rsi': _interpret_rsi_cached.cache_info()._asdict(),
+        'atr': _interpret_atr_cached.cache_info()._asdict(),
+    }
+
+
 # 便捷函数
 def interpret_all_indicators(
     macd_data: Optional[Dict] = None,
     rsi_value: Optional[float] = None,
     atr_value: Optional[float] = None,
     price: Optional[float] = None
-) -> Dict[str, Any]:
+) -> Mapping[str, Any]:
     """
     解读所有技术指标（便捷函数）
 
     Returns:
         综合解读报告
     """
-    interpreter = TechnicalIndicatorInterpreter()
-    return interpreter.generate_indicators_summary(
+    return TechnicalIndicatorInterpreter.generate_indicators_summary(
         macd_data=macd_data,
         rsi_value=rsi_value,
         atr_value=atr_value,
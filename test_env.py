@@ -96,8 +96,7 @@ def view_database():
     print(f"  ✓ 连接成功")
     
     # 使用独立的 session 查询
-    session = db.get_session()
-    try:
+    with db.get_session() as session:
         # 统计信息
         result = session.execute(text("""
             SELECT 
@@ -158,8 +157,6 @@ def view_database():
             for row in recent:
                 vol_str = f"{row[4]/10000:.2f}万" if row[4] else "N/A"
                 print(f"  {row[0]:<10} {row[1]!s:<12} {row[2]:<10.2f} {row[3]:<8.2f} {vol_str:<15} {row[5] or 'Unknown'}")
-    finally:
-        session.close()
     
     return True
 
@@ -398,8 +395,7 @@ def query_stock_data(stock_code: str, days: int = 10):
     
     db = get_db()
     
-    session = db.get_session()
-    try:
+    with db.get_session() as session:
         result = session.execute(text("""
             SELECT date, open, high, low, close, pct_chg, volume, amount, ma5, ma10, ma20, volume_ratio
             FROM stock_daily 
@@ -419,8 +415,6 @@ def query_stock_data(stock_code: str, days: int = 10):
                 print(f"  {dt!s:<12} {open_:<10.2f} {high:<10.2f} {low:<10.2f} {close:<10.2f} {pct_chg:<8.2f} {ma5:<10.2f} {ma10:<10.2f} {vol_ratio:<8.2f}")
         else:
             print(f"  未找到 {stock_code} 的数据")
-    finally:
-        session.close()
 
 
 def main():
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+技术指标计算单元测试
+测试 MACD、RSI、ATR、布林带等指标与 pandas 参考实现一致
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+
+from data_provider import indicators
+from data_provider.indicators import (
+    calculate_atr,
+    calculate_bollinger_bands,
+    calculate_macd,
+    calculate_macd_batch,
+    calculate_rsi,
+    ema,
+)
+from technical_indicators import TechnicalIndicatorInterpreter
+
+
+@pytest.fixture(scope="module")
+def close():
+    """随机游走收盘价（固定种子，整个模块共享一份，测试中不得原地修改）"""
+    rng = np.random.default_rng(42)
+    return pd.Series(100 + np.cumsum(rng.standard_normal(120)))
+
+
+@pytest.fixture(scope="module")
+def ohlc(close):
+    """带高低价的行情数据"""
+    rng = np.random.default_rng(7)
+    return pd.DataFrame({
+        'high': close + rng.uniform(0, 2, len(close)),
+        'low': close - rng.uniform(0, 2, len(close)),
+        'close': close,
+    })
+
+
+@pytest.fixture(scope="module")
+def close_matrix():
+    """5 只股票 × 80 个交易日的收盘价矩阵"""
+    rng = np.random.default_rng(3)
+    return 50 + np.cumsum(rng.standard_normal((5, 80)), axis=1)
+
+
+class TestInputArrays:
+    """输入数组转换测试"""
+
+    def test_float_series_not_copied(self, close):
+        """测试 float64 序列直接取视图，不复制"""
+        assert np.shares_memory(indicators._as_float_array(close), close.to_numpy())
+
+    def test_int_series_converted(self):
+        """测试整数序列转换为连续 float64 数组"""
+        values = indicators._as_float_array(pd.Series([1, 2, 3]))
+
+        assert values.dtype == np.float64
+        assert values.flags['C_CONTIGUOUS']
+
+
+class TestEMA:
+    """EMA 计算测试"""
+
+    def test_loop_matches_pandas(self, close):
+        """测试单遍递推内核与 pandas ewm(adjust=False) 一致"""
+        values = close.to_numpy()
+        expected = close.ewm(span=12, adjust=False).mean().to_numpy()
+
+        np.testing.assert_allclose(indicators._ema_loop(values, 2 / 13), expected, rtol=1e-12)
+
+    def test_loop_empty(self):
+        """测试空数组"""
+        assert len(indicators._ema_loop(np.array([]), 0.5)) == 0
+
+    def test_nan_falls_back_to_pandas(self, close):
+        """测试含 NaN 时按 pandas 规则处理"""
+        values = close.to_numpy().copy()
+        values[5] = np.nan
+        expected = pd.Series(values).ewm(span=12, adjust=False).mean().to_numpy()
+
+        np.testing.assert_allclose(ema(values, 12), expected)
+
+
+class TestMACD:
+    """MACD 计算测试"""
+
+    def test_macd_matches_pandas(self, close):
+        """测试 MACD 三列与 pandas 实现一致"""
+        result = calculate_macd(close)
+
+        dif = close.ewm(span=12, adjust=False).mean() - close.ewm(span=26, adjust=False).mean()
+        dea = dif.ewm(span=9, adjust=False).mean()
+
+        assert list(result.columns) == ['macd', 'macd_signal', 'macd_hist']
+        assert result.index.equals(close.index)
+        np.testing.assert_allclose(result['macd'], dif, atol=1e-10)
+        np.testing.assert_allclose(result['macd_signal'], dea, atol=1e-10)
+        np.testing.assert_allclose(result['macd_hist'], dif - dea, atol=1e-10)
+
+class TestMACDBatch:
+    """批量 MACD 计算测试"""
+
+    def test_batch_matches_single(self, close_matrix):
+        """测试每行结果与逐只调用 calculate_macd 一致"""
+        macd, macd_signal, macd_hist = calculate_macd_batch(close_matrix)
+
+        assert macd.shape == close_matrix.shape
+        for i, row in enumerate(close_matrix):
+            expected = calculate_macd(pd.Series(row))
+            np.testing.assert_allclose(macd[i], expected['macd'], atol=1e-10)
+            np.testing.assert_allclose(macd_signal[i], expected['macd_signal'], atol=1e-10)
+            np.testing.assert_allclose(macd_hist[i], expected['macd_hist'], atol=1e-10)
+
+    def test_loop_matches_batch(self, close_matrix):
+        """测试逐行递推内核与 pandas 批量实现一致"""
+        macd, macd_signal, _ = calculate_macd_batch(close_matrix)
+
+        dif, dea = indicators._macd_batch_loop(close_matrix, 2 / 13, 2 / 27, 2 / 10)
+
+        np.testing.assert_allclose(dif, macd, atol=1e-10)
+        np.testing.assert_allclose(dea, macd_signal, atol=1e-10)
+
+    def test_rejects_one_dimensional_input(self, close):
+        """测试一维输入抛出 ValueError"""
+        with pytest.raises(ValueError):
+            calculate_macd_batch(close.to_numpy())
+
+
+class TestRSI:
+    """RSI 计算测试"""
+
+    def test_rsi_matches_pandas(self, close):
+        """测试与 pandas rolling 实现一致"""
+        delta = close.diff()
+        gain = delta.where(delta > 0, 0).rolling(window=14).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+        expected = (100 - 100 / (1 + gain / loss.replace(0, np.nan))).fillna(50)
+
+        result = calculate_rsi(close, period=14)
+
+        assert result.index.equals(close.index)
+        np.testing.assert_allclose(result, expected, atol=1e-10)
+
+    def test_rsi_neutral_without_enough_data(self, close):
+        """测试数据不足时填充为 50"""
+        assert (calculate_rsi(close.iloc[:13]) == 50).all()
+        assert calculate_rsi(close.iloc[:14]).iloc[-1] != 50
+
+    def test_rsi_flat_and_rising_prices(self):
+        """测试横盘（无涨跌）为 50，单边上涨（无跌幅）同样按除零处理为 50"""
+        assert (calculate_rsi(pd.Series([10.0] * 30)) == 50).all()
+        assert (calculate_rsi(pd.Series(np.arange(30.0))) == 50).all()
+
+    def test_rsi_falling_prices(self):
+        """测试单边下跌时 RSI 为 0"""
+        assert calculate_rsi(pd.Series(np.arange(30.0, 0, -1))).iloc[-1] == 0
+
+
+
+class TestATR:
+    """ATR 计算测试"""
+
+    def test_atr_matches_pandas(self, ohlc):
+        """测试与 pandas 实现一致"""
+        prev_close = ohlc['close'].shift()
+        true_range = pd.concat([
+            ohlc['high'] - ohlc['low'],
+            (ohlc['high'] - prev_close).abs(),
+            (ohlc['low'] - prev_close).abs(),
+        ], axis=1).max(axis=1)
+        expected = true_range.rolling(window=14).mean()
+
+        result = calculate_atr(ohlc, period=14)
+
+        assert result.index.equals(ohlc.index)
+        np.testing.assert_allclose(result, expected, atol=1e-10)
+
+    def test_first_day_uses_high_low_range(self):
+        """测试首日没有昨收时真实波幅取最高价 - 最低价"""
+        df = pd.DataFrame({'high': [12.0, 11.0], 'low': [10.0, 10.5], 'close': [11.0, 10.8]})
+
+        assert calculate_atr(df, period=1).tolist() == [2.0, 0.5]
+
+    def test_gap_counts_in_true_range(self):
+        """测试跳空时真实波幅计入与昨收的差距"""
+        df = pd.DataFrame({'high': [10.0, 15.0], 'low': [9.0, 14.0], 'close': [9.5, 14.5]})
+
+        assert calculate_atr(df, period=1).iloc[-1] == 5.5
+
+
+
+class TestBollingerBands:
+    """布林带计算测试"""
+
+    def test_bands_match_pandas(self, close):
+        """测试与 pandas rolling(20) 均值 / 标准差一致"""
+        middle = close.rolling(window=20).mean()
+        std = close.rolling(window=20).std()
+
+        result = calculate_bollinger_bands(close)
+
+        assert result.index.equals(close.index)
+        assert result.iloc[:19].isna().all().all()
+        np.testing.assert_allclose(result['bb_middle'], middle, atol=1e-8)
+        np.testing.assert_allclose(result['bb_upper'], middle + 2 * std, atol=1e-8)
+        np.testing.assert_allclose(result['bb_lower'], middle - 2 * std, atol=1e-8)
+
+    def test_flat_window_has_zero_width(self, close):
+        """测试价格不变（如停牌）的窗口带宽精确为 0"""
+        prices = pd.concat([close.iloc[:30], pd.Series([1688.88] * 20)], ignore_index=True)
+
+        last = calculate_bollinger_bands(prices).iloc[-1]
+
+        assert last['bb_upper'] == last['bb_lower'] == pytest.approx(1688.88)
+
+    def test_nan_handled_per_window(self, close):
+        """测试含 NaN 时只影响覆盖该位置的窗口"""
+        prices = close.copy()
+        prices.iloc[30] = np.nan
+
+        result = calculate_bollinger_bands(prices)
+
+        assert result['bb_middle'].iloc[30:50].isna().all()
+        assert result['bb_middle'].iloc[50:].notna().all()
+
+    def test_result_feeds_interpreter(self, close):
+        """测试计算结果可直接用于布林带解读"""
+        last = calculate_bollinger_bands(close).iloc[-1]
+
+        result = TechnicalIndicatorInterpreter.interpret_bollinger_bands(
+            price=close.iloc[-1],
+            upper=last['bb_upper'],
+            middle=last['bb_middle'],
+            lower=last['bb_lower'],
+        )
+
+        assert result.bandwidth > 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
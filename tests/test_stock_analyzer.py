@@ -9,6 +9,7 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from stock_analyzer import StockTrendAnalyzer, TrendAnalysisResult, TrendStatus, VolumeStatus, BuySignal
+from stock_analyzer import _rsi_tier, get_analyzer
 
 
 class TestStockTrendAnalyzer:
@@ -18,9 +19,10 @@ class TestStockTrendAnalyzer:
     def sample_stock_data(self):
         """创建测试用股票数据"""
         dates = pd.date_range(end=datetime.now(), periods=60, freq='D')
+        rng = np.random.default_rng(42)  # 固定种子，结果可复现
 
         # 创建上涨趋势数据
-        prices = np.linspace(100, 130, 60) + np.random.randn(60) * 2
+        prices = np.linspace(100, 130, 60) + rng.standard_normal(60) * 2
 
         df = pd.DataFrame({
             'date': dates,
@@ -28,7 +30,7 @@ class TestStockTrendAnalyzer:
             'high': prices * 1.02,
             'low': prices * 0.98,
             'close': prices,
-            'volume': np.random.randint(1000000, 10000000, 60)
+            'volume': rng.integers(1_000_000, 10_000_000, 60)
         })
         return df
 
@@ -37,6 +39,22 @@ class TestStockTrendAnalyzer:
         analyzer = StockTrendAnalyzer()
         assert analyzer is not None
 
+    def test_get_analyzer_returns_shared_instance(self):
+        """测试 get_analyzer 返回共享单例且市场配置只读"""
+        analyzer = get_analyzer()
+        assert analyzer is get_analyzer()
+        with pytest.raises(TypeError):
+            analyzer.MARKET_CONFIG['A股']['bias_threshold'] = 10.0
+
+    @pytest.mark.parametrize("market,atr_pct,zone", [
+        ('A股', 1.0, 0), ('A股', 1.5, 1), ('A股', 4.0, 2),
+        ('港股', 4.0, 1), ('港股', 6.0, 2),
+    ])
+    def test_atr_zone_bounds(self, market, atr_pct, zone):
+        """测试 ATR 分区边界：(min, max) 开区间为健康"""
+        from bisect import bisect_right
+        assert bisect_right(StockTrendAnalyzer._ATR_BOUNDS[market], atr_pct) == zone
+
     def test_market_type_detection_a_stock(self):
         """测试 A 股市场类型识别"""
         analyzer = StockTrendAnalyzer()
@@ -75,6 +93,19 @@ class TestStockTrendAnalyzer:
         assert VolumeStatus.SHRINK_VOLUME_DOWN.value == "缩量回调"
 
 
+class TestRsiTier:
+    """RSI 分档查表测试"""
+
+    @pytest.mark.parametrize("rsi,tier", [
+        (0, 0), (29.99, 0), (30, 1), (69.99, 1),
+        (70, 2), (79.99, 2), (80, 3), (100, 3),
+        (-5, 0), (float('inf'), 3), (float('nan'), 3),
+    ])
+    def test_rsi_tier_boundaries(self, rsi, tier):
+        """测试分档边界与原比较链一致"""
+        assert _rsi_tier(rsi) == tier
+
+
 class TestTrendAnalysisResult:
     """趋势分析结果测试"""
 
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+股票名称解析器单元测试
+测试名称缓存与持久化
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import types
+import pytest
+import pandas as pd
+
+import stock_name_resolver
+from stock_name_resolver import StockNameResolver
+
+
+@pytest.fixture
+def isolated_resolver_class(tmp_path, monkeypatch):
+    """单例重置，缓存目录指向临时目录（构造前替换，不读写工作目录下的 data）"""
+    monkeypatch.setattr(StockNameResolver, '_instance', None)
+    monkeypatch.setattr(StockNameResolver, '_CACHE_DIR', tmp_path)
+    # 每个测试都会新建实例，不向 atexit 注册退出回调，改由测试收尾时关闭
+    monkeypatch.setattr(stock_name_resolver, 'atexit', types.SimpleNamespace(register=lambda func: func))
+    return StockNameResolver
+
+
+@pytest.fixture
+def resolver(isolated_resolver_class):
+    """缓存文件指向临时目录的名称解析器"""
+    instance = isolated_resolver_class()
+    yield instance
+    instance._compact_and_close()
+
+
+def reload_cache(resolver) -> dict:
+    """模拟重启：从持久化文件重新加载缓存"""
+    resolver._name_cache.clear()
+    resolver._log_entries = 0
+    resolver._load_persistent_cache()
+    return dict(resolver._name_cache)
+
+
+class TestNameCachePersistence:
+    """名称缓存持久化测试"""
+
+    def test_add_appends_to_log(self, resolver):
+        """测试新增名称追加到日志，不重写 JSON 文件"""
+        resolver._add_to_cache('600519', '贵州茅台')
+        resolver._add_to_cache('000001', '平安银行')
+        resolver._log_fp.flush()
+
+        assert not resolver._cache_file.exists()
+        lines = resolver._log_file.read_text(encoding='utf-8').splitlines()
+        assert [json.loads(line) for line in lines] == [
+            ['600519', '贵州茅台'],
+            ['000001', '平安银行'],
+        ]
+
+    def test_unchanged_name_not_logged(self, resolver):
+        """测试重复写入相同名称不追加日志"""
+        resolver._add_to_cache('600519', '贵州茅台')
+        resolver._add_to_cache('600519', '贵州茅台')
+
+        assert resolver._log_entries == 1
+
+    def test_log_replayed_on_load(self, resolver):
+        """测试重新加载时回放追加日志"""
+        resolver._add_to_cache('600519', '贵州茅台')
+        resolver._log_fp.flush()
+
+        assert reload_cache(resolver) == {'600519': '贵州茅台'}
+
+    def test_compaction_merges_log_into_json(self, resolver):
+        """测试压缩后日志合并到 JSON 文件"""
+        resolver._add_to_cache('600519', '贵州茅台')
+        resolver._compact_and_close()
+
+        assert not resolver._log_file.exists()
+        with open(resolver._cache_file, encoding='utf-8') as f:
+            assert json.load(f) == {'600519': '贵州茅台'}
+        assert reload_cache(resolver) == {'600519': '贵州茅台'}
+
+    def test_background_flush_writes_dirty_log(self, resolver):
+        """测试写入只进缓冲，由刷新任务写盘"""
+        resolver._add_to_cache('600519', '贵州茅台')
+        assert resolver._log_dirty
+
+        resolver._flush_log()
+
+        assert not resolver._log_dirty
+        assert resolver._log_file.read_text(encoding='utf-8') == '["600519", "贵州茅台"]\n'
+
+    def test_flush_compacts_long_log(self, resolver, monkeypatch):
+        """测试日志超过阈值时由刷新任务压缩合并"""
+        monkeypatch.setattr(resolver, '_LOG_COMPACT_THRESHOLD', 2)
+        resolver._add_to_cache('600519', '贵州茅台')
+        resolver._add_to_cache('000001', '平安银行')
+        assert not resolver._cache_file.exists()
+
+        resolver._flush_log()
+
+        assert not resolver._log_file.exists()
+        assert json.loads(resolver._cache_file.read_text(encoding='utf-8')) == {
+            '600519': '贵州茅台',
+            '000001': '平安银行',
+        }
+
+    def test_truncated_log_line_skipped(self, resolver):
+        """测试跳过写了一半的日志行"""
+        resolver._log_file.write_text(
+            '["600519", "贵州茅台"]\n["000001", "平安', encoding='utf-8'
+        )
+
+        assert reload_cache(resolver) == {'600519': '贵州茅台'}
+
+
+class TestAkshareStockList:
+    """Akshare A股列表缓存测试"""
+
+    @pytest.fixture
+    def fetch_calls(self, monkeypatch):
+        """替换 akshare 模块，记录拉取次数"""
+        calls = []
+
+        def stock_zh_a_spot_em():
+            calls.append(1)
+            return pd.DataFrame({'代码': ['600519', '000001'], '名称': ['贵州茅台', None]})
+
+        fake_akshare = types.ModuleType('akshare')
+        fake_akshare.stock_zh_a_spot_em = stock_zh_a_spot_em
+        monkeypatch.setitem(sys.modules, 'akshare', fake_akshare)
+        return calls
+
+    def test_list_cached_as_mapping(self, resolver, fetch_calls):
+        """测试列表缓存为代码 -> 名称映射，跳过空名称"""
+        assert resolver._get_akshare_stock_list() == {'600519': '贵州茅台'}
+        assert resolver._fetch_from_akshare('600519') == '贵州茅台'
+        assert len(fetch_calls) == 1
+
+    def test_disk_cache_reused_after_restart(self, resolver, fetch_calls):
+        """测试内存缓存失效后复用有效期内的磁盘缓存"""
+        resolver._get_akshare_stock_list()
+        resolver._akshare_stock_list = None
+
+        assert resolver._get_akshare_stock_list() == {'600519': '贵州茅台'}
+        assert len(fetch_calls) == 1
+
+    def test_expired_disk_cache_refetched(self, resolver, fetch_calls):
+        """测试磁盘缓存过期后重新拉取"""
+        resolver._get_akshare_stock_list()
+        resolver._akshare_stock_list = None
+        expired = time.time() - resolver._AKSHARE_LIST_TTL - 1
+        os.utime(resolver._akshare_list_file, (expired, expired))
+
+        resolver._get_akshare_stock_list()
+        assert len(fetch_calls) == 2
+
+
+class TestBulkResolve:
+    """批量预解析测试"""
+
+    @pytest.fixture
+    def sources(self, monkeypatch):
+        """替换 akshare / tushare 模块，记录 Tushare 请求的代码"""
+        requested = []
+
+        fake_akshare = types.ModuleType('akshare')
+        fake_akshare.stock_zh_a_spot_em = lambda: pd.DataFrame(
+            {'代码': ['600519'], '名称': ['贵州茅台']}
+        )
+
+        class FakePro:
+            def stock_basic(self, ts_code, fields):
+                requested.append(ts_code)
+                return pd.DataFrame({'ts_code': ['000001.SZ'], 'name': ['平安银行']})
+
+        def pro_api(token):
+            requested.append('pro_api')
+            return FakePro()
+
+        fake_tushare = types.ModuleType('tushare')
+        fake_tushare.pro_api = pro_api
+
+        monkeypatch.setitem(sys.modules, 'akshare', fake_akshare)
+        monkeypatch.setitem(sys.modules, 'tushare', fake_tushare)
+        monkeypatch.setenv('TUSHARE_TOKEN', 'test')
+        return requested
+
+    def test_resolves_misses_in_one_tushare_call(self, resolver, sources):
+        """测试 Akshare 未命中的A股代码合并为一次 Tushare 查询"""
+        resolver._name_cache['601318'] = '中国平安'
+
+        resolved = resolver.bulk_resolve(['600519', '000001', '601318', '00700.HK', '000001'])
+
+        assert resolved == {'600519': '贵州茅台', '000001': '平安银行'}
+        assert sources == ['pro_api', '000001.SZ']
+        resolver._log_fp.flush()
+        assert reload_cache(resolver)['000001'] == '平安银行'
+        assert resolver.get_stock_name('000001') == '平安银行'
+
+    def test_tushare_handle_reused(self, resolver, sources):
+        """测试 Tushare pro 接口只创建一次"""
+        resolver.bulk_resolve(['000001'])
+        resolver._name_cache.clear()
+        resolver.bulk_resolve(['000001'])
+
+        assert sources.count('pro_api') == 1
+
+    def test_all_cached_skips_sources(self, resolver, sources):
+        """测试全部命中缓存时不查询数据源"""
+        resolver._name_cache['600519'] = '贵州茅台'
+
+        assert resolver.bulk_resolve(['600519']) == {}
+        assert sources == []
+
+
+class TestTushareCode:
+    """Tushare 代码格式转换测试"""
+
+    @pytest.mark.parametrize("code,expected", [
+        ('600519', '600519.SH'),
+        ('688981', '688981.SH'),
+        ('000001', '000001.SZ'),
+        ('300750', '300750.SZ'),
+        ('600519.sh', '600519.SH'),
+        ('830799', None),
+        ('60', None),
+    ])
+    def test_to_ts_code(self, code, expected):
+        """测试按代码前缀推断市场后缀"""
+        assert StockNameResolver._to_ts_code(code) == expected
+
+
+class TestSingleton:
+    """单例初始化测试"""
+
+    def test_concurrent_construction_initializes_once(self, isolated_resolver_class, monkeypatch):
+        """测试并发首次创建只初始化一次"""
+        load_calls = []
+
+        def slow_load(self):
+            load_calls.append(1)
+            time.sleep(0.05)
+
+        monkeypatch.setattr(StockNameResolver, '_load_persistent_cache', slow_load)
+
+        instances = []
+        threads = [
+            threading.Thread(target=lambda: instances.append(StockNameResolver()))
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert len(load_calls) == 1
+        assert all(instance is instances[0] for instance in instances)
+        instances[0]._compact_and_close()
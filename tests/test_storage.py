@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+存储层单元测试
+测试 DatabaseManager 的数据存取
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from sqlalchemy import inspect, text
+
+import storage
+from config import get_config
+from storage import DatabaseManager, INDICATOR_COLUMN_TYPES, SCHEMA_VERSION
+
+
+def make_daily_df(days: int, start: date = date(2024, 1, 1), close: float = 100.0) -> pd.DataFrame:
+    """构造日线测试数据"""
+    return pd.DataFrame({
+        'date': [start + timedelta(days=i) for i in range(days)],
+        'open': close,
+        'high': close + 1,
+        'low': close - 1,
+        'close': close,
+        'volume': 1000000.0,
+        'amount': close * 1000000,
+        'pct_chg': 0.5,
+        'ma5': close - 1,
+        'ma10': close - 2,
+        'ma20': close - 3,
+        'volume_ratio': 1.0,
+        'macd': 0.1,
+        'macd_signal': 0.05,
+        'macd_hist': 0.05,
+        'rsi': 55.0,
+        'atr': 1.5,
+    })
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """使用临时数据库文件的 DatabaseManager"""
+    monkeypatch.setattr(get_config(), 'db_path', tmp_path / 'test.db')
+    monkeypatch.setattr(DatabaseManager, '_instance', None)
+    manager = DatabaseManager()
+    yield manager
+    manager.engine.dispose()
+
+
+class TestDatabaseManager:
+    """数据库连接配置测试"""
+
+    def test_sqlite_pragmas_applied(self, db):
+        """测试连接启用 WAL 模式"""
+        with db.get_session() as session:
+            assert session.execute(text("PRAGMA journal_mode")).scalar() == 'wal'
+            assert session.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+
+    def test_schema_version_recorded(self, db):
+        """测试迁移完成后记录 schema 版本"""
+        assert db._get_schema_version() == SCHEMA_VERSION
+
+    def test_migration_skipped_when_schema_current(self, db, monkeypatch):
+        """测试 schema 版本一致时跳过迁移检查"""
+        calls = []
+        monkeypatch.setattr(DatabaseManager, '_migrate_schema', lambda self: calls.append(1))
+        monkeypatch.setattr(DatabaseManager, '_instance', None)
+        db.engine.dispose()
+
+        DatabaseManager().engine.dispose()
+        assert calls == []
+
+    def test_migrate_legacy_table(self, db):
+        """测试旧表缺少指标列时一次性补齐字段并更新版本"""
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("DROP TABLE stock_daily")
+            conn.exec_driver_sql(
+                "CREATE TABLE stock_daily (id INTEGER PRIMARY KEY, code VARCHAR(10), "
+                "date DATE, close FLOAT, UNIQUE (code, date))"
+            )
+            conn.exec_driver_sql("PRAGMA user_version = 0")
+
+        assert db._migrate_schema()
+
+        columns = {col['name'] for col in inspect(db.engine).get_columns('stock_daily')}
+        indexes = {idx['name'] for idx in inspect(db.engine).get_indexes('stock_daily')}
+        assert set(INDICATOR_COLUMN_TYPES) <= columns
+        assert 'ix_code_date_desc' in indexes
+        assert db._get_schema_version() == SCHEMA_VERSION
+
+
+class TestSaveDailyData:
+    """日线数据保存测试"""
+
+    def test_save_new_rows(self, db):
+        """测试新增数据"""
+        assert db.save_daily_data(make_daily_df(30), '600519', 'Test') == 30
+        assert len(db.get_all_data('600519')) == 30
+
+    def test_save_empty_dataframe(self, db):
+        """测试空数据"""
+        assert db.save_daily_data(pd.DataFrame(), '600519', 'Test') == 0
+
+    def test_upsert_existing_rows(self, db):
+        """测试同一天数据重复保存时覆盖更新"""
+        db.save_daily_data(make_daily_df(30), '600519', 'First')
+        db.save_daily_data(make_daily_df(10, start=date(2024, 1, 21), close=120.0), '600519', 'Second')
+
+        rows = db.get_all_data('600519')
+        assert len(rows) == 30
+        assert rows[19].close == 100.0
+        assert rows[20].close == 120.0
+        assert rows[-1].data_source == 'Second'
+
+    def test_fallback_without_upsert(self, db, monkeypatch):
+        """测试不支持 UPSERT 时按已有主键拆分为批量新增/更新"""
+        monkeypatch.setattr(storage, 'SQLITE_SUPPORTS_UPSERT', False)
+        db.save_daily_data(make_daily_df(30), '600519', 'First')
+        first_id = db.get_latest_data('600519', days=1)[0].id
+
+        df = make_daily_df(10, start=date(2024, 1, 26), close=120.0)
+        assert db.save_daily_data(df, '600519', 'Second') == 10
+
+        rows = db.get_all_data('600519')
+        assert len(rows) == 35
+        assert rows[24].close == 100.0
+        assert rows[25].close == 120.0
+        assert rows[29].id == first_id
+        assert rows[29].data_source == 'Second'
+
+    def test_fallback_updates_timestamp_dates(self, db, monkeypatch):
+        """测试不支持 UPSERT 时，pd.Timestamp 日期（清洗后的格式）重复保存按已有记录更新"""
+        monkeypatch.setattr(storage, 'SQLITE_SUPPORTS_UPSERT', False)
+        df = make_daily_df(30)
+        df['date'] = pd.to_datetime(df['date'])
+        assert db.save_daily_data(df, '600519', 'First') == 30
+        first_id = db.get_latest_data('600519', days=1)[0].id
+
+        df = make_daily_df(10, start=date(2024, 1, 26), close=120.0)
+        df['date'] = pd.to_datetime(df['date'])
+        assert db.save_daily_data(df, '600519', 'Second') == 10
+
+        rows = db.get_all_data('600519')
+        assert len(rows) == 35
+        assert rows[24].close == 100.0
+        assert rows[25].close == 120.0
+        assert rows[29].id == first_id
+        assert rows[29].data_source == 'Second'
+
+    def test_missing_indicator_columns_saved_as_null(self, db):
+        """测试缺失的指标列以空值写入"""
+        df = make_daily_df(5).drop(columns=['atr'])
+        db.save_daily_data(df, '600519', 'Test')
+
+        assert db.get_latest_data('600519', days=1)[0].atr is None
+
+
+class TestQueries:
+    """数据查询测试"""
+
+    def test_has_today_data(self, db):
+        """测试指定日期数据存在性检查"""
+        db.save_daily_data(make_daily_df(5), '600519', 'Test')
+
+        assert db.has_today_data('600519', date(2024, 1, 5))
+        assert not db.has_today_data('600519', date(2024, 1, 6))
+        assert not db.has_today_data('000001', date(2024, 1, 5))
+
+
+class TestAnalysisContext:
+    """分析上下文测试"""
+
+    def test_insufficient_data(self, db):
+        """测试数据不足时返回 None"""
+        db.save_daily_data(make_daily_df(10), '600519', 'Test')
+        assert db.get_analysis_context('600519') is None
+
+    def test_context_latest_values(self, db):
+        """测试上下文包含最新数据"""
+        db.save_daily_data(make_daily_df(30), '600519', 'Test')
+        context = db.get_analysis_context('600519')
+
+        assert context['code'] == '600519'
+        assert context['date'] == str(date(2024, 1, 30))
+        assert context['today']['close'] == 100.0
+        assert context['ma_status'] == "多头排列 📈"
+
+    def test_fast_path_matches_raw_path(self, db):
+        """测试不取原始数据的快速路径与完整路径结果一致"""
+        df = make_daily_df(30)
+        df.loc[29, ['close', 'volume']] = [105.0, 2000000.0]
+        db.save_daily_data(df, '600519', 'Test')
+
+        fast = db.get_analysis_context('600519')
+        full = db.get_analysis_context('600519', with_raw=True)
+
+        assert 'raw_data' not in fast
+        assert fast == {k: v for k, v in full.items() if k != 'raw_data'}
+        assert fast['volume_change_ratio'] == 2.0
+
+    def test_fast_path_matches_raw_path_with_nulls(self, db):
+        """测试含 NULL 列时两条路径的缺失值表示一致（均为 None）"""
+        df = make_daily_df(30)
+        df['rsi'] = np.nan
+        df.loc[29, 'pct_chg'] = np.nan
+        df.loc[28, 'volume'] = np.nan
+        db.save_daily_data(df, '600519', 'Test')
+
+        fast = db.get_analysis_context('600519')
+        full = db.get_analysis_context('600519', with_raw=True)
+
+        assert fast == {k: v for k, v in full.items() if k != 'raw_data'}
+        assert full['indicators']['rsi'] is None
+        assert full['today']['pct_chg'] is None
+        assert full['price_change_ratio'] == 0
+        assert full['volume_change_ratio'] == 1.0
+
+    def test_fast_path_insufficient_data(self, db):
+        """测试快速路径同样要求至少20天数据"""
+        db.save_daily_data(make_daily_df(19), '600519', 'Test')
+        assert db.get_analysis_context('600519') is None
+
+        db.save_daily_data(make_daily_df(20), '600519', 'Test')
+        assert db.get_analysis_context('600519') is not None
+
+    def test_context_uses_most_recent_days(self, db):
+        """测试上下文取最近 N 天数据（按日期升序）"""
+        db.save_daily_data(make_daily_df(30), '600519', 'Test')
+        context = db.get_analysis_context('600519', days=20, with_raw=True)
+
+        raw = context['raw_data']
+        assert len(raw) == 20
+        assert raw['date'].iloc[0] == date(2024, 1, 11)
+        assert raw['date'].iloc[-1] == date(2024, 1, 30)
+
+
+class TestMaStatus:
+    """均线形态判断测试"""
+
+    def test_vectorized_matches_scalar(self):
+        """测试向量化版本与逐行判断结果一致"""
+        rng = np.random.default_rng(42)
+        df = pd.DataFrame(
+            rng.integers(-1, 4, size=(500, 4)).astype(float),
+            columns=['close', 'ma5', 'ma10', 'ma20'],
+        )
+        df.iloc[::50, 3] = np.nan
+
+        df.iloc[7::50, 0] = np.nan
+
+        expected = [DatabaseManager._analyze_ma_status(None, row) for _, row in df.iterrows()]
+        assert list(DatabaseManager._analyze_ma_status_vec(df)) == expected
+
+    def test_missing_close_counts_as_zero(self):
+        """测试收盘价缺失（NaN 或 None）时两个版本都按 0 判断"""
+        df = pd.DataFrame({'close': [np.nan], 'ma5': [10.0], 'ma10': [20.0], 'ma20': [30.0]})
+        row = df.iloc[0]
+
+        assert DatabaseManager._analyze_ma_status(None, row) == "空头排列 📉"
+        assert DatabaseManager._analyze_ma_status(None, {**row, 'close': None}) == "空头排列 📉"
+        assert DatabaseManager._analyze_ma_status_vec(df)[0] == "空头排列 📉"
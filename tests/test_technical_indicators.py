@@ -4,8 +4,18 @@
 测试 TechnicalIndicatorInterpreter 的指标解读功能
 """
 
+import dataclasses
+
+import numpy as np
 import pytest
-from technical_indicators import TechnicalIndicatorInterpreter, IndicatorSignal
+from enums import SignalDirection
+from technical_indicators import (
+    BollingerResult,
+    IndicatorSignal,
+    TechnicalIndicatorInterpreter,
+    get_interpret_cache_info,
+    interpret_all_indicators,
+)
 
 
 class TestTechnicalIndicatorInterpreter:
@@ -49,47 +59,24 @@ class TestTechnicalIndicatorInterpreter:
         assert '金叉' in signal.status
         assert signal.level == '极强'
 
-    def test_rsi_overbought(self):
-        """测试 RSI 超买信号"""
-        signal = TechnicalIndicatorInterpreter.interpret_rsi(rsi_value=85)
-
-        # RSI >= 80 返回 '警惕回调'
-        assert signal.signal == '警惕回调'
-        assert '超买' in signal.status
-        assert signal.emoji == '🔴'
-        assert signal.level == '极强'
-
-    def test_rsi_severe_overbought(self):
-        """测试 RSI 严重超买"""
-        signal = TechnicalIndicatorInterpreter.interpret_rsi(rsi_value=90)
-
-        # RSI >= 80 返回 '警惕回调'
-        assert signal.signal == '警惕回调'
-        assert signal.level == '极强'
-
-    def test_rsi_oversold(self):
-        """测试 RSI 超卖信号"""
-        signal = TechnicalIndicatorInterpreter.interpret_rsi(rsi_value=20)
-
-        # RSI <= 20 返回 '可能反转'
-        assert signal.signal == '可能反转'
-        assert '超卖' in signal.status
-
-    def test_rsi_severe_oversold(self):
-        """测试 RSI 严重超卖"""
-        signal = TechnicalIndicatorInterpreter.interpret_rsi(rsi_value=15)
-
-        # RSI <= 20 返回 '可能反转'
-        assert signal.signal == '可能反转'
-        assert signal.level == '极弱'
-
-    def test_rsi_normal_range(self):
-        """测试 RSI 正常范围"""
-        signal = TechnicalIndicatorInterpreter.interpret_rsi(rsi_value=50)
-
-        # RSI 40-60 返回 '震荡观望'
-        assert signal.signal == '震荡观望'
-        assert '中性' in signal.status
+    @pytest.mark.parametrize("rsi_value,expected_signal,status_keyword,level", [
+        (85, '警惕回调', '超买', '极强'),   # RSI >= 80
+        (90, '警惕回调', '严重超买', '极强'),
+        (20, '可能反转', '超卖', '极弱'),   # RSI <= 20
+        (15, '可能反转', '严重超卖', '极弱'),
+        (50, '震荡观望', '中性', '中性'),   # RSI 40-60
+    ])
+    def test_rsi_signals(self, rsi_value, expected_signal, status_keyword, level):
+        """测试 RSI 超买 / 超卖 / 中性区间信号"""
+        signal = TechnicalIndicatorInterpreter.interpret_rsi(rsi_value=rsi_value)
+
+        assert signal.signal == expected_signal
+        assert status_keyword in signal.status
+        assert signal.level == level
+
+    def test_rsi_overbought_emoji(self):
+        """测试 RSI 超买信号表情"""
+        assert TechnicalIndicatorInterpreter.interpret_rsi(rsi_value=85).emoji == '🔴'
 
     def test_atr_low_volatility(self):
         """测试 ATR 低波动率"""
@@ -124,45 +111,276 @@ class TestTechnicalIndicatorInterpreter:
         assert signal.signal == '剧烈震荡'
         assert signal.level == '极高风险'
 
-    def test_bollinger_bands_squeeze(self):
-        """测试布林带收窄信号"""
+    @pytest.mark.parametrize("price,expected_signal,expected_location", [
+        (100, '中性', '中轨区域'),       # 价格位于中轨
+        (107, '卖出信号', '上轨上方'),   # 价格 107 > 上轨 105，位置 > 90%
+        (93, '买入信号', '下轨下方'),    # 价格 93 < 下轨 95，位置 < 10%
+    ])
+    def test_bollinger_bands(self, price, expected_signal, expected_location):
+        """测试布林带中轨 / 上轨突破 / 下轨突破信号"""
         result = TechnicalIndicatorInterpreter.interpret_bollinger_bands(
-            price=100,
+            price=price,
             upper=105,
             middle=100,
             lower=95
         )
 
-        # 返回字典格式，不是 IndicatorSignal
-        assert 'signal' in result
-        assert 'location' in result
-        assert result['signal'] == '中性'
+        # 返回 BollingerResult，不是 IndicatorSignal
+        assert isinstance(result, BollingerResult)
+        assert result.signal == expected_signal
+        assert result.location == expected_location
 
-    def test_bollinger_bands_breakout_upper(self):
-        """测试布林带上轨突破"""
-        result = TechnicalIndicatorInterpreter.interpret_bollinger_bands(
-            price=107,
-            upper=105,
-            middle=100,
-            lower=95
+
+class TestIndicatorSignal:
+    """信号对象测试"""
+
+    def test_signal_is_immutable(self):
+        """测试信号不可修改（模板在多次解读间共享）"""
+        signal = TechnicalIndicatorInterpreter.interpret_rsi(50)
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            signal.signal = '买入'
+        assert not hasattr(signal, '__dict__')
+
+    def test_signals_share_template_strings(self):
+        """测试同一区间的信号复用模板字符串"""
+        first = TechnicalIndicatorInterpreter.interpret_atr(2.0, price=100.0)
+        second = TechnicalIndicatorInterpreter.interpret_atr(2.5, price=100.0)
+
+        assert first.advice is second.advice
+        assert (first.value, second.value) == (2.0, 2.5)
+
+    @pytest.mark.parametrize("bar,expected", [
+        (0.3, SignalDirection.BUY),
+        (-0.3, SignalDirection.SELL),
+        (0.0, SignalDirection.NEUTRAL),
+    ])
+    def test_macd_signal_code(self, bar, expected):
+        """测试 MACD 信号方向编码"""
+        signal = TechnicalIndicatorInterpreter.interpret_macd(dif=0.1, dea=0.2, bar=bar)
+        assert signal.signal_code == expected
+
+    def test_rsi_atr_signals_neutral(self):
+        """测试 RSI / ATR 信号不计入买卖方向"""
+        assert TechnicalIndicatorInterpreter.interpret_rsi(10).signal_code == SignalDirection.NEUTRAL
+        assert TechnicalIndicatorInterpreter.interpret_atr(8.0, price=100.0).signal_code == SignalDirection.NEUTRAL
+
+    def test_repeated_inputs_cached(self):
+        """测试相同输入复用缓存结果，不同类型的数值分别缓存"""
+        first = TechnicalIndicatorInterpreter.interpret_rsi(63.21)
+
+        assert TechnicalIndicatorInterpreter.interpret_rsi(63.21) is first
+        assert TechnicalIndicatorInterpreter.interpret_rsi(63.21, period=6) is not first
+        assert get_interpret_cache_info()['rsi']['hits'] >= 1
+        assert type(TechnicalIndicatorInterpreter.interpret_rsi(50).value) is int
+
+
+class TestIndicatorsSummary:
+    """综合解读测试"""
+
+    def test_macd_sell_signal(self):
+        """测试卖出信号占多数时给出卖出建议"""
+        summary = TechnicalIndicatorInterpreter().generate_indicators_summary(
+            macd_data={'dif': -0.5, 'dea': -0.2, 'bar': -0.3}
         )
 
-        # 价格 107 > 上轨 105，位置 > 90%
-        assert result['signal'] == '卖出信号'
-        assert result['location'] == '上轨上方'
+        assert summary['recommendation']['action'] == '卖出'
+        assert summary['recommendation']['reason'] == '多个技术指标显示卖出信号（1/1）'
+        assert summary['risk_level'] == '高风险 🔴'
 
-    def test_bollinger_bands_breakout_lower(self):
-        """测试布林带下轨突破"""
-        result = TechnicalIndicatorInterpreter.interpret_bollinger_bands(
-            price=93,
-            upper=105,
-            middle=100,
-            lower=95
+    def test_mixed_signals(self):
+        """测试信号不一致时观望，高风险强度仍计入风险等级"""
+        summary = TechnicalIndicatorInterpreter().generate_indicators_summary(
+            macd_data={'dif': -0.5, 'dea': -0.2, 'bar': -0.3},
+            rsi_value=85,
+            atr_value=6.0,
+            price=100.0
+        )
+
+        assert len(summary['signals']) == 3
+        assert summary['recommendation']['action'] == '观望'
+        assert summary['risk_level'] == '高风险 🔴'
+
+    def test_incomplete_macd_data_skipped(self):
+        """测试 MACD 字段不全时跳过 MACD 解读"""
+        summary = TechnicalIndicatorInterpreter.generate_indicators_summary(
+            macd_data={'dif': -0.5, 'dea': -0.2},
+            rsi_value=50
         )
 
-        # 价格 93 < 下轨 95，位置 < 10%
-        assert result['signal'] == '买入信号'
-        assert result['location'] == '下轨下方'
+        assert [s.name for s in summary['signals']] == ['RSI']
+
+    def test_summary_without_instance(self):
+        """测试无需创建实例即可生成综合解读"""
+        summary = TechnicalIndicatorInterpreter.generate_indicators_summary(rsi_value=50)
+
+        assert summary == interpret_all_indicators(rsi_value=50)
+        assert summary['summary'] == '⚪ RSI: 中性区域 (中性) - 震荡观望'
+
+    def test_empty_inputs(self):
+        """测试无指标数据"""
+        summary = TechnicalIndicatorInterpreter().generate_indicators_summary()
+
+        assert summary['signals'] == ()
+        assert summary['risk_level'] == '未知'
+        assert summary['recommendation']['action'] == '观望'
+        assert summary is TechnicalIndicatorInterpreter.generate_indicators_summary()
+        with pytest.raises(TypeError):
+            summary['risk_level'] = '高风险 🔴'
+
+
+class TestThresholdBoundaries:
+    """查表解读的区间边界测试"""
+
+    @pytest.mark.parametrize("rsi_value,status", [
+        (20, '严重超卖'),
+        (20.01, '超卖'),
+        (30, '超卖'),
+        (35, '弱势区域'),
+        (40, '中性区域'),
+        (60, '中性区域'),
+        (60.01, '强势区域'),
+        (70, '超买'),
+        (80, '严重超买'),
+        (float('nan'), '弱势区域'),
+    ])
+    def test_rsi_boundaries(self, rsi_value, status):
+        """测试 RSI 边界值归属"""
+        assert TechnicalIndicatorInterpreter.interpret_rsi(rsi_value).status == status
+
+    @pytest.mark.parametrize("atr_value,status", [
+        (0.49, '极低波动'),
+        (0.5, '低波动'),
+        (1.5, '中等波动'),
+        (3.0, '高波动'),
+        (5.0, '极端波动'),
+    ])
+    def test_atr_boundaries(self, atr_value, status):
+        """测试 ATR 占比边界值归属"""
+        assert TechnicalIndicatorInterpreter.interpret_atr(atr_value, price=100.0).status == status
+
+    @pytest.mark.parametrize("price,location", [
+        (96.0, '下轨下方'),
+        (96.5, '下轨附近'),
+        (97.5, '下轨附近'),
+        (100.0, '中轨区域'),
+        (102.5, '上轨附近'),
+        (104.0, '上轨上方'),
+    ])
+    def test_bollinger_boundaries(self, price, location):
+        """测试布林带价格位置边界值归属（上下轨 105/95）"""
+        result = TechnicalIndicatorInterpreter.interpret_bollinger_bands(price, 105, 100, 95)
+        assert result.location == location
+
+    @pytest.mark.parametrize("dif,dea,bar,status,level", [
+        (0.5, 0.2, 0.01, '震荡', '中偏强'),
+        (0.2, 0.5, -0.01, '震荡', '中偏弱'),
+        (0.3, 0.3, 0.0, '震荡', '中性'),
+        (-0.5, 0.2, 0.011, '金叉', '中'),
+        (0.5, -0.2, -0.011, '死叉', '中'),
+        (-0.5, -0.2, -0.011, '死叉', '极弱'),
+    ])
+    def test_macd_boundaries(self, dif, dea, bar, status, level):
+        """测试 MACD 柱状图阈值与 DIF/DEA 组合"""
+        signal = TechnicalIndicatorInterpreter.interpret_macd(dif=dif, dea=dea, bar=bar)
+        assert (signal.status, signal.level) == (status, level)
+
+    @pytest.mark.parametrize("high_risk_count,total,risk_level", [
+        (0, 0, '未知'),
+        (0, 3, '低风险 🟢'),
+        (2, 7, '低风险 🟢'),
+        (3, 10, '中风险 🟠'),
+        (1, 2, '中风险 🟠'),
+        (3, 5, '高风险 🔴'),
+        (3, 3, '高风险 🔴'),
+    ])
+    def test_risk_level_boundaries(self, high_risk_count, total, risk_level):
+        """测试高风险信号占比 30% / 60% 的风险等级边界"""
+        assert TechnicalIndicatorInterpreter._calculate_risk_level(high_risk_count, total) == risk_level
+
+
+class TestBatchInterpretation:
+    """批量解读测试"""
+
+    def test_rsi_batch_matches_single(self):
+        """测试批量解读与逐个解读结果一致"""
+        values = [float('nan'), 0.0, 20.0, 25.0, 30.0, 35.0, 40.0, 60.0, 65.0, 70.0, 80.0, 95.0]
+
+        batch = TechnicalIndicatorInterpreter.interpret_rsi_batch(values)
+
+        assert [s.status for s in batch] == [
+            TechnicalIndicatorInterpreter.interpret_rsi(v).status for v in values
+        ]
+        # NaN != NaN，逐字段比较时跳过首个元素
+        assert batch[1:] == [TechnicalIndicatorInterpreter.interpret_rsi(v) for v in values[1:]]
+
+    def test_rsi_batch_empty(self):
+        """测试空输入"""
+        assert TechnicalIndicatorInterpreter.interpret_rsi_batch([]) == []
+
+    def test_atr_batch_matches_single(self):
+        """测试 ATR 批量解读与逐个解读结果一致"""
+        atr_values = [0.3, 0.5, 1.49, 1.5, 2.0, 3.0, 4.99, 5.0, 8.0, 2.0]
+        prices = [100.0] * 9 + [0.0]
+
+        batch = TechnicalIndicatorInterpreter.interpret_atr_batch(atr_values, prices)
+
+        assert batch == [
+            TechnicalIndicatorInterpreter.interpret_atr(a, p) for a, p in zip(atr_values, prices)
+        ]
+
+    def test_atr_batch_length_mismatch(self):
+        """测试 ATR 与价格数组长度不一致时报错"""
+        with pytest.raises(ValueError):
+            TechnicalIndicatorInterpreter.interpret_atr_batch([1.0, 2.0], [100.0])
+
+    def test_summary_batch_matches_single(self):
+        """测试批量综合解读与逐行调用结果一致"""
+        rng = np.random.default_rng(7)
+        n = 200
+        dif, dea = rng.normal(0, 1, n), rng.normal(0, 1, n)
+        bar = rng.normal(0, 0.02, n)
+        bar[:4] = [0.01, -0.01, 0.0, np.nan]
+        rsi = rng.uniform(0, 100, n)
+        atr, price = rng.uniform(0, 8, n), rng.uniform(-5, 200, n)
+
+        interpreter = TechnicalIndicatorInterpreter()
+        batch = interpreter.generate_indicators_summary_batch(dif, dea, bar, rsi, atr, price)
+
+        expected = [
+            interpreter.generate_indicators_summary(
+                macd_data={'dif': dif[i], 'dea': dea[i], 'bar': bar[i]},
+                rsi_value=rsi[i],
+                atr_value=atr[i],
+                price=price[i]
+            )
+            for i in range(n)
+        ]
+        assert [r['summary'] for r in batch] == [r['summary'] for r in expected]
+        assert [r['recommendation'] for r in batch] == [r['recommendation'] for r in expected]
+        assert [[s.reason for s in r['signals']] for r in batch] == \
+            [[s.reason for s in r['signals']] for r in expected]
+
+    def test_summary_batch_partial_inputs(self):
+        """测试只提供部分指标"""
+        batch = TechnicalIndicatorInterpreter().generate_indicators_summary_batch(rsi=[50, 90])
+
+        assert [len(r['signals']) for r in batch] == [1, 1]
+        assert batch[1]['risk_level'] == '高风险 🔴'
+
+    def test_summary_batch_length_mismatch(self):
+        """测试数组长度不一致时报错"""
+        with pytest.raises(ValueError):
+            TechnicalIndicatorInterpreter().generate_indicators_summary_batch(rsi=[50], atr=[1, 2], price=[10, 10])
+
+    def test_summary_batch_bad_prices_warned_once(self, caplog):
+        """测试批量解读时异常价格只汇总告警一次"""
+        with caplog.at_level('WARNING', logger='technical_indicators'):
+            TechnicalIndicatorInterpreter.generate_indicators_summary_batch(
+                atr=[1.0, 1.0, 1.0], price=[0.0, -1.0, 10.0]
+            )
+
+        assert [r.getMessage() for r in caplog.records] == ['[ATR解读] 2 个价格异常，无法计算占比']
 
 
 if __name__ == '__main__':
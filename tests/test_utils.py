@@ -4,20 +4,53 @@
 测试缓存管理、熔断器、重试机制等
 """
 
+import asyncio
+
 import pytest
-import time
-from utils.cache_manager import CacheManager
+import threading
+from utils import cache_manager, circuit_breaker, retry_helper
+from utils.cache_manager import CacheManager, cache_result
 from utils.circuit_breaker import CircuitBreaker, CircuitBreakerOpenError
 from utils.retry_helper import RetryHelper, retry_with_backoff
 
 
+class FakeClock:
+    """可手动推进的时钟，替代 time.time，测试中无需真实等待"""
+
+    def __init__(self, start: float = 1_700_000_000.0):
+        self.now = start
+
+    def time(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    """假时钟：注入熔断器 / 重试助手，推进时间无需真实等待"""
+    return FakeClock()
+
+
+@pytest.fixture(scope="module")
+def shared_cache(tmp_path_factory):
+    """模块内共享的缓存实例（缓存目录指向临时目录）"""
+    return CacheManager(cache_dir=str(tmp_path_factory.mktemp('cache')), default_ttl=60)
+
+
+@pytest.fixture
+def cache(shared_cache):
+    """每个测试复用共享缓存，结束后清空"""
+    yield shared_cache
+    shared_cache.clear()
+
+
 class TestCacheManager:
     """缓存管理器测试"""
 
-    def test_cache_set_and_get(self):
+    def test_cache_set_and_get(self, cache):
         """测试缓存设置和获取"""
-        cache = CacheManager(default_ttl=60)
-
         # 设置缓存
         cache.set('test_key', {'data': 'test_value'})
 
@@ -26,35 +59,66 @@ class TestCacheManager:
         assert value is not None
         assert value['data'] == 'test_value'
 
-    def test_cache_expiration(self):
+    def test_cache_expiration(self, tmp_path, monkeypatch, clock):
         """测试缓存过期"""
-        cache = CacheManager(default_ttl=1)  # 1秒过期
+        monkeypatch.setattr(cache_manager, '_now', clock.time)
+        cache = CacheManager(cache_dir=str(tmp_path), default_ttl=1)  # 1秒过期
 
         cache.set('temp_key', 'temp_value')
 
         # 立即获取应该成功
         assert cache.get('temp_key') == 'temp_value'
 
-        # 等待过期
-        time.sleep(1.5)
+        # 推进时钟到过期之后
+        clock.advance(1.5)
 
         # 过期后应该返回 None
         assert cache.get('temp_key') is None
 
-    def test_cache_delete(self):
-        """测试缓存删除"""
-        cache = CacheManager()
+    def test_cache_uses_ttl_from_set(self, tmp_path, monkeypatch, clock):
+        """测试过期时间以 set 时的 TTL 为准，不受默认 TTL 影响"""
+        monkeypatch.setattr(cache_manager, '_now', clock.time)
+        cache = CacheManager(cache_dir=str(tmp_path), default_ttl=1)
+
+        cache.set('long_key', 'value', ttl=10)
+        clock.advance(5)
+
+        assert cache.get('long_key') == 'value'
+
+        clock.advance(6)
+        assert cache.get('long_key') is None
+
+    def test_get_rejects_ttl(self, tmp_path):
+        """测试 get 不再接受 ttl 参数（传入时报错，而不是被静默忽略）"""
+        cache = CacheManager(cache_dir=str(tmp_path))
+
+        with pytest.raises(TypeError):
+            cache.get('key', ttl=60)
 
+    def test_cleanup_expired(self, tmp_path, monkeypatch, clock):
+        """测试清理过期及无法识别的缓存文件，保留未过期的缓存"""
+        monkeypatch.setattr(cache_manager, '_now', clock.time)
+        cache = CacheManager(cache_dir=str(tmp_path))
+        cache.set('short_key', 'value', ttl=1)
+        cache.set('long_key', 'value', ttl=60)
+        (tmp_path / 'broken.cache').write_bytes(b'xx')
+
+        clock.advance(5)
+        cache.cleanup_expired()
+
+        assert len(list(tmp_path.glob('**/*.cache'))) == 1
+        assert CacheManager(cache_dir=str(tmp_path)).get('long_key') == 'value'
+
+    def test_cache_delete(self, cache):
+        """测试缓存删除"""
         cache.set('delete_key', 'value')
         assert cache.get('delete_key') == 'value'
 
         cache.delete('delete_key')
         assert cache.get('delete_key') is None
 
-    def test_cache_clear(self):
+    def test_cache_clear(self, cache):
         """测试清空缓存"""
-        cache = CacheManager()
-
         cache.set('key1', 'value1')
         cache.set('key2', 'value2')
 
@@ -63,10 +127,109 @@ class TestCacheManager:
         assert cache.get('key1') is None
         assert cache.get('key2') is None
 
-    def test_cache_stats(self):
-        """测试缓存统计"""
-        cache = CacheManager()
+    @pytest.mark.parametrize("value", [
+        {'code': '600519', 'prices': [1688.5, 1690.0], 'volume': 12000, 'st': False, 'note': None},
+        {'range': (1, 2)},
+        {1: 'non-str key'},
+        [float('nan')],
+        2 ** 70,
+    ])
+    def test_file_cache_roundtrip(self, tmp_path, value):
+        """测试文件缓存读回的值与写入时完全一致（JSON 与 pickle 两种格式）"""
+        CacheManager(cache_dir=str(tmp_path)).set('key', value)
+
+        loaded = CacheManager(cache_dir=str(tmp_path)).get('key')
+
+        assert repr(loaded) == repr(value)
+
+    @pytest.mark.parametrize("value", [
+        {'closes': [float(i) for i in range(20000)]},
+        {'blob': b'x' * 200_000},
+    ])
+    def test_large_file_cache_roundtrip(self, tmp_path, value):
+        """测试超过 mmap 阈值的大文件缓存可正确读回"""
+        CacheManager(cache_dir=str(tmp_path)).set('big_key', value)
+
+        cache = CacheManager(cache_dir=str(tmp_path))
+        assert cache._get_cache_file('big_key').stat().st_size > cache_manager._MMAP_THRESHOLD
+        assert cache.get('big_key') == value
+
+    def test_files_sharded_by_hash_prefix(self, tmp_path):
+        """测试缓存文件按哈希前两位存放在子目录中"""
+        cache = CacheManager(cache_dir=str(tmp_path))
+        cache.set('shard_key', 'value')
+
+        cache_file = cache._get_cache_file('shard_key')
+
+        assert cache_file.exists()
+        assert cache_file.parent.name == cache_file.name[:2]
+
+    def test_cache_lru_eviction(self, tmp_path):
+        """测试内存缓存超出条目上限时淘汰最久未使用的条目"""
+        cache = CacheManager(cache_dir=str(tmp_path), max_memory_items=2)
 
+        cache.set('key1', 'value1')
+        cache.set('key2', 'value2')
+        cache.get('key1')  # key1 变为最近使用
+        cache.set('key3', 'value3')
+
+        assert list(cache._memory_cache) == ['key1', 'key3']
+        # 被淘汰的条目仍可从文件缓存读回
+        assert cache.get('key2') == 'value2'
+        assert list(cache._memory_cache) == ['key3', 'key2']
+
+    def test_concurrent_access(self, tmp_path):
+        """测试多线程并发读写时内存缓存与统计保持一致"""
+        cache = CacheManager(cache_dir=str(tmp_path), max_memory_items=8)
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(200):
+                    key = f'key{(n + i) % 16}'
+                    cache.set(key, i)
+                    cache.get(key)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        stats = cache.get_stats()
+        assert errors == []
+        assert stats['hits'] + stats['misses'] == 800
+        assert stats['memory_cache_size'] <= 8
+
+    def test_async_writes(self, tmp_path):
+        """测试异步写入：set 后内存立即可读，flush 后文件缓存落盘"""
+        cache = CacheManager(cache_dir=str(tmp_path), async_writes=True)
+
+        cache.set('async_key', 'async_value')
+        assert cache.get('async_key') == 'async_value'
+
+        cache.flush()
+        reloaded = CacheManager(cache_dir=str(tmp_path))
+        assert reloaded.get('async_key') == 'async_value'
+
+    def test_size_limit_evicts_files(self, tmp_path):
+        """测试文件缓存超出大小上限时清理旧文件，计数与磁盘一致"""
+        cache = CacheManager(cache_dir=str(tmp_path), max_cache_size=4096)
+
+        for i in range(10):
+            cache.set(f'key{i}', b'x' * 1024)
+
+        on_disk = sum(f.stat().st_size for f in tmp_path.glob('**/*.cache'))
+        assert on_disk <= 4096
+        assert cache._total_bytes == on_disk
+
+        cache.delete('key9')
+        assert cache._total_bytes == sum(f.stat().st_size for f in tmp_path.glob('**/*.cache'))
+
+    def test_cache_stats(self, cache):
+        """测试缓存统计"""
         cache.set('key1', 'value1')
         cache.get('key1')  # 命中
         cache.get('non_existent')  # 未命中
@@ -78,6 +241,70 @@ class TestCacheManager:
         assert stats['misses'] >= 1
 
 
+class TestCacheResult:
+    """缓存装饰器测试"""
+
+    @pytest.fixture(autouse=True)
+    def isolated_cache(self, tmp_path, monkeypatch):
+        """装饰器使用的全局缓存实例指向临时目录"""
+        manager = CacheManager(cache_dir=str(tmp_path))
+        monkeypatch.setattr(cache_manager, '_cache_manager', manager)
+        return manager
+
+    def test_cached_by_arguments(self):
+        """测试相同参数命中缓存，不同参数（含类型不同）分别计算"""
+        calls = []
+
+        @cache_result(ttl=60)
+        def fetch(code, days=30):
+            calls.append((code, days))
+            return f"{code}-{days}"
+
+        assert fetch('600519') == '600519-30'
+        assert fetch('600519') == '600519-30'
+        assert fetch('600519', days=60) == '600519-60'
+        assert fetch(600519) == '600519-30'
+
+        assert calls == [('600519', 30), ('600519', 60), (600519, 30)]
+
+    def test_memory_hit_counted(self, isolated_cache):
+        """测试内存缓存快速路径计入命中统计，并保留函数元信息"""
+        @cache_result(ttl=60)
+        def fetch(code):
+            """获取行情"""
+            return code
+
+        fetch('000001')
+        fetch('000001')
+
+        assert isolated_cache.get_stats()['hits'] == 1
+        assert fetch.__name__ == 'fetch'
+        assert fetch.__doc__ == '获取行情'
+
+    def test_single_argument_key(self, isolated_cache):
+        """测试单个字符串参数直接以 repr 作缓存键"""
+        @cache_result(ttl=60)
+        def fetch(code):
+            return code
+
+        fetch('600519')
+
+        assert list(isolated_cache._memory_cache) == [f"{fetch.__qualname__}('600519')"]
+
+    def test_unhashable_arguments(self):
+        """测试不可哈希参数仍可缓存"""
+        calls = []
+
+        @cache_result(ttl=60)
+        def total(values):
+            calls.append(values)
+            return sum(values)
+
+        assert total([1, 2, 3]) == 6
+        assert total([1, 2, 3]) == 6
+        assert len(calls) == 1
+
+
 class TestCircuitBreaker:
     """熔断器测试"""
 
@@ -135,12 +362,32 @@ class TestCircuitBreaker:
         with pytest.raises(CircuitBreakerOpenError):
             breaker.call(failing_function)
 
-    def test_circuit_breaker_half_open_after_timeout(self):
+    def test_try_call_returns_sentinel_when_open(self):
+        """测试熔断器开启时 try_call 返回哨兵值而不抛异常"""
+        breaker = CircuitBreaker(failure_threshold=1, timeout=5, name="测试熔断器")
+
+        def failing_function():
+            raise ValueError("Test failure")
+
+        assert breaker.try_call(lambda: "success") == (True, "success")
+
+        # 函数本身的异常照常抛出
+        with pytest.raises(ValueError):
+            breaker.try_call(failing_function)
+
+        calls = []
+        ok, result = breaker.try_call(calls.append, 1)
+        assert not ok
+        assert result is circuit_breaker._CIRCUIT_OPEN
+        assert calls == []
+
+    def test_circuit_breaker_half_open_after_timeout(self, clock):
         """测试超时后半开状态"""
         breaker = CircuitBreaker(
             failure_threshold=2,
             timeout=1,  # 1秒恢复
-            name="测试熔断器"
+            name="测试熔断器",
+            time_fn=clock.time
         )
 
         def failing_function():
@@ -158,18 +405,62 @@ class TestCircuitBreaker:
 
         assert breaker.get_state().value == 'OPEN'
 
-        # 等待恢复超时
-        time.sleep(1.5)
-
-        # 下一次调用应该尝试恢复（HALF_OPEN）
-        try:
-            result = breaker.call(success_function)
-            # 成功后应该恢复到 CLOSED（需要多次成功）
-            # 第一次成功后进入 HALF_OPEN
-            assert breaker.get_state().value in ['HALF_OPEN', 'CLOSED']
-        except CircuitBreakerOpenError:
-            # 可能仍然打开
-            pass
+        # 未到恢复时间，仍拒绝请求
+        clock.advance(0.5)
+        with pytest.raises(CircuitBreakerOpenError):
+            breaker.call(success_function)
+
+        # 推进时钟到恢复超时之后
+        clock.advance(1.0)
+
+        # 下一次调用应该尝试恢复：第一次成功后进入 HALF_OPEN（需要多次成功才关闭）
+        assert breaker.call(success_function) == "success"
+        assert breaker.get_state().value == 'HALF_OPEN'
+
+    def test_window_counts_recent_failures_only(self, clock):
+        """测试滑动窗口模式下只统计窗口内的失败"""
+        breaker = CircuitBreaker(
+            failure_threshold=3,
+            timeout=5,
+            name="测试熔断器",
+            time_fn=clock.time,
+            window=10
+        )
+
+        def failing_function():
+            raise ValueError("Test failure")
+
+        for _ in range(3):
+            clock.advance(6)
+            with pytest.raises(ValueError):
+                breaker.call(failing_function)
+
+        # 第一次失败已滑出窗口
+        assert breaker.get_state().value == 'CLOSED'
+
+        with pytest.raises(ValueError):
+            breaker.call(failing_function)
+        assert breaker.get_state().value == 'OPEN'
+
+    def test_concurrent_failures_counted(self):
+        """测试多线程并发失败时计数不丢失"""
+        breaker = CircuitBreaker(failure_threshold=10_000, timeout=5, name="测试熔断器")
+
+        def failing_function():
+            raise ValueError("Test failure")
+
+        def worker():
+            for _ in range(500):
+                with pytest.raises(ValueError):
+                    breaker.call(failing_function)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert breaker.get_stats()['failure_count'] == 2000
 
     def test_circuit_breaker_success_reset(self):
         """测试成功后重置计数器"""
@@ -202,15 +493,80 @@ class TestCircuitBreaker:
         stats = breaker.get_stats()
         assert stats['failure_count'] < 2
 
+    def test_call_async(self, clock):
+        """测试异步调用：按协程结果计入失败，熔断后拒绝请求"""
+        breaker = CircuitBreaker(failure_threshold=2, timeout=30, time_fn=clock.time)
+
+        async def failing_coroutine():
+            raise ConnectionError("Fail")
+
+        async def run():
+            for _ in range(2):
+                with pytest.raises(ConnectionError):
+                    await breaker.call_async(failing_coroutine)
+            with pytest.raises(CircuitBreakerOpenError):
+                await breaker.call_async(failing_coroutine)
+
+            clock.advance(30)
+            return await breaker.call_async(asyncio.sleep, 0, "ok")
+
+        assert asyncio.run(run()) == "ok"
+        assert breaker.get_state().value == "HALF_OPEN"
+
+    def test_decorator_rejects_when_open(self):
+        """测试装饰器在熔断后直接拒绝，不再调用被装饰函数"""
+        calls = []
+
+        @circuit_breaker.circuit_breaker(failure_threshold=2, timeout=60)
+        def unstable(value):
+            calls.append(value)
+            raise ConnectionError("Fail")
+
+        for i in range(2):
+            with pytest.raises(ConnectionError):
+                unstable(i)
+        with pytest.raises(CircuitBreakerOpenError):
+            unstable(2)
+
+        assert calls == [0, 1]
+        assert unstable.__name__ == 'unstable'
+
+    def test_counters_saturate(self):
+        """测试累计计数达到上限后不再增长"""
+        breaker = CircuitBreaker(failure_threshold=5, window=60)
+        breaker.success_count = breaker.failure_count = circuit_breaker._COUNTER_MAX
+
+        def failing_function():
+            raise ValueError("失败")
+
+        breaker.call(lambda: "ok")
+        with pytest.raises(ValueError):
+            breaker.call(failing_function)
+
+        assert breaker.success_count == circuit_breaker._COUNTER_MAX
+        assert breaker.failure_count == circuit_breaker._COUNTER_MAX
+
+    def test_stats_snapshot(self):
+        """测试统计快照按属性访问，且与字典形式一致"""
+        breaker = CircuitBreaker(failure_threshold=5, name="快照")
+        breaker.call(lambda: "ok")
+
+        snapshot = breaker.get_stats_snapshot()
+
+        assert snapshot.name == "快照"
+        assert snapshot.state == "CLOSED"
+        assert snapshot.success_count == 1
+        assert breaker.get_stats() == snapshot._asdict()
+
 
 class TestRetryHelper:
     """重试助手测试"""
 
-    def test_retry_on_failure(self):
+    def test_retry_on_failure(self, clock):
         """测试失败重试"""
         attempts = []
 
-        @retry_with_backoff(max_attempts=3, base_delay=0.1)
+        @retry_with_backoff(max_attempts=3, base_delay=0.1, sleep_fn=clock.advance)
         def failing_function():
             attempts.append(1)
             if len(attempts) < 3:
@@ -221,9 +577,9 @@ class TestRetryHelper:
         assert result == "success"
         assert len(attempts) == 3
 
-    def test_retry_exhaustion(self):
+    def test_retry_exhaustion(self, clock):
         """测试重试耗尽"""
-        @retry_with_backoff(max_attempts=3, base_delay=0.1)
+        @retry_with_backoff(max_attempts=3, base_delay=0.1, sleep_fn=clock.advance)
         def always_failing_function():
             raise Exception("Always fails")
 
@@ -231,32 +587,36 @@ class TestRetryHelper:
             always_failing_function()
 
     def test_exponential_backoff(self):
-        """测试指数退避"""
+        """测试指数退避（记录等待时长，不真实等待）"""
         delays = []
 
-        @retry_with_backoff(max_attempts=4, base_delay=0.1)
-        def record_delays():
-            if len(delays) < 3:
-                before = time.time()
-                raise Exception()
-            after = time.time()
-            if len(delays) > 0:
-                delays.append(after - before)
-
-        try:
-            record_delays()
-        except Exception:
-            pass
+        @retry_with_backoff(max_attempts=4, base_delay=0.1, jitter=False, sleep_fn=delays.append)
+        def always_fail():
+            raise Exception()
+
+        with pytest.raises(Exception):
+            always_fail()
+
+        assert delays == [0.1, 0.2, 0.4]
+
+    def test_backoff_capped_at_max_delay(self):
+        """测试退避延迟不超过最大延迟"""
+        delays = []
+
+        @retry_with_backoff(max_attempts=5, base_delay=1.0, max_delay=3.0, jitter=False, sleep_fn=delays.append)
+        def always_fail():
+            raise Exception()
 
-        # 验证延迟增长（指数退避）
-        if len(delays) >= 2:
-            assert delays[1] > delays[0]
+        with pytest.raises(Exception):
+            always_fail()
+
+        assert delays == [1.0, 2.0, 3.0, 3.0]
 
-    def test_no_retry_on_success(self):
+    def test_no_retry_on_success(self, clock):
         """测试成功时不重试"""
         attempts = []
 
-        @retry_with_backoff(max_attempts=3, base_delay=0.1)
+        @retry_with_backoff(max_attempts=3, base_delay=0.1, sleep_fn=clock.advance)
         def success_function():
             attempts.append(1)
             return "success"
@@ -269,9 +629,9 @@ class TestRetryHelper:
 class TestRetryHelperClass:
     """RetryHelper 类测试"""
 
-    def test_retry_helper_instance(self):
+    def test_retry_helper_instance(self, clock):
         """测试 RetryHelper 实例"""
-        helper = RetryHelper(max_attempts=3, base_delay=0.1)
+        helper = RetryHelper(max_attempts=3, base_delay=0.1, sleep_fn=clock.advance)
 
         call_count = [0]
 
@@ -285,12 +645,13 @@ class TestRetryHelperClass:
         assert result == "success"
         assert call_count[0] == 2
 
-    def test_retry_helper_with_specific_exception(self):
+    def test_retry_helper_with_specific_exception(self, clock):
         """测试特定异常类型重试"""
         helper = RetryHelper(
             max_attempts=3,
             base_delay=0.1,
-            retry_exceptions=(ValueError,)
+            retry_exceptions=(ValueError,),
+            sleep_fn=clock.advance
         )
 
         call_count = [0]
@@ -319,6 +680,61 @@ class TestRetryHelperClass:
         # 不重试，只调用1次
         assert call_count2[0] == 1
 
+    def test_retry_exception_subclass(self, clock):
+        """测试异常类型的子类同样重试"""
+        helper = RetryHelper(
+            max_attempts=3,
+            base_delay=0.1,
+            retry_exceptions=(OSError,),
+            sleep_fn=clock.advance
+        )
+        call_count = [0]
+
+        def task_with_connection_error():
+            call_count[0] += 1
+            raise ConnectionError("Retry me")
+
+        with pytest.raises(ConnectionError):
+            helper.run(task_with_connection_error)
+
+        assert call_count[0] == 3
+
+    def test_run_async(self, monkeypatch):
+        """测试异步重试：等待协程结果，退避期间 await asyncio.sleep"""
+        delays = []
+
+        async def fake_sleep(delay):
+            delays.append(delay)
+
+        monkeypatch.setattr(retry_helper.asyncio, 'sleep', fake_sleep)
+
+        helper = RetryHelper(max_attempts=3, base_delay=0.1, jitter=False)
+        call_count = [0]
+
+        async def flaky_task():
+            call_count[0] += 1
+            if call_count[0] < 3:
+                raise ConnectionError("Fail")
+            return "success"
+
+        assert asyncio.run(helper.run_async(flaky_task)) == "success"
+        assert delays == [0.1, 0.2]
+
+    def test_decorator_wraps_coroutine_function(self, monkeypatch):
+        """测试装饰协程函数时返回协程函数"""
+        async def fake_sleep(delay):
+            pass
+
+        monkeypatch.setattr(retry_helper.asyncio, 'sleep', fake_sleep)
+
+        @retry_with_backoff(max_attempts=2, base_delay=0.1)
+        async def always_fail():
+            raise ValueError("Fail")
+
+        assert asyncio.iscoroutinefunction(always_fail)
+        with pytest.raises(ValueError):
+            asyncio.run(always_fail())
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
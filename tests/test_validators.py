@@ -5,6 +5,9 @@
 """
 
 import pytest
+
+import validators
+from exceptions import InputValidationError, InvalidStockCodeError
 from validators import StockCodeValidator, PromptSanitizer, SQLSafeValidator
 
 
@@ -45,6 +48,38 @@ class TestStockCodeValidator:
         assert StockCodeValidator.HK_STOCK_FULL_PATTERN.match('00700.HK')
         assert not StockCodeValidator.HK_STOCK_PATTERN.match('123')
 
+    def test_valid_hk_stock_code(self):
+        """测试港股代码标准化"""
+        assert StockCodeValidator.validate_hk_stock('700') == '00700.HK'
+        assert StockCodeValidator.validate_hk_stock('hk0700') == '00700.HK'
+        assert StockCodeValidator.validate_hk_stock('00700.hk') == '00700.HK'
+
+    def test_validate_results_cached(self):
+        """测试重复验证同一代码命中缓存，且结果不变"""
+        validators._validate_cached.cache_clear()
+
+        assert StockCodeValidator.validate('hk700') == '00700.HK'
+        assert StockCodeValidator.validate('hk700') == '00700.HK'
+
+        assert validators._validate_cached.cache_info().hits == 1
+
+    def test_invalid_code_not_cached(self):
+        """测试无效代码每次都抛出异常"""
+        for _ in range(2):
+            with pytest.raises(InvalidStockCodeError):
+                StockCodeValidator.validate('abc')
+
+    @pytest.mark.parametrize("validate, code", [
+        (StockCodeValidator.validate_a_stock, '60051a'),
+        (StockCodeValidator.validate_a_stock, '600519\n.SH'),
+        (StockCodeValidator.validate_hk_stock, '123456'),
+        (StockCodeValidator.validate_hk_stock, '4306\nHK'),
+    ])
+    def test_invalid_codes_rejected(self, validate, code):
+        """测试非法代码（含位数不符、夹带换行符）被拒绝"""
+        with pytest.raises(InvalidStockCodeError):
+            validate(code)
+
 
 class TestPromptSanitizer:
     """Prompt 清洗器测试"""
@@ -88,6 +123,50 @@ class TestSQLSafeValidator:
         except Exception:
             pass  # 预期行为
 
+    def test_validate_column_list(self):
+        """测试批量列名验证与单列验证结果一致"""
+        assert SQLSafeValidator.validate_column_list([' ma5 ', 'exp_date', '_vol']) == ['ma5', 'exp_date', '_vol']
+
+        for columns in (['ma5', 'DropTable'], ['ma5', 'ma-10'], ['ma5', '5ma']):
+            with pytest.raises(InputValidationError):
+                SQLSafeValidator.validate_column_list(columns)
+
+
+class TestSensitiveDataFilter:
+    """敏感信息过滤器测试"""
+
+    def test_filter_log_redacts_secrets(self):
+        """测试 API Key、Bearer Token 与 URL 参数被脱敏"""
+        from validators import SensitiveDataFilter
+
+        message = 'key=sk-abcdefghijklmnopqrstuvwx Bearer abcdefghijklmnopqrstuvwx url=/q?token=abc&a=1'
+        filtered = SensitiveDataFilter.filter_log(message)
+
+        assert 'abcdefghijklmnopqrstuvwx' not in filtered
+        assert 'Bearer ***REDACTED***' in filtered
+        assert '?token=***REDACTED***&a=1' in filtered
+
+    def test_filter_log_plain_message_unchanged(self):
+        """测试不含敏感片段的消息原样返回"""
+        from validators import SensitiveDataFilter
+
+        message = '600519 分析完成，耗时 1.2s'
+
+        assert SensitiveDataFilter.filter_log(message) is message
+
+    def test_safe_log_dict(self):
+        """测试敏感字段脱敏，且始终返回新字典"""
+        from validators import SensitiveDataFilter
+
+        data = {'code': '600519', 'API_KEY': 'abcd1234efgh5678', 'token': 'short'}
+        plain = {'code': '600519'}
+
+        assert SensitiveDataFilter.safe_log_dict(data) == {
+            'code': '600519', 'API_KEY': 'abcd***5678', 'token': '***REDACTED***'
+        }
+        assert SensitiveDataFilter.safe_log_dict(plain) == plain
+        assert SensitiveDataFilter.safe_log_dict(plain) is not plain
+
 
 class TestDataValidation:
     """数据验证测试"""
@@ -112,6 +191,18 @@ class TestDataValidation:
         except Exception:
             pass  # 预期行为
 
+    def test_validate_date_range(self):
+        """测试日期范围验证（含未补零写法与无效日期）"""
+        from validators import DataRangeValidator
+
+        assert DataRangeValidator.validate_date_range('2024-01-05', '2024-12-31') == ('2024-01-05', '2024-12-31')
+        assert DataRangeValidator.validate_date_range('2024-1-5', '2024-02-29') == ('2024-1-5', '2024-02-29')
+
+        for start, end in [('2023-02-29', '2024-01-01'), ('20240105', '2024-12-31'),
+                           ('2024-12-31', '2024-01-05'), ('2010-01-01', '2024-01-01')]:
+            with pytest.raises(InputValidationError):
+                DataRangeValidator.validate_date_range(start, end)
+
 
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
@@ -8,15 +8,116 @@
 
 import json
 import logging
+import math
+import mmap
+import os
+import struct
 import time
 import hashlib
+import queue
+import threading
 from pathlib import Path
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, List
 from datetime import datetime, timedelta
 import pickle
+from collections import OrderedDict
+from functools import _make_key, wraps
 
 logger = logging.getLogger(__name__)
 
+try:
+    import xxhash
+except ImportError:  # xxhash 为可选依赖
+    xxhash = None
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖
+    orjson = None
+
+
+def _hash_key(data: bytes) -> str:
+    """生成 128 位缓存文件名摘要（非加密用途，优先 xxh3，否则 BLAKE2b）"""
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(data)
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+# 当前时间（墙上时钟：过期时间写入文件，需跨进程有效）；测试中可替换为假时钟
+_now = time.time
+
+# cache_result 直接以 repr 作缓存键的单参数类型（repr 唯一且跨进程稳定）
+_REPR_KEY_TYPES = (str, int)
+
+# 后台写入线程每批最多处理的条目数
+_WRITE_BATCH_SIZE = 64
+
+# 缓存文件头：过期时间（8 字节 double）+ 数据格式（1 字节），其后为序列化后的值
+_HEADER = struct.Struct('<dc')
+_FORMAT_JSON = b'J'
+_FORMAT_PICKLE = b'P'
+
+# 超过该大小的缓存文件通过 mmap 读取，直接从页缓存反序列化，省去一次整文件复制
+_MMAP_THRESHOLD = 64 * 1024
+
+
+def _is_json_exact(value: Any) -> bool:
+    """
+    判断值经 JSON 往返后是否保持原样
+
+    只接受 dict（键为 str）/ list / str / int / bool / None / 有限 float，
+    不接受子类（如 numpy 标量、枚举）及 tuple、dataclass 等会被 JSON 改变类型的对象
+    """
+    value_type = type(value)
+    if value_type in (str, int, bool) or value is None:
+        return True
+    if value_type is float:
+        return math.isfinite(value)
+    if value_type is list:
+        return all(_is_json_exact(item) for item in value)
+    if value_type is dict:
+        return all(
+            type(k) is str and _is_json_exact(v)
+            for k, v in value.items()
+        )
+    return False
+
+
+def _encode_cache_data(cache_data: Dict) -> bytes:
+    """序列化缓存数据：可无损转为 JSON 的值使用 orjson，其余使用 pickle"""
+    value = cache_data['value']
+    if orjson is not None and _is_json_exact(value):
+        try:
+            return _HEADER.pack(cache_data['expires_at'], _FORMAT_JSON) + orjson.dumps(value)
+        except TypeError:
+            # 超出 64 位的整数、嵌套过深等 orjson 不支持的情况
+            pass
+    payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    return _HEADER.pack(cache_data['expires_at'], _FORMAT_PICKLE) + payload
+
+
+def _decode_cache_data(data) -> Dict:
+    """反序列化缓存文件内容（bytes 或 mmap）"""
+    expires_at, fmt = _HEADER.unpack_from(data)
+    # 显式释放 memoryview，mmap 才能在读取后关闭
+    with memoryview(data) as view, view[_HEADER.size:] as payload:
+        if fmt == _FORMAT_JSON:
+            value = orjson.loads(payload) if orjson is not None else json.loads(bytes(payload))
+        elif fmt == _FORMAT_PICKLE:
+            value = pickle.loads(payload)
+        else:
+            raise ValueError(f"未知的缓存数据格式: {fmt!r}")
+    return {'expires_at': expires_at, 'value': value}
+
+
+def _read_cache_file(path: Path) -> Dict:
+    """读取缓存文件，大文件使用 mmap 避免复制到新的 bytes 对象"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= _MMAP_THRESHOLD:
+            return _decode_cache_data(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _decode_cache_data(mm)
+
 
 class CacheManager:
     """
@@ -29,11 +130,30 @@ class CacheManager:
     4. 自动清理过期缓存
     """
 
+    # 固定属性集合：省去实例 __dict__，属性访问更快
+    __slots__ = (
+        'cache_dir',
+        'default_ttl',
+        'max_cache_size',
+        'max_memory_items',
+        'cleanup_interval',
+        '_lock',
+        '_memory_cache',
+        '_stats',
+        '_file_sizes',
+        '_total_bytes',
+        '_write_queue',
+    )
+
     def __init__(
         self,
         cache_dir: str = "./data/cache",
         default_ttl: int = 3600,
-        max_cache_size: int = 100 * 1024 * 1024  # 100MB
+        max_cache_size: int = 100 * 1024 * 1024,  # 100MB
+        max_memory_items: int = 10000,
+        async_writes: bool = False,
+        auto_cleanup: bool = False,
+        cleanup_interval: float = 60
     ):
         """
         初始化缓存管理器
@@ -42,15 +162,27 @@ class CacheManager:
             cache_dir: 缓存目录
             default_ttl: 默认 TTL（秒）
             max_cache_size: 最大缓存大小（字节）
+            max_memory_items: 内存缓存最大条目数，超出后淘汰最久未使用的条目（文件缓存保留）
+            async_writes: 是否由后台线程写入文件缓存（set 只更新内存缓存后立即返回）
+            auto_cleanup: 是否由后台定时器定期清理过期的文件缓存
+            cleanup_interval: 定期清理的间隔（秒）
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
 
+        # 按文件名哈希前两位分成 256 个子目录，避免单个目录文件过多导致查找变慢
+        for shard in range(256):
+            (self.cache_dir / f"{shard:02x}").mkdir(exist_ok=True)
+
         self.default_ttl = default_ttl
         self.max_cache_size = max_cache_size
+        self.max_memory_items = max_memory_items
 
-        # 内存缓存（用于快速访问）
-        self._memory_cache: Dict[str, Dict] = {}
+        # 保护内存缓存、统计与文件大小计数（后台写入/清理线程与调用方并发访问）
+        self._lock = threading.RLock()
+
+        # 内存缓存（用于快速访问，按访问顺序排列，实现 LRU 淘汰）
+        self._memory_cache: OrderedDict[str, Dict] = OrderedDict()
 
         # 缓存统计
         self._stats = {
@@ -60,6 +192,26 @@ class CacheManager:
             'deletes': 0,
         }
 
+        # 文件缓存大小计数（文件名 -> 字节数），写入/删除时增量更新，避免每次 set 扫描目录
+        self._file_sizes: Dict[str, int] = {}
+        self._total_bytes = 0
+        self._rescan_file_sizes()
+
+        # 异步写入队列（后台守护线程批量落盘）
+        self._write_queue: Optional[queue.Queue] = None
+        if async_writes:
+            self._write_queue = queue.Queue()
+            threading.Thread(
+                target=self._writer_loop,
+                name="CacheManagerWriter",
+                daemon=True
+            ).start()
+
+        # 定期清理过期缓存（守护定时器链）
+        self.cleanup_interval = cleanup_interval
+        if auto_cleanup:
+            self._schedule_cleanup()
+
         logger.info(
             f"[CacheManager] 初始化完成: "
             f"目录={self.cache_dir}, "
@@ -67,57 +219,57 @@ class CacheManager:
             f"最大大小={max_cache_size // 1024 // 1024}MB"
         )
 
-    def get(self, key: str, ttl: Optional[int] = None) -> Optional[Any]:
+    def get(self, key: str) -> Optional[Any]:
         """
-        获取缓存
+        获取缓存（过期时间以 set 时指定的 TTL 为准）
 
         Args:
             key: 缓存键
-            ttl: TTL（秒），None 表示使用默认值
 
         Returns:
             缓存值，不存在或过期返回 None
         """
-        ttl = ttl or self.default_ttl
+        now = _now()
 
         # 1. 检查内存缓存
-        if key in self._memory_cache:
-            cache_data = self._memory_cache[key]
-
-            # 检查是否过期
-            if time.time() - cache_data['timestamp'] <= ttl:
-                self._stats['hits'] += 1
-                logger.debug(f"[缓存命中] 内存缓存: {key}")
-                return cache_data['value']
-            else:
-                # 内存缓存过期，删除
-                del self._memory_cache[key]
+        with self._lock:
+            cache_data = self._memory_cache.get(key)
+            if cache_data is not None:
+                # 检查是否过期
+                if cache_data['expires_at'] > now:
+                    self._memory_cache.move_to_end(key)
+                    self._stats['hits'] += 1
+                    logger.debug(f"[缓存命中] 内存缓存: {key}")
+                    return cache_data['value']
+                else:
+                    # 内存缓存过期，删除
+                    del self._memory_cache[key]
 
         # 2. 检查文件缓存
         cache_file = self._get_cache_file(key)
         if cache_file.exists():
             try:
-                with open(cache_file, 'rb') as f:
-                    cache_data = pickle.load(f)
+                cache_data = _read_cache_file(cache_file)
 
                 # 检查是否过期
-                if time.time() - cache_data['timestamp'] <= ttl:
+                if cache_data['expires_at'] > now:
                     # 加载到内存缓存
-                    self._memory_cache[key] = cache_data
-                    self._stats['hits'] += 1
+                    self._remember(key, cache_data)
+                    self._count('hits')
                     logger.debug(f"[缓存命中] 文件缓存: {key}")
                     return cache_data['value']
                 else:
                     # 文件缓存过期，删除
                     cache_file.unlink()
-                    self._stats['deletes'] += 1
+                    self._untrack_file(cache_file.name)
+                    self._count('deletes')
                     logger.debug(f"[缓存过期] {key}")
 
             except Exception as e:
                 logger.warning(f"[缓存读取失败] {key}: {e}")
 
         # 3. 缓存未命中
-        self._stats['misses'] += 1
+        self._count('misses')
         logger.debug(f"[缓存未命中] {key}")
         return None
 
@@ -132,29 +284,62 @@ class CacheManager:
         """
         ttl = ttl or self.default_ttl
 
+        # 写入时确定绝对过期时间，读取时只需一次比较
         cache_data = {
-            'timestamp': time.time(),
-            'ttl': ttl,
+            'expires_at': _now() + ttl,
             'value': value,
         }
 
-        # 1. 设置内存缓存
-        self._memory_cache[key] = cache_data
+        # 1. 设置内存缓存（立即可读）
+        self._remember(key, cache_data)
+
+        # 2. 设置文件缓存（异步模式交给后台线程）
+        if self._write_queue is not None:
+            self._write_queue.put((key, cache_data))
+            return
+
+        self._write_file(key, cache_data)
 
-        # 2. 设置文件缓存
+        # 3. 检查缓存大小，超限则清理
+        self._cleanup_if_needed()
+
+    def flush(self):
+        """等待异步写入队列中的缓存全部落盘（同步模式下立即返回）"""
+        if self._write_queue is not None:
+            self._write_queue.join()
+
+    def _write_file(self, key: str, cache_data: Dict):
+        """写入文件缓存"""
         cache_file = self._get_cache_file(key)
         try:
-            with open(cache_file, 'wb') as f:
-                pickle.dump(cache_data, f)
+            # 先整体序列化再一次写入
+            blob = _encode_cache_data(cache_data)
+            cache_file.write_bytes(blob)
+            self._track_file(cache_file.name, len(blob))
 
-            self._stats['sets'] += 1
-            logger.debug(f"[缓存设置] {key} (TTL={ttl}s)")
+            self._count('sets')
+            logger.debug(f"[缓存设置] {key}")
 
         except Exception as e:
             logger.error(f"[缓存写入失败] {key}: {e}")
 
-        # 3. 检查缓存大小，超限则清理
-        self._cleanup_if_needed()
+    def _writer_loop(self):
+        """后台写入线程：每次取出一批待写条目落盘，整批写完后检查一次缓存大小"""
+        while True:
+            batch = [self._write_queue.get()]
+            while len(batch) < _WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._write_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                for key, cache_data in batch:
+                    self._write_file(key, cache_data)
+                self._cleanup_if_needed()
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
 
     def delete(self, key: str):
         """
@@ -163,46 +348,118 @@ class CacheManager:
         Args:
             key: 缓存键
         """
+        # 先等待排队中的写入完成，避免删除后又被写回
+        self.flush()
+
         # 删除内存缓存
-        if key in self._memory_cache:
-            del self._memory_cache[key]
+        with self._lock:
+            self._memory_cache.pop(key, None)
 
         # 删除文件缓存
         cache_file = self._get_cache_file(key)
         if cache_file.exists():
             cache_file.unlink()
-            self._stats['deletes'] += 1
+            self._untrack_file(cache_file.name)
+            self._count('deletes')
             logger.debug(f"[缓存删除] {key}")
 
     def clear(self):
         """清空所有缓存"""
-        # 清空内存缓存
-        self._memory_cache.clear()
+        self.flush()
 
-        # 清空文件缓存
-        for cache_file in self.cache_dir.glob("*.cache"):
-            cache_file.unlink()
+        with self._lock:
+            # 清空内存缓存
+            self._memory_cache.clear()
+
+            # 清空文件缓存
+            for entry in self._scan_cache_files():
+                os.unlink(entry.path)
+            self._file_sizes.clear()
+            self._total_bytes = 0
 
         logger.info("[缓存清空] 所有缓存已清空")
 
+    def _remember(self, key: str, cache_data: Dict):
+        """写入内存缓存，超出条目上限时淘汰最久未使用的条目"""
+        with self._lock:
+            self._memory_cache[key] = cache_data
+            self._memory_cache.move_to_end(key)
+            while len(self._memory_cache) > self.max_memory_items:
+                self._memory_cache.popitem(last=False)
+
+    def _count(self, name: str):
+        """累加统计计数（加锁，避免多线程下 += 丢失更新）"""
+        with self._lock:
+            self._stats[name] += 1
+
     def _get_cache_file(self, key: str) -> Path:
         """
         获取缓存文件路径
 
-        使用 hash 后的 key 作为文件名，避免文件名过长或包含特殊字符
+        使用 hash 后的 key 作为文件名，避免文件名过长或包含特殊字符；
+        文件存放在以哈希前两位命名的子目录中
         """
-        # 使用 MD5 hash 生成文件名（非加密用途）
-        key_hash = hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
-        return self.cache_dir / f"{key_hash}.cache"
+        key_hash = _hash_key(key.encode())
+        return self.cache_dir / key_hash[:2] / f"{key_hash}.cache"
+
+    def _track_file(self, name: str, size: int):
+        """记录写入后的文件大小"""
+        with self._lock:
+            self._total_bytes += size - self._file_sizes.get(name, 0)
+            self._file_sizes[name] = size
+
+    def _untrack_file(self, name: str):
+        """移除已删除文件的大小记录"""
+        with self._lock:
+            self._total_bytes -= self._file_sizes.pop(name, 0)
+
+    def _scan_cache_files(self) -> List[os.DirEntry]:
+        """
+        列出缓存目录中的缓存文件
+
+        DirEntry 不为每个文件构造 Path 对象，且 stat() 结果缓存在条目上，
+        排序和统计大小时同一文件只需一次 stat 系统调用；
+        缓存目录根下的文件（分片前的旧缓存）一并列出，以便统计和清理
+        """
+        entries = []
+        shards = []
+        with os.scandir(self.cache_dir) as it:
+            for e in it:
+                if e.is_dir():
+                    shards.append(e.path)
+                elif e.name.endswith('.cache') and e.is_file():
+                    entries.append(e)
+
+        for shard in shards:
+            with os.scandir(shard) as it:
+                entries.extend(e for e in it if e.name.endswith('.cache') and e.is_file())
+        return entries
+
+    def _rescan_file_sizes(self) -> List[os.DirEntry]:
+        """扫描缓存目录，重建文件大小计数（可能有其他进程共用该目录），返回扫描到的文件"""
+        entries = self._scan_cache_files()
+        file_sizes = {e.name: e.stat().st_size for e in entries}
+        with self._lock:
+            self._file_sizes = file_sizes
+            self._total_bytes = sum(file_sizes.values())
+        return entries
 
     def _cleanup_if_needed(self):
         """检查缓存大小，超限则清理"""
+        # 常规路径只比较计数，计数超限时才扫描目录核实
+        if self._total_bytes <= self.max_cache_size:
+            return
+
+        # 整个清理过程持锁，避免写入线程与调用方同时淘汰
+        with self._lock:
+            self._evict_files()
+
+    def _evict_files(self):
+        """按修改时间淘汰最旧的文件缓存，直到大小降到上限的 80%"""
         try:
             # 计算缓存目录大小
-            total_size = sum(
-                f.stat().st_size
-                for f in self.cache_dir.glob("*.cache")
-            )
+            entries = self._rescan_file_sizes()
+            total_size = self._total_bytes
 
             # 超限时清理
             if total_size > self.max_cache_size:
@@ -213,19 +470,17 @@ class CacheManager:
                 )
 
                 # 按访问时间排序，删除最旧的缓存
-                cache_files = list(self.cache_dir.glob("*.cache"))
-                cache_files.sort(key=lambda f: f.stat().st_mtime)
+                entries.sort(key=lambda e: e.stat().st_mtime)
 
                 # 删除直到大小满足要求
-                for cache_file in cache_files:
-                    cache_file.unlink()
+                for entry in entries:
+                    size = entry.stat().st_size
+                    os.unlink(entry.path)
+                    self._untrack_file(entry.name)
                     self._stats['deletes'] += 1
 
-                    # 重新计算大小
-                    total_size = sum(
-                        f.stat().st_size
-                        for f in self.cache_dir.glob("*.cache")
-                    )
+                    # 扣减已删除文件的大小，无需重新扫描目录
+                    total_size -= size
 
                     if total_size < self.max_cache_size * 0.8:  # 清理到 80%
                         break
@@ -237,54 +492,77 @@ class CacheManager:
 
     def get_stats(self) -> Dict:
         """获取缓存统计信息"""
-        total_requests = self._stats['hits'] + self._stats['misses']
-        hit_rate = self._stats['hits'] / total_requests if total_requests > 0 else 0
+        with self._lock:
+            stats = dict(self._stats)
+            memory_cache_size = len(self._memory_cache)
+
+        total_requests = stats['hits'] + stats['misses']
+        hit_rate = stats['hits'] / total_requests if total_requests > 0 else 0
 
         # 计算缓存大小
-        cache_size = sum(
-            f.stat().st_size
-            for f in self.cache_dir.glob("*.cache")
-            if f.is_file()
-        )
+        cache_size = sum(e.stat().st_size for e in self._scan_cache_files())
 
         return {
-            'hits': self._stats['hits'],
-            'misses': self._stats['misses'],
+            'hits': stats['hits'],
+            'misses': stats['misses'],
             'hit_rate': hit_rate,
-            'sets': self._stats['sets'],
-            'deletes': self._stats['deletes'],
-            'memory_cache_size': len(self._memory_cache),
+            'sets': stats['sets'],
+            'deletes': stats['deletes'],
+            'memory_cache_size': memory_cache_size,
             'file_cache_size': cache_size,
             'file_cache_size_mb': cache_size / 1024 / 1024,
         }
 
     def cleanup_expired(self):
-        """清理所有过期的缓存"""
+        """
+        清理所有过期的缓存
+
+        只读取文件头中的过期时间，不反序列化缓存值
+        """
         try:
-            current_time = time.time()
+            current_time = _now()
             expired_count = 0
 
-            for cache_file in self.cache_dir.glob("*.cache"):
+            for entry in self._scan_cache_files():
                 try:
-                    with open(cache_file, 'rb') as f:
-                        cache_data = pickle.load(f)
+                    with open(entry.path, 'rb') as f:
+                        header = f.read(_HEADER.size)
+                except FileNotFoundError:
+                    # 已被其他线程或进程删除
+                    continue
+
+                # 检查是否过期（文件头不完整或格式未知的缓存文件同样删除）
+                if len(header) == _HEADER.size:
+                    expires_at, fmt = _HEADER.unpack(header)
+                    if fmt in (_FORMAT_JSON, _FORMAT_PICKLE) and expires_at > current_time:
+                        continue
 
-                    # 检查是否过期
-                    if current_time - cache_data['timestamp'] > cache_data['ttl']:
-                        cache_file.unlink()
-                        expired_count += 1
-                        self._stats['deletes'] += 1
-
-                except Exception as e:
-                    # 无法读取的缓存文件，删除
-                    cache_file.unlink()
-                    expired_count += 1
+                try:
+                    os.unlink(entry.path)
+                except FileNotFoundError:
+                    continue
+                self._untrack_file(entry.name)
+                expired_count += 1
+                self._count('deletes')
 
             logger.info(f"[缓存清理] 清理了 {expired_count} 个过期缓存")
 
         except Exception as e:
             logger.error(f"[缓存清理失败] {e}")
 
+    def _schedule_cleanup(self):
+        """启动下一次定期清理"""
+        timer = threading.Timer(self.cleanup_interval, self._run_scheduled_cleanup)
+        timer.daemon = True
+        timer.start()
+
+    def _run_scheduled_cleanup(self):
+        """执行定期清理，完成后安排下一次"""
+        try:
+            self.cleanup_expired()
+        finally:
+            self._schedule_cleanup()
+
 
 # 全局单例
 _cache_manager: Optional[CacheManager] = None
@@ -322,20 +600,41 @@ def cache_result(key_func=None, ttl: int = None):
         ttl: TTL（秒）
     """
     cache_manager = get_cache_manager()
+    memory_cache = cache_manager._memory_cache
 
     def decorator(func):
+        qualname = func.__qualname__
+
+        @wraps(func)
         def wrapper(*args, **kwargs):
             # 生成缓存键
             if key_func:
                 cache_key = key_func(args, kwargs)
+            elif len(args) == 1 and not kwargs and type(args[0]) in _REPR_KEY_TYPES:
+                # 单个 str / int 参数（如股票代码）：直接拼接 repr，无需哈希；
+                # 键跨进程稳定，进程重启后仍能命中文件缓存
+                cache_key = f"{qualname}({args[0]!r})"
             else:
-                # 默认键生成：函数名 + 参数
-                func_name = func.__name__
-                params_str = f"{args}_{kwargs}"
-                cache_key = f"{func_name}_{hash(params_str)}"
+                # 默认键生成：函数名 + 参数哈希（与 lru_cache 相同的参数元组，无需格式化为字符串）
+                try:
+                    params_hash = hash(_make_key(args, kwargs, False))
+                except TypeError:
+                    # 参数不可哈希（如 list、DataFrame）时退回字符串表示
+                    params_hash = hash(f"{args}_{kwargs}")
+                cache_key = f"{qualname}:{params_hash}"
+
+            # 快速路径：内存缓存命中且未过期时直接返回
+            cache_data = memory_cache.get(cache_key)
+            if cache_data is not None and cache_data['expires_at'] > _now():
+                with cache_manager._lock:
+                    # 读取后可能已被其他线程淘汰
+                    if cache_key in memory_cache:
+                        memory_cache.move_to_end(cache_key)
+                    cache_manager._stats['hits'] += 1
+                return cache_data['value']
 
-            # 尝试获取缓存
-            cached_value = cache_manager.get(cache_key, ttl=ttl)
+            # 尝试获取缓存（含文件缓存）
+            cached_value = cache_manager.get(cache_key)
             if cached_value is not None:
                 return cached_value
 
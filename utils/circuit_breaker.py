@@ -6,10 +6,13 @@
 防止级联失败，提升系统稳定性
 """
 
+import inspect
 import logging
+import threading
 import time
+from array import array
 from enum import Enum
-from typing import Callable, Optional, Any
+from typing import Callable, NamedTuple, Optional, Any, Tuple
 from functools import wraps
 
 logger = logging.getLogger(__name__)
@@ -22,11 +25,36 @@ class CircuitBreakerState(Enum):
     HALF_OPEN = "HALF_OPEN"  # 半开状态，允许部分请求通过测试
 
 
+# 状态别名：热路径上用 is 比较，省去每次对枚举类的全局查找与属性查找
+_CLOSED = CircuitBreakerState.CLOSED
+_OPEN = CircuitBreakerState.OPEN
+_HALF_OPEN = CircuitBreakerState.HALF_OPEN
+
 class CircuitBreakerOpenError(Exception):
     """熔断器开启异常"""
     pass
 
 
+class CircuitBreakerStats(NamedTuple):
+    """熔断器统计快照（不可变，适合被监控频繁轮询）"""
+    name: str
+    state: str
+    failure_count: int
+    success_count: int
+    last_failure_time: Optional[float]
+    last_success_time: Optional[float]
+
+
+# 滑动窗口划分的桶数
+_WINDOW_BUCKETS = 10
+
+# try_call 在熔断器开启、请求被拒绝时返回的哨兵值
+_CIRCUIT_OPEN = object()
+
+# 累计计数上限（达到后不再增加），长期运行的进程中计数保持在固定范围内
+_COUNTER_MAX = 2**31 - 1
+
+
 class CircuitBreaker:
     """
     熔断器模式实现
@@ -35,14 +63,25 @@ class CircuitBreaker:
     - 当失败次数达到阈值，熔断器开启，拒绝请求
     - 经过一段时间后，熔断器进入半开状态
     - 半开状态下的请求成功，则关闭熔断器；失败则重新开启
+    - 指定 window 时，只统计最近 window 秒内的失败次数（分桶滑动窗口）
     """
 
+    __slots__ = (
+        'failure_threshold', 'timeout', 'half_open_max_calls', 'name', '_time_fn',
+        'state', 'failure_count', 'success_count', 'last_failure_time', 'last_success_time',
+        '_open_until', 'half_open_calls',
+        'window', '_buckets', '_bucket_width', '_bucket_index',
+        '_lock',
+    )
+
     def __init__(
         self,
         failure_threshold: int = 5,
         timeout: int = 60,
         half_open_max_calls: int = 3,
-        name: Optional[str] = None
+        name: Optional[str] = None,
+        time_fn: Callable[[], float] = time.monotonic,
+        window: Optional[float] = None
     ):
         """
         初始化熔断器
@@ -52,11 +91,14 @@ class CircuitBreaker:
             timeout: 熔断器超时时间（秒），超时后进入半开状态
             half_open_max_calls: 半开状态下允许的最大测试调用数
             name: 熔断器名称（用于日志）
+            time_fn: 计算熔断超时的时钟函数（返回秒），默认单调时钟，测试时可注入假时钟
+            window: 失败统计窗口（秒），None 表示不限时间窗口（成功调用递减失败计数）
         """
         self.failure_threshold = failure_threshold
         self.timeout = timeout
         self.half_open_max_calls = half_open_max_calls
         self.name = name or "CircuitBreaker"
+        self._time_fn = time_fn
 
         # 状态
         self.state = CircuitBreakerState.CLOSED
@@ -65,12 +107,26 @@ class CircuitBreaker:
         self.last_failure_time: Optional[float] = None
         self.last_success_time: Optional[float] = None
 
+        # 熔断截止时刻（time_fn 时钟，不受系统时间调整影响），开启时计算一次
+        self._open_until = 0.0
+
         # 半开状态计数
         self.half_open_calls = 0
 
+        # 滑动窗口：_WINDOW_BUCKETS 个桶，每桶依次存放 (成功数, 失败数)，
+        # 每次调用只累加当前桶，跨桶时清零过期的桶，判断阈值时再求和
+        self.window = window
+        self._buckets = array('i', [0] * (2 * _WINDOW_BUCKETS))
+        self._bucket_width = window / _WINDOW_BUCKETS if window else 0.0
+        self._bucket_index = 0
+
+        # 保护计数与状态转换（多线程共用同一熔断器时避免丢失更新）；
+        # 只在更新状态时持有，不包住受保护函数的执行
+        self._lock = threading.Lock()
+
         logger.info(
-            f"[{self.name}] 熔断器初始化: "
-            f"失败阈值={failure_threshold}, 超时={timeout}s"
+            "[%s] 熔断器初始化: 失败阈值=%s, 超时=%ss",
+            self.name, failure_threshold, timeout
         )
 
     def call(self, func: Callable, *args, **kwargs) -> Any:
@@ -88,115 +144,213 @@ class CircuitBreaker:
         Raises:
             CircuitBreakerOpenError: 熔断器开启时
         """
-        # 检查熔断器状态
-        if self.state == CircuitBreakerState.OPEN:
-            # 检查是否超时，可以进入半开状态
-            if self._should_attempt_reset():
-                self._transition_to_half_open()
-            else:
-                remaining_time = self.timeout - (time.time() - self.last_failure_time)
-                raise CircuitBreakerOpenError(
-                    f"[{self.name}] 熔断器开启，拒绝请求 "
-                    f"(剩余 {remaining_time:.1f}s)"
-                )
+        ok, result = self.try_call(func, *args, **kwargs)
+        if not ok:
+            raise self._open_error()
+        return result
+
+    async def call_async(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        执行受保护的函数调用（异步版本）
+
+        func 返回可等待对象（如协程函数）时等待其结果，按等待结果计入成功/失败
+
+        Args:
+            func: 要保护的函数或协程函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            函数执行结果
+
+        Raises:
+            CircuitBreakerOpenError: 熔断器开启时
+        """
+        if not self._allow_request():
+            raise self._open_error()
 
         try:
             result = func(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+        except Exception:
+            self._on_failure()
+            raise
 
-            # 成功：处理成功逻辑
-            self._on_success()
+        self._on_success()
 
-            return result
+        return result
 
-        except Exception as e:
+    def try_call(self, func: Callable, *args, **kwargs) -> Tuple[bool, Any]:
+        """
+        执行受保护的函数调用，熔断器开启时不抛异常
+
+        适合熔断期间被频繁调用的场景：拒绝请求时直接返回，
+        不构造异常对象与回溯信息
+
+        Args:
+            func: 要保护的函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            (是否执行, 结果)：请求被拒绝时返回 (False, _CIRCUIT_OPEN)；
+            函数本身抛出的异常照常向上传递
+        """
+        if not self._allow_request():
+            return False, _CIRCUIT_OPEN
+
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
             # 失败：处理失败逻辑
             self._on_failure()
             raise
 
+        # 成功：处理成功逻辑
+        self._on_success()
+
+        return True, result
+
+    def _allow_request(self) -> bool:
+        """判断是否放行本次请求（开启状态下超时则转入半开状态）"""
+        # 检查熔断器状态（先无锁读取，开启时再加锁确认，避免多个线程同时转换）
+        if self.state is _OPEN:
+            with self._lock:
+                if self.state is _OPEN:
+                    # 检查是否超时，可以进入半开状态
+                    if self._should_attempt_reset():
+                        self._transition_to_half_open()
+                    else:
+                        return False
+        return True
+
+    def _open_error(self) -> CircuitBreakerOpenError:
+        """构造熔断器开启异常（附剩余熔断时间）"""
+        remaining_time = self._open_until - self._time_fn()
+        return CircuitBreakerOpenError(
+            f"[{self.name}] 熔断器开启，拒绝请求 "
+            f"(剩余 {remaining_time:.1f}s)"
+        )
+
     def _should_attempt_reset(self) -> bool:
         """检查是否应该尝试重置熔断器"""
-        if self.last_failure_time is None:
-            return False
-
-        elapsed = time.time() - self.last_failure_time
-        return elapsed >= self.timeout
+        return self._time_fn() >= self._open_until
 
     def _transition_to_half_open(self):
         """转换到半开状态"""
         self.state = CircuitBreakerState.HALF_OPEN
         self.half_open_calls = 0
-        logger.info(f"[{self.name}] 熔断器进入半开状态")
+        logger.info("[%s] 熔断器进入半开状态", self.name)
 
     def _transition_to_closed(self):
         """转换到关闭状态"""
         self.state = CircuitBreakerState.CLOSED
         self.failure_count = 0
         self.success_count = 0
-        logger.info(f"[{self.name}] 熔断器已关闭")
+        self._clear_window()
+        logger.info("[%s] 熔断器已关闭", self.name)
 
     def _transition_to_open(self):
         """转换到开启状态"""
         self.state = CircuitBreakerState.OPEN
-        self.last_failure_time = time.time()
-        logger.error(
-            f"[{self.name}] 熔断器已开启 "
-            f"(连续失败 {self.failure_count} 次)"
-        )
+        self._open_until = self._time_fn() + self.timeout
+        logger.error("[%s] 熔断器已开启 (连续失败 %d 次)", self.name, self.failure_count)
+
+    def _record(self, failed: bool):
+        """在滑动窗口的当前桶中记录一次调用结果"""
+        current = int(self._time_fn() // self._bucket_width)
+        if current != self._bucket_index:
+            # 清零自上次记录以来经过的桶（最多整个窗口）
+            buckets = self._buckets
+            for index in range(max(self._bucket_index + 1, current - _WINDOW_BUCKETS + 1), current + 1):
+                slot = 2 * (index % _WINDOW_BUCKETS)
+                buckets[slot] = buckets[slot + 1] = 0
+            self._bucket_index = current
+        self._buckets[2 * (current % _WINDOW_BUCKETS) + failed] += 1
+
+    def _window_failures(self) -> int:
+        """滑动窗口内的失败次数"""
+        return sum(self._buckets[1::2])
+
+    def _clear_window(self):
+        """清空滑动窗口"""
+        for i in range(len(self._buckets)):
+            self._buckets[i] = 0
 
     def _on_success(self):
         """处理成功调用"""
-        self.last_success_time = time.time()
-        self.success_count += 1
-
-        if self.state == CircuitBreakerState.HALF_OPEN:
-            self.half_open_calls += 1
-
-            # 半开状态下，如果连续成功达到阈值，关闭熔断器
-            if self.half_open_calls >= self.half_open_max_calls:
-                self._transition_to_closed()
-        elif self.state == CircuitBreakerState.CLOSED:
-            # 关闭状态下，成功调用重置失败计数
-            if self.failure_count > 0:
-                self.failure_count = max(0, self.failure_count - 1)
+        with self._lock:
+            self.last_success_time = time.time()
+            if self.success_count < _COUNTER_MAX:
+                self.success_count += 1
+            if self.window:
+                self._record(False)
+
+            state = self.state
+            if state is _HALF_OPEN:
+                self.half_open_calls += 1
+
+                # 半开状态下，如果连续成功达到阈值，关闭熔断器
+                if self.half_open_calls >= self.half_open_max_calls:
+                    self._transition_to_closed()
+            elif state is _CLOSED and not self.window:
+                # 关闭状态下，成功调用重置失败计数（滑动窗口模式下由窗口自然淘汰）
+                if self.failure_count > 0:
+                    self.failure_count = max(0, self.failure_count - 1)
 
     def _on_failure(self):
         """处理失败调用"""
-        self.failure_count += 1
-        self.last_failure_time = time.time()
-
-        if self.state == CircuitBreakerState.HALF_OPEN:
-            # 半开状态下失败，重新开启熔断器
-            logger.warning(f"[{self.name}] 半开状态下测试失败，重新开启熔断器")
-            self._transition_to_open()
-        elif self.state == CircuitBreakerState.CLOSED:
-            # 关闭状态下，失败次数达到阈值，开启熔断器
-            if self.failure_count >= self.failure_threshold:
+        with self._lock:
+            if self.failure_count < _COUNTER_MAX:
+                self.failure_count += 1
+            self.last_failure_time = time.time()
+            if self.window:
+                self._record(True)
+
+            state = self.state
+            if state is _HALF_OPEN:
+                # 半开状态下失败，重新开启熔断器
+                logger.warning("[%s] 半开状态下测试失败，重新开启熔断器", self.name)
                 self._transition_to_open()
+            elif state is _CLOSED:
+                # 关闭状态下，失败次数达到阈值，开启熔断器
+                failures = self._window_failures() if self.window else self.failure_count
+                if failures >= self.failure_threshold:
+                    self._transition_to_open()
 
     def get_state(self) -> CircuitBreakerState:
         """获取当前状态"""
         return self.state
 
+    def get_stats_snapshot(self) -> CircuitBreakerStats:
+        """获取统计快照（按属性访问，不构造字典）"""
+        with self._lock:
+            return CircuitBreakerStats(
+                self.name,
+                self.state.value,
+                self.failure_count,
+                self.success_count,
+                self.last_failure_time,
+                self.last_success_time,
+            )
+
     def get_stats(self) -> dict:
-        """获取统计信息"""
-        return {
-            "name": self.name,
-            "state": self.state.value,
-            "failure_count": self.failure_count,
-            "success_count": self.success_count,
-            "last_failure_time": self.last_failure_time,
-            "last_success_time": self.last_success_time,
-        }
+        """获取统计信息（字典形式，兼容按键访问的调用方）"""
+        return self.get_stats_snapshot()._asdict()
 
     def reset(self):
         """重置熔断器"""
-        self.state = CircuitBreakerState.CLOSED
-        self.failure_count = 0
-        self.success_count = 0
-        self.last_failure_time = None
-        self.last_success_time = None
-        self.half_open_calls = 0
-        logger.info(f"[{self.name}] 熔断器已重置")
+        with self._lock:
+            self.state = CircuitBreakerState.CLOSED
+            self.failure_count = 0
+            self.success_count = 0
+            self.last_failure_time = None
+            self.last_success_time = None
+            self._open_until = 0.0
+            self.half_open_calls = 0
+            self._clear_window()
+        logger.info("[%s] 熔断器已重置", self.name)
 
 
 def circuit_breaker(
@@ -216,6 +370,8 @@ def circuit_breaker(
         pass
     ```
 
+    装饰协程函数时使用 call_async
+
     Args:
         failure_threshold: 失败次数阈值
         timeout: 超时时间（秒）
@@ -230,9 +386,23 @@ def circuit_breaker(
     )
 
     def decorator(func: Callable):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await breaker.call_async(func, *args, **kwargs)
+
+            return async_wrapper
+
+        # 装饰时绑定方法，每次调用直接走 try_call，省去 call 的一层转发与属性查找
+        try_call = breaker.try_call
+        open_error = breaker._open_error
+
         @wraps(func)
         def wrapper(*args, **kwargs):
-            return breaker.call(func, *args, **kwargs)
+            ok, result = try_call(func, *args, **kwargs)
+            if ok:
+                return result
+            raise open_error()
 
         return wrapper
 
@@ -6,8 +6,11 @@
 提供灵活的重试机制，支持指数退避、条件重试等
 """
 
+import asyncio
+import inspect
 import logging
 import time
+from random import random as _random
 from typing import Callable, Optional, Type, Tuple, Any
 from functools import wraps
 
@@ -25,6 +28,11 @@ class RetryHelper:
     - 自定义重试条件
     """
 
+    __slots__ = (
+        'max_attempts', 'base_delay', 'max_delay', 'exponential_base', 'jitter',
+        'retry_exceptions', 'on_retry', 'sleep_fn', '_retry_types', '_delays',
+    )
+
     def __init__(
         self,
         max_attempts: int = 3,
@@ -33,7 +41,8 @@ class RetryHelper:
         exponential_base: float = 2.0,
         jitter: bool = True,
         retry_exceptions: Optional[Tuple[Type[Exception], ...]] = None,
-        on_retry: Optional[Callable] = None
+        on_retry: Optional[Callable] = None,
+        sleep_fn: Callable[[float], None] = time.sleep
     ):
         """
         初始化重试助手
@@ -46,6 +55,7 @@ class RetryHelper:
             jitter: 是否添加随机抖动（避免惊群效应）
             retry_exceptions: 需要重试的异常类型（None表示重试所有异常）
             on_retry: 重试前的回调函数
+            sleep_fn: 等待函数（参数为秒），测试时可注入假时钟
         """
         self.max_attempts = max_attempts
         self.base_delay = base_delay
@@ -53,7 +63,20 @@ class RetryHelper:
         self.exponential_base = exponential_base
         self.jitter = jitter
         self.retry_exceptions = retry_exceptions
+        # 需要重试的异常类型集合：异常类型恰好在其中时一次集合查找即可，未命中再走 isinstance
+        if isinstance(retry_exceptions, type):
+            retry_exceptions = (retry_exceptions,)
+        self._retry_types = frozenset(retry_exceptions or ())
         self.on_retry = on_retry
+        self.sleep_fn = sleep_fn
+
+        # 预先计算各次重试的退避延迟（尝试次数有限），达到最大延迟后不再列出
+        self._delays = []
+        for i in range(max(max_attempts - 1, 0)):
+            delay = base_delay * (exponential_base ** i)
+            if delay >= max_delay:
+                break
+            self._delays.append(delay)
 
     def run(self, func: Callable, *args, **kwargs) -> Any:
         """
@@ -70,66 +93,102 @@ class RetryHelper:
         Raises:
             最后一次调用的异常
         """
-        last_exception = None
-
         for attempt in range(1, self.max_attempts + 1):
             try:
                 result = func(*args, **kwargs)
+            except Exception as e:
+                delay = self._on_attempt_failed(e, attempt)
+                if delay is None:
+                    raise
 
-                if attempt > 1:
-                    logger.info(
-                        f"[Retry] 第 {attempt} 次尝试成功 "
-                        f"(函数: {func.__name__})"
-                    )
+                # 等待
+                self.sleep_fn(delay)
+                continue
 
-                return result
+            if attempt > 1:
+                logger.info("[Retry] 第 %d 次尝试成功 (函数: %s)", attempt, func.__name__)
 
-            except Exception as e:
-                last_exception = e
+            return result
+
+    async def run_async(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        执行带重试的函数调用（异步版本）
+
+        func 返回可等待对象（如协程函数）时等待其结果；
+        退避期间 await asyncio.sleep（不使用 sleep_fn），不阻塞事件循环
 
-                # 检查是否应该重试
-                should_retry = self._should_retry(e, attempt)
+        Args:
+            func: 要执行的函数或协程函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+
+        Returns:
+            函数执行结果
 
-                if not should_retry:
-                    logger.error(
-                        f"[Retry] 异常不满足重试条件，放弃重试: {e}"
-                    )
+        Raises:
+            最后一次调用的异常
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                result = func(*args, **kwargs)
+                if inspect.isawaitable(result):
+                    result = await result
+            except Exception as e:
+                delay = self._on_attempt_failed(e, attempt)
+                if delay is None:
                     raise
 
-                # 还有重试机会
-                if attempt < self.max_attempts:
-                    delay = self._calculate_delay(attempt)
-
-                    logger.warning(
-                        f"[Retry] 第 {attempt}/{self.max_attempts} 次尝试失败: {e}, "
-                        f"等待 {delay:.2f}s 后重试..."
-                    )
-
-                    # 执行回调
-                    if self.on_retry:
-                        try:
-                            self.on_retry(attempt, e, delay)
-                        except Exception as callback_error:
-                            logger.error(
-                                f"[Retry] 回调函数执行失败: {callback_error}"
-                            )
-
-                    # 等待
-                    time.sleep(delay)
-                else:
-                    logger.error(
-                        f"[Retry] 已达到最大重试次数 ({self.max_attempts})，放弃: {e}"
-                    )
-
-        # 所有尝试都失败，抛出最后一次异常
-        if last_exception:
-            raise last_exception
+                # 等待
+                await asyncio.sleep(delay)
+                continue
+
+            if attempt > 1:
+                logger.info("[Retry] 第 %d 次尝试成功 (函数: %s)", attempt, func.__name__)
+
+            return result
+
+    def _on_attempt_failed(self, exception: Exception, attempt: int) -> Optional[float]:
+        """
+        处理一次失败的尝试
+
+        Args:
+            exception: 本次尝试抛出的异常
+            attempt: 当前尝试次数（从 1 开始）
+
+        Returns:
+            下次重试前的等待时间（秒）；不再重试时返回 None
+        """
+        # 检查是否应该重试
+        if not self._should_retry(exception, attempt):
+            logger.error("[Retry] 异常不满足重试条件，放弃重试: %s", exception)
+            return None
+
+        # 还有重试机会
+        if attempt < self.max_attempts:
+            delay = self._calculate_delay(attempt)
+
+            logger.warning(
+                "[Retry] 第 %d/%d 次尝试失败: %s, 等待 %.2fs 后重试...",
+                attempt, self.max_attempts, exception, delay
+            )
+
+            # 执行回调
+            if self.on_retry:
+                try:
+                    self.on_retry(attempt, exception, delay)
+                except Exception as callback_error:
+                    logger.error("[Retry] 回调函数执行失败: %s", callback_error)
+
+            return delay
+
+        logger.error("[Retry] 已达到最大重试次数 (%d)，放弃: %s", self.max_attempts, exception)
+        return None
 
     def _should_retry(self, exception: Exception, attempt: int) -> bool:
         """判断是否应该重试"""
         # 检查异常类型
         if self.retry_exceptions:
-            if not isinstance(exception, self.retry_exceptions):
+            if type(exception) not in self._retry_types and not isinstance(exception, self.retry_exceptions):
                 return False
 
         # 检查尝试次数
@@ -140,16 +199,15 @@ class RetryHelper:
 
     def _calculate_delay(self, attempt: int) -> float:
         """计算延迟时间"""
-        # 指数退避
-        delay = self.base_delay * (self.exponential_base ** (attempt - 1))
-
-        # 限制最大延迟
-        delay = min(delay, self.max_delay)
+        # 指数退避（查预计算表，表外即已达到最大延迟）
+        if attempt <= len(self._delays):
+            delay = self._delays[attempt - 1]
+        else:
+            delay = min(self.base_delay * (self.exponential_base ** (attempt - 1)), self.max_delay)
 
         # 添加随机抖动（±25%）
         if self.jitter:
-            import random
-            delay = delay * (0.75 + random.random() * 0.5)
+            delay = delay * (0.75 + _random() * 0.5)
 
         return delay
 
@@ -160,7 +218,8 @@ def retry_with_backoff(
     max_delay: float = 60.0,
     exponential_base: float = 2.0,
     jitter: bool = True,
-    retry_exceptions: Optional[Tuple[Type[Exception], ...]] = None
+    retry_exceptions: Optional[Tuple[Type[Exception], ...]] = None,
+    sleep_fn: Callable[[float], None] = time.sleep
 ):
     """
     重试装饰器
@@ -173,6 +232,8 @@ def retry_with_backoff(
         pass
     ```
 
+    装饰协程函数时使用 run_async，退避期间不阻塞事件循环
+
     Args:
         max_attempts: 最大尝试次数
         base_delay: 基础延迟（秒）
@@ -180,6 +241,7 @@ def retry_with_backoff(
         exponential_base: 指数退避底数
         jitter: 是否添加抖动
         retry_exceptions: 需要重试的异常类型
+        sleep_fn: 等待函数（参数为秒）
     """
     retry_helper = RetryHelper(
         max_attempts=max_attempts,
@@ -187,10 +249,18 @@ def retry_with_backoff(
         max_delay=max_delay,
         exponential_base=exponential_base,
         jitter=jitter,
-        retry_exceptions=retry_exceptions
+        retry_exceptions=retry_exceptions,
+        sleep_fn=sleep_fn
     )
 
     def decorator(func: Callable):
+        if inspect.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await retry_helper.run_async(func, *args, **kwargs)
+
+            return async_wrapper
+
         @wraps(func)
         def wrapper(*args, **kwargs):
             return retry_helper.run(func, *args, **kwargs)
@@ -240,14 +310,12 @@ def retry_on_exception(
 
                     if attempt < max_attempts:
                         logger.warning(
-                            f"[Retry] 第 {attempt}/{max_attempts} 次尝试失败: {e}, "
-                            f"等待 {delay:.2f}s 后重试..."
+                            "[Retry] 第 %d/%d 次尝试失败: %s, 等待 %.2fs 后重试...",
+                            attempt, max_attempts, e, delay
                         )
                         time.sleep(delay)
                     else:
-                        logger.error(
-                            f"[Retry] 已达到最大重试次数 ({max_attempts})，放弃"
-                        )
+                        logger.error("[Retry] 已达到最大重试次数 (%d)，放弃", max_attempts)
 
             if last_exception:
                 raise last_exception
@@ -16,8 +16,9 @@
 
 import re
 import logging
-from typing import Optional, List, Any
-from datetime import datetime
+from functools import lru_cache
+from typing import Optional, List, Any, Tuple
+from datetime import date, datetime
 
 from exceptions import InvalidStockCodeError, InputValidationError
 
@@ -44,6 +45,52 @@ class StockCodeValidator:
     # ETF代码前缀
     ETF_PREFIXES = ('51', '52', '56', '58', '15', '16', '18')
 
+    @staticmethod
+    def _is_digits(code: str, length: int) -> bool:
+        """判断是否为指定位数的数字（与正则 \\d{length} 全匹配等价，但无需进入正则引擎）"""
+        return len(code) == length and code.isdecimal()
+
+    @classmethod
+    def _normalize_a_stock(cls, code: str) -> Tuple[bool, str]:
+        """
+        标准化A股代码（不抛异常）
+
+        Args:
+            code: 已去除首尾空白的股票代码
+
+        Returns:
+            (是否有效, 标准化后的代码)
+        """
+        # 移除可能的后缀
+        code = code.replace('.SH', '').replace('.SZ', '').replace('.sh', '').replace('.sz', '')
+        return cls._is_digits(code, 6), code
+
+    @classmethod
+    def _normalize_hk_stock(cls, code: str) -> Tuple[bool, str]:
+        """
+        标准化港股代码（不抛异常）
+
+        Args:
+            code: 已去除首尾空白并转为大写的非空港股代码
+
+        Returns:
+            (是否有效, 有效时为完整代码如 00700.HK，无效时为去前缀补齐后的代码)
+        """
+        # 已经是完整格式（如 00700.HK）
+        if code.endswith('.HK') and cls._is_digits(code[:-3], 5):
+            return True, code
+
+        # 移除HK前缀
+        code = code.replace('HK', '')
+
+        # 补齐5位
+        if len(code) < 5:
+            code = code.zfill(5)
+
+        if not cls._is_digits(code, 5):
+            return False, code
+        return True, f"{code}.HK"
+
     @classmethod
     def validate_a_stock(cls, code: str) -> str:
         """
@@ -63,10 +110,8 @@ class StockCodeValidator:
         if not code:
             raise InvalidStockCodeError("股票代码不能为空")
 
-        # 移除可能的后缀
-        code = code.replace('.SH', '').replace('.SZ', '').replace('.sh', '').replace('.sz', '')
-
-        if not cls.A_STOCK_PATTERN.match(code):
+        valid, code = cls._normalize_a_stock(code)
+        if not valid:
             raise InvalidStockCodeError(
                 f"无效的A股代码格式: {code}（应为6位数字）"
             )
@@ -92,23 +137,13 @@ class StockCodeValidator:
         if not code:
             raise InvalidStockCodeError("港股代码不能为空")
 
-        # 已经是完整格式
-        if cls.HK_STOCK_FULL_PATTERN.match(code):
-            return code
-
-        # 移除HK前缀
-        code = code.replace('HK', '')
-
-        # 补齐5位
-        if len(code) < 5:
-            code = code.zfill(5)
-
-        if not cls.HK_STOCK_PATTERN.match(code):
+        valid, code = cls._normalize_hk_stock(code)
+        if not valid:
             raise InvalidStockCodeError(
                 f"无效的港股代码格式: {code}（应为4-5位数字）"
             )
 
-        return f"{code}.HK"
+        return code
 
     @classmethod
     def validate(cls, code: str) -> str:
@@ -124,23 +159,27 @@ class StockCodeValidator:
         Raises:
             InvalidStockCodeError: 代码格式无效
         """
+        return _validate_cached(code)
+
+    @classmethod
+    def _validate(cls, code: str) -> str:
+        """validate 的实际实现（未缓存）"""
         code = code.strip()
+        upper_code = code.upper()
 
         # 判断是否为港股（包含.HK后缀或包含HK前缀）
-        if '.HK' in code.upper() or code.upper().startswith('HK'):
+        if '.HK' in upper_code or upper_code.startswith('HK'):
             return cls.validate_hk_stock(code)
 
-        # 尝试验证A股
-        try:
-            return cls.validate_a_stock(code)
-        except InvalidStockCodeError:
-            pass
+        # 依次按A股、港股格式识别（不抛异常，避免无效代码构造并捕获两次异常）
+        if code:
+            valid, normalized = cls._normalize_a_stock(code)
+            if valid:
+                return normalized
 
-        # 尝试验证港股
-        try:
-            return cls.validate_hk_stock(code)
-        except InvalidStockCodeError:
-            pass
+            valid, normalized = cls._normalize_hk_stock(upper_code)
+            if valid:
+                return normalized
 
         raise InvalidStockCodeError(
             f"无法识别的股票代码格式: {code}（支持A股6位数字、港股4-5位数字）"
@@ -171,6 +210,11 @@ class StockCodeValidator:
         Returns:
             市场标识：'SH'（沪市）、'SZ'（深市）、'HK'（港股）
         """
+        return _get_market_cached(code)
+
+    @classmethod
+    def _get_market(cls, code: str) -> str:
+        """get_market 的实际实现（未缓存）"""
         code = cls.validate(code)
 
         # 港股
@@ -188,6 +232,18 @@ class StockCodeValidator:
             return 'SH'
 
 
+# 股票代码词汇量小（数千只）且反复出现，验证结果只取决于输入，缓存后重复查询只需一次字典查找；
+# 无效代码抛出的异常不会被缓存。同一代码的"无法判断市场"警告只在首次查询时记录
+@lru_cache(maxsize=8192)
+def _validate_cached(code: str) -> str:
+    return StockCodeValidator._validate(code)
+
+
+@lru_cache(maxsize=8192)
+def _get_market_cached(code: str) -> str:
+    return StockCodeValidator._get_market(code)
+
+
 # ==================== Prompt注入防护 ====================
 
 class PromptSanitizer:
@@ -196,11 +252,12 @@ class PromptSanitizer:
     防止Prompt注入攻击，清洗用户输入。
     """
 
-    # 危险字符模式（控制字符、转义字符等）
+    # 危险字符模式（控制字符、转义字符等）；各模式后缓存其绑定方法，省去调用时的属性查找
     DANGEROUS_CHARS_PATTERN = re.compile(r'[\x00-\x1f\x7f-\x9f]')
 
     # 模板注入模式（检测 {{ }}, ${ } 等）
     TEMPLATE_INJECTION_PATTERN = re.compile(r'\{\{|\}\}|\$\{')
+    _search_template_injection = TEMPLATE_INJECTION_PATTERN.search
 
     # 指令注入模式（检测系统指令关键词）
     COMMAND_INJECTION_KEYWORDS = [
@@ -209,9 +266,21 @@ class PromptSanitizer:
         '```', '###', '***',
     ]
 
+    # 全部关键词合并为一个忽略大小写的多选正则，一次扫描找出所有命中，无需构造小写副本
+    # （关键词之间没有首尾重叠，finditer 的非重叠匹配不会漏掉其他关键词）
+    _COMMAND_INJECTION_PATTERN = re.compile(
+        '|'.join(map(re.escape, COMMAND_INJECTION_KEYWORDS)), re.IGNORECASE
+    )
+    _find_command_keywords = _COMMAND_INJECTION_PATTERN.finditer
+
     # 最大输入长度（字符数）
     MAX_LENGTH = 2000
 
+    # str.translate 映射表：删除与 DANGEROUS_CHARS_PATTERN 相同的控制字符，并转义模板字符
+    _DELETE_TABLE = dict.fromkeys([*range(0x00, 0x20), *range(0x7f, 0xa0)])
+    _ESCAPE_TABLE = {ord('{'): '{{', ord('}'): '}}'}
+    _SANITIZE_TABLE = {**_DELETE_TABLE, **_ESCAPE_TABLE}
+
     @classmethod
     def sanitize(cls, text: str, max_length: Optional[int] = None) -> str:
         """
@@ -233,17 +302,14 @@ class PromptSanitizer:
 
         max_length = max_length or cls.MAX_LENGTH
 
-        # 1. 移除危险字符
-        text = cls.DANGEROUS_CHARS_PATTERN.sub('', text)
-
-        # 2. 限制长度
-        text = text[:max_length]
-
-        # 3. 转义模板字符（防止模板注入）
-        # 将 { 替换为 {{，} 替换为 }}
-        text = text.replace('{', '{{').replace('}', '}}')
+        if len(text) <= max_length:
+            # 未超长时（删除字符只会更短）无需截断，一次 translate 完成删除与转义
+            text = text.translate(cls._SANITIZE_TABLE)
+        else:
+            # 超长时保持"先删除危险字符、再截断、再转义"的顺序，截断长度不受转义影响
+            text = text.translate(cls._DELETE_TABLE)[:max_length].translate(cls._ESCAPE_TABLE)
 
-        # 4. 去除首尾空白
+        # 去除首尾空白
         text = text.strip()
 
         return text
@@ -262,14 +328,16 @@ class PromptSanitizer:
         threats = []
 
         # 检测模板注入
-        if cls.TEMPLATE_INJECTION_PATTERN.search(text):
+        if cls._search_template_injection(text):
             threats.append("模板注入（检测到模板语法字符）")
 
         # 检测指令注入
-        text_lower = text.lower()
-        for keyword in cls.COMMAND_INJECTION_KEYWORDS:
-            if keyword in text_lower:
-                threats.append(f"指令注入（检测到关键词: {keyword}）")
+        found = {match.group().lower() for match in cls._find_command_keywords(text)}
+        if found:
+            # 按关键词列表顺序报告；lower() 后再比对，排除 IGNORECASE 额外放行的 Unicode 等价字符
+            for keyword in cls.COMMAND_INJECTION_KEYWORDS:
+                if keyword in found:
+                    threats.append(f"指令注入（检测到关键词: {keyword}）")
 
         # 检测过长输入
         if len(text) > cls.MAX_LENGTH:
@@ -312,6 +380,7 @@ class SQLSafeValidator:
 
     # 安全的列名模式（字母、数字、下划线）
     SAFE_IDENTIFIER_PATTERN = re.compile(r'^[a-zA-Z_][a-zA-Z0-9_]*$')
+    _match_safe_identifier = SAFE_IDENTIFIER_PATTERN.match
 
     # 已知的危险SQL关键词
     DANGEROUS_KEYWORDS = [
@@ -320,6 +389,21 @@ class SQLSafeValidator:
         '--', ';--', '/*', '*/', 'xp_', 'sp_',
     ]
 
+    # 危险关键词合并为一个忽略大小写的多选正则（子串匹配，不加单词边界），一次扫描即可判断；
+    # 原先与大写后的列名比较，含小写字母的关键词从未命中，这里同样不纳入，避免误拒 exp_date 等列名
+    _DANGEROUS_KEYWORDS_PATTERN = re.compile(
+        '|'.join(re.escape(keyword) for keyword in DANGEROUS_KEYWORDS if keyword == keyword.upper()),
+        re.IGNORECASE
+    )
+    _search_dangerous_keyword = _DANGEROUS_KEYWORDS_PATTERN.search
+
+    # 批量验证用的合并正则：一次 fullmatch 同时检查标识符格式与危险关键词（否定前瞻），
+    # 关键词部分单独忽略大小写，标识符部分仍只接受 ASCII 字母
+    _SAFE_COLUMN_PATTERN = re.compile(
+        rf'(?!(?s:.*)(?i:{_DANGEROUS_KEYWORDS_PATTERN.pattern}))[a-zA-Z_][a-zA-Z0-9_]*'
+    )
+    _fullmatch_safe_column = _SAFE_COLUMN_PATTERN.fullmatch
+
     @classmethod
     def validate_column_name(cls, column_name: str) -> str:
         """
@@ -336,18 +420,16 @@ class SQLSafeValidator:
         """
         column_name = column_name.strip()
 
-        if not cls.SAFE_IDENTIFIER_PATTERN.match(column_name):
+        if not cls._match_safe_identifier(column_name):
             raise InputValidationError(
                 f"不安全的列名: {column_name}（只能包含字母、数字、下划线）"
             )
 
         # 检查危险关键词
-        upper_name = column_name.upper()
-        for keyword in cls.DANGEROUS_KEYWORDS:
-            if keyword in upper_name:
-                raise InputValidationError(
-                    f"列名包含危险关键词: {column_name}"
-                )
+        if cls._search_dangerous_keyword(column_name):
+            raise InputValidationError(
+                f"列名包含危险关键词: {column_name}"
+            )
 
         return column_name
 
@@ -361,11 +443,18 @@ class SQLSafeValidator:
 
         Returns:
             验证后的列名列表
+
+        Raises:
+            InputValidationError: 存在不安全的列名
         """
-        validated = []
-        for col in columns:
-            validated.append(cls.validate_column_name(col))
-        return validated
+        validated = [col.strip() for col in columns]
+
+        # 全部安全时每个列名只需一次正则匹配，循环由 all/map 在 C 层完成
+        if all(map(cls._fullmatch_safe_column, validated)):
+            return validated
+
+        # 存在不安全列名时逐个验证，抛出与单列验证相同的异常
+        return [cls.validate_column_name(col) for col in columns]
 
     @classmethod
     def is_safe_alter_table(cls, column_name: str, column_type: str) -> bool:
@@ -413,9 +502,19 @@ class SensitiveDataFilter:
         (re.compile(r'Bearer\s+[a-zA-Z0-9_\-\.]{20,}'),
          r'Bearer ***REDACTED***'),
     ]
+    _API_KEY_SUBS = [(pattern.sub, replacement) for pattern, replacement in API_KEY_PATTERNS]
 
     # URL中的敏感信息
     URL_SENSITIVE_PATTERN = re.compile(r'([?&](api_key|token|secret|password)=)[^&]+')
+    _redact_url_params = URL_SENSITIVE_PATTERN.sub
+
+    # 预筛选：上述任一模式命中都必须包含的关键片段，合并为一个正则一次扫描；
+    # 不含任何片段的消息（绝大多数日志）原样返回，省去逐个模式的替换
+    _SENSITIVE_HINT_PATTERN = re.compile(r'(?i:api[_-]?key|token|secret|password)|sk-|pk-|Bearer')
+    _search_sensitive_hint = _SENSITIVE_HINT_PATTERN.search
+
+    # 需要脱敏的字典字段（小写）
+    SENSITIVE_FIELDS = frozenset({'api_key', 'token', 'secret', 'password', 'authorization', 'bearer'})
 
     @classmethod
     def filter_log(cls, message: str) -> str:
@@ -428,14 +527,17 @@ class SensitiveDataFilter:
         Returns:
             过滤后的消息
         """
+        if not cls._search_sensitive_hint(message):
+            return message
+
         filtered = message
 
         # 过滤API Key
-        for pattern, replacement in cls.API_KEY_PATTERNS:
-            filtered = pattern.sub(replacement, filtered)
+        for sub, replacement in cls._API_KEY_SUBS:
+            filtered = sub(replacement, filtered)
 
         # 过滤URL中的敏感参数
-        filtered = cls.URL_SENSITIVE_PATTERN.sub(r'\1***REDACTED***', filtered)
+        filtered = cls._redact_url_params(r'\1***REDACTED***', filtered)
 
         return filtered
 
@@ -450,7 +552,11 @@ class SensitiveDataFilter:
         Returns:
             脱敏后的字典
         """
-        sensitive_fields = {'api_key', 'token', 'secret', 'password', 'authorization', 'bearer'}
+        sensitive_fields = cls.SENSITIVE_FIELDS
+
+        # 不含敏感字段时（常见情况）直接在 C 层浅拷贝，不逐项重建
+        if sensitive_fields.isdisjoint(key.lower() for key in data):
+            return dict(data)
 
         safe_data = {}
         for key, value in data.items():
@@ -530,8 +636,8 @@ class DataRangeValidator:
             InputValidationError: 日期范围无效
         """
         try:
-            start = datetime.strptime(start_date, '%Y-%m-%d')
-            end = datetime.strptime(end_date, '%Y-%m-%d')
+            start = _parse_date(start_date)
+            end = _parse_date(end_date)
         except ValueError as e:
             raise InputValidationError(f"日期格式错误: {e}") from e
 
@@ -549,6 +655,24 @@ class DataRangeValidator:
         return start_date, end_date
 
 
+@lru_cache(maxsize=4096)
+def _parse_date(text: str) -> date:
+    """
+    解析 YYYY-MM-DD 日期（结果缓存，同一日期在多只股票间反复出现）
+
+    标准的 10 位格式直接按位置取年月日，不经过纯 Python 实现的 strptime；
+    其他写法（如未补零的 2024-1-5）仍交给 strptime，接受范围与报错信息保持不变
+    """
+    if len(text) == 10 and text[4] == '-' and text[7] == '-':
+        digits = text[:4] + text[5:7] + text[8:]
+        if digits.isascii() and digits.isdigit():
+            try:
+                return date(int(text[:4]), int(text[5:7]), int(text[8:]))
+            except ValueError:
+                pass
+    return datetime.strptime(text, '%Y-%m-%d').date()
+
+
 # ==================== 便捷函数 ====================
 
 def validate_stock_code(code: str) -> str: